@@ -0,0 +1,219 @@
+"""
+Incremental analytics of sampled series.
+
+Every class receives samples one by one with :meth:`add` and keeps a constant amount of state per sample, so it can
+run inside the acquisition loop and its results can be read at any time during the measurement.
+
+* RunningCharge: integral of the current by the trapezoidal rule
+* RollingStats: mean and variance of the last samples
+* Regression: least squares line through all samples or the last samples, with the standard error of the slope
+
+ElectrolysisAnalytics combines them for the electrolysis phase of ChronoAmperometry, including the estimate of the
+Cottrell slope, i.e. the slope of the current over ``1 / sqrt(t)``.
+"""
+import math
+from collections import deque
+
+
+class RunningCharge:
+    """Charge passed since the first sample, integrated by the trapezoidal rule"""
+
+    def __init__(self):
+        self.charge = 0.0
+        self.first_time = None
+        self._previous = None
+
+    def add(self, time: float, current: float):
+        if self._previous is None:
+            self.first_time = time
+        else:
+            previous_time, previous_current = self._previous
+            self.charge += (time - previous_time) * (current + previous_current) / 2
+        self._previous = (time, current)
+
+    @property
+    def duration(self) -> float:
+        """Time between the first and the last sample"""
+        return 0.0 if self._previous is None else self._previous[0] - self.first_time
+
+    @property
+    def mean_current(self) -> float:
+        """Charge divided by duration, NaN before the second sample"""
+        return self.charge / self.duration if self.duration > 0 else math.nan
+
+
+class RollingStats:
+    """
+    Mean and variance of the last ``window`` samples. Welford's updates are applied for added and for dropped
+    samples, which is stable also for small variations of large values.
+
+    :param window: Number of samples
+    """
+
+    def __init__(self, window: int):
+        if window < 2:
+            raise ValueError(f'Window must have at least 2 samples, got {window}')
+        self.window = window
+        self.mean = 0.0
+        self._m2 = 0.0
+        self._values = deque()
+
+    def add(self, value: float):
+        if len(self._values) == self.window:
+            self._remove(self._values.popleft())
+        self._values.append(value)
+        delta = value - self.mean
+        self.mean += delta / len(self._values)
+        self._m2 += delta * (value - self.mean)
+
+    def _remove(self, value):
+        count = len(self._values)  # the value is already dropped from the window
+        if not count:
+            self.mean = self._m2 = 0.0
+            return
+        previous_mean = self.mean
+        self.mean -= (value - self.mean) / count
+        self._m2 -= (value - self.mean) * (value - previous_mean)
+
+    @property
+    def count(self) -> int:
+        return len(self._values)
+
+    @property
+    def full(self) -> bool:
+        """True once the window holds ``window`` samples"""
+        return len(self._values) == self.window
+
+    @property
+    def variance(self) -> float:
+        """Sample variance, NaN with less than 2 samples"""
+        count = len(self._values)
+        return max(self._m2, 0.0) / (count - 1) if count > 1 else math.nan
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+
+class Regression:
+    """
+    Least squares line ``y = intercept + slope * x``, updated with co-moments of x and y
+
+    :param window: Fit only the last ``window`` samples. None fits all samples.
+    """
+
+    def __init__(self, window: int = None):
+        if window is not None and window < 3:
+            raise ValueError(f'Window must have at least 3 samples, got {window}')
+        self.window = window
+        self.count = 0
+        self._mean_x = self._mean_y = 0.0
+        self._m2_x = self._m2_y = self._c_xy = 0.0
+        self._points = deque() if window is not None else None
+
+    def add(self, x: float, y: float):
+        if self._points is not None:
+            if len(self._points) == self.window:
+                self._remove(*self._points.popleft())
+            self._points.append((x, y))
+        self.count += 1
+        dx = x - self._mean_x
+        dy = y - self._mean_y
+        self._mean_x += dx / self.count
+        self._mean_y += dy / self.count
+        self._m2_x += dx * (x - self._mean_x)
+        self._m2_y += dy * (y - self._mean_y)
+        self._c_xy += dx * (y - self._mean_y)
+
+    def _remove(self, x, y):
+        self.count -= 1
+        if not self.count:
+            self._mean_x = self._mean_y = self._m2_x = self._m2_y = self._c_xy = 0.0
+            return
+        previous_mean_y = self._mean_y
+        previous_mean_x = self._mean_x
+        self._mean_x -= (x - self._mean_x) / self.count
+        self._mean_y -= (y - self._mean_y) / self.count
+        self._m2_x -= (x - self._mean_x) * (x - previous_mean_x)
+        self._m2_y -= (y - self._mean_y) * (y - previous_mean_y)
+        self._c_xy -= (x - self._mean_x) * (y - previous_mean_y)
+
+    @property
+    def full(self) -> bool:
+        """True once the window holds ``window`` samples. Always True without a window."""
+        return self.window is None or self.count == self.window
+
+    @property
+    def slope(self) -> float:
+        """NaN while x does not vary"""
+        return self._c_xy / self._m2_x if self._m2_x > 0 else math.nan
+
+    @property
+    def intercept(self) -> float:
+        return self._mean_y - self.slope * self._mean_x
+
+    @property
+    def residual_std(self) -> float:
+        """Standard deviation of y around the line, NaN with less than 3 samples"""
+        if self.count < 3 or self._m2_x <= 0:
+            return math.nan
+        residual = max(self._m2_y - self._c_xy ** 2 / self._m2_x, 0.0)
+        return math.sqrt(residual / (self.count - 2))
+
+    @property
+    def slope_stderr(self) -> float:
+        """Standard error of the slope, NaN with less than 3 samples"""
+        if self.count < 3 or self._m2_x <= 0:
+            return math.nan
+        return self.residual_std / math.sqrt(self._m2_x)
+
+
+class ElectrolysisAnalytics:
+    """
+    Running analytics of the current after a potential step
+
+    :param window: Number of samples of the rolling mean and variance of the current
+    """
+
+    def __init__(self, window: int = 20):
+        self.charge = RunningCharge()
+        self.rolling = RollingStats(window)
+        self.cottrell = Regression()
+        self.samples = 0
+        self.current = math.nan
+
+    def add(self, time: float, current: float):
+        """
+        :param time: Seconds since the potential step
+        :param current: Current in A
+        """
+        current = float(current)
+        self.samples += 1
+        self.current = current
+        self.charge.add(time, current)
+        self.rolling.add(current)
+        if time > 0:
+            self.cottrell.add(1 / math.sqrt(time), current)
+
+    @property
+    def relative_std(self) -> float:
+        """Rolling standard deviation of the current relative to its rolling mean"""
+        mean = abs(self.rolling.mean)
+        return self.rolling.std / mean if mean > 0 else math.inf
+
+    def snapshot(self) -> dict:
+        """Current values of all analytics"""
+        return {
+            'samples': self.samples,
+            'current_A': self.current,
+            'charge_C': self.charge.charge,
+            'mean_current_A': self.charge.mean_current,
+            'rolling_mean_A': self.rolling.mean if self.rolling.count else math.nan,
+            'rolling_std_A': self.rolling.std,
+            'cottrell_slope_A_s05': self.cottrell.slope,
+            'cottrell_intercept_A': self.cottrell.intercept,
+        }
+
+    def __str__(self):
+        return (f'{self.samples} samples, charge {self.charge.charge:.6g} C, '
+                f'mean current {self.charge.mean_current:.6g} A, Cottrell slope {self.cottrell.slope:.6g} A s^0.5')
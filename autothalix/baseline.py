@@ -0,0 +1,97 @@
+import copy
+import hashlib
+import os
+import threading
+
+DEFAULT_BASELINE_PATH = 'baseline.yaml'
+
+
+class _CompiledBaseline:
+    """Parsed baseline file with default tables precompiled per measurement"""
+
+    def __init__(self, stat_key, digest, tables):
+        self.stat_key = stat_key
+        self.digest = digest
+        self.tables = tables
+
+
+class BaselineRegistry:
+    """
+    Process-wide registry of parsed baseline files.
+
+    Every baseline file is parsed only once. The list of single-key dicts from the YAML file is compiled into a
+    plain ``{parameter: value}`` table for every measurement. On each lookup the file is stat-ed; if its mtime or
+    size changed, the content hash is recomputed and the file is re-parsed only if the content really differs, so
+    edits made between the runs of a long sequence are picked up.
+    """
+
+    def __init__(self):
+        self._baselines = {}
+        self._lock = threading.Lock()
+
+    def defaults(self, measurement_name: str, path: str = DEFAULT_BASELINE_PATH) -> dict:
+        """
+        Returns default parameters of a measurement from a baseline file
+
+        :param measurement_name: Name of the measurement section in the baseline file (e.g. 'cv', 'ocp')
+        :param path: Path to the baseline file
+        :return: dict with parameter names as keys and default values as values. The dict is a fresh copy and can
+            be modified by the caller.
+        :raises ValueError: If there is no section for the measurement in the baseline file
+        """
+        tables = self._load(path).tables
+        if measurement_name not in tables:
+            raise ValueError(f'There is no "{measurement_name}" section in baseline file {path}')
+        return {name: _copy_value(value) for name, value in tables[measurement_name].items()}
+
+    def invalidate(self, path: str = None):
+        """
+        Drops parsed baseline files from the registry
+
+        :param path: Path to the baseline file to drop. If None, all files are dropped.
+        """
+        with self._lock:
+            if path is None:
+                self._baselines.clear()
+            else:
+                self._baselines.pop(os.path.abspath(path), None)
+
+    def _load(self, path):
+        abs_path = os.path.abspath(path)
+        stat = os.stat(abs_path)
+        stat_key = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            compiled = self._baselines.get(abs_path)
+            if compiled is not None and compiled.stat_key == stat_key:
+                return compiled
+            with open(abs_path, 'rb') as file:
+                content = file.read()
+            digest = hashlib.sha1(content).hexdigest()
+            if compiled is not None and compiled.digest == digest:
+                compiled.stat_key = stat_key  # file was touched, but content is the same
+                return compiled
+            import yaml
+
+            compiled = _CompiledBaseline(stat_key, digest, _compile(yaml.safe_load(content) or {}))
+            self._baselines[abs_path] = compiled
+            return compiled
+
+
+def _compile(data):
+    """Turns lists of single-key dicts from the baseline file into plain dicts"""
+    tables = {}
+    for measurement_name, parameters in data.items():
+        table = {}
+        for parameter_dict in parameters or []:
+            table.update(parameter_dict)
+        tables[measurement_name] = table
+    return tables
+
+
+def _copy_value(value):
+    if isinstance(value, (list, dict)):
+        return copy.deepcopy(value)
+    return value
+
+
+baseline_registry = BaselineRegistry()
@@ -0,0 +1,126 @@
+"""
+Columnar binary format for measured data.
+
+A file consists of:
+
+* 8 bytes magic ``b'ATXCOL1\\n'``
+* 8 bytes little-endian unsigned header length
+* JSON header ``{"columns": [...], "rows": n, "dtype": "<f8", "offsets": [...]}``, padded with spaces so that the data
+  starts at a multiple of 64 bytes
+* every column as a contiguous array of little-endian float64 values, each starting at its offset from the header
+
+The columns can be opened with numpy.memmap without parsing, see :func:`read_binary`.
+"""
+import csv
+import json
+import os
+import struct
+
+import numpy as np
+
+MAGIC = b'ATXCOL1\n'
+DTYPE = '<f8'
+EXTENSION = '.atx'
+_ALIGNMENT = 64
+
+
+def write_dict_to_binary(dict_data, file_path):
+    """
+    Write a dictionary of equally long columns to a columnar binary file
+
+    :param dict_data: dict with column names as keys and sequences of numbers as values
+    :param file_path: Path of the file, conventionally with '.atx' extension
+    """
+    columns = list(dict_data.keys())
+    arrays = [np.ascontiguousarray(values, dtype=DTYPE) for values in dict_data.values()]
+    rows = len(arrays[0]) if arrays else 0
+    if any(len(array) != rows for array in arrays):
+        raise ValueError('All columns must have the same length')
+
+    header = _build_header(columns, rows)
+    with open(file_path, 'wb') as file:
+        file.write(header)
+        for array in arrays:
+            file.write(array.tobytes())
+            file.write(b'\0' * _padding(array.nbytes))
+
+
+def read_binary_header(file_path) -> dict:
+    """
+    Reads the header of a columnar binary file
+
+    :return: dict with 'columns', 'rows', 'dtype' and 'offsets' keys
+    :raises ValueError: If the file is not a columnar binary file
+    """
+    with open(file_path, 'rb') as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f'{file_path} is not an autothalix columnar binary file')
+        header_length, = struct.unpack('<Q', file.read(8))
+        return json.loads(file.read(header_length))
+
+
+def read_binary(file_path, columns=None, mmap: bool = True) -> dict:
+    """
+    Reads columns from a columnar binary file
+
+    :param file_path: Path of the file
+    :param columns: Names of columns to read. If None, all columns are read.
+    :param mmap: If True, columns are read-only numpy.memmap arrays and nothing is read until accessed. Otherwise
+        columns are loaded into memory.
+    :return: dict with column names as keys and numpy arrays as values
+    """
+    header = read_binary_header(file_path)
+    offsets = dict(zip(header['columns'], header['offsets']))
+    rows = header['rows']
+    result = {}
+    for column in columns if columns is not None else header['columns']:
+        if column not in offsets:
+            raise KeyError(f'Column {column} is not in {file_path}')
+        if mmap and rows:
+            result[column] = np.memmap(file_path, dtype=header['dtype'], mode='r', offset=offsets[column],
+                                       shape=(rows,))
+        else:
+            with open(file_path, 'rb') as file:
+                file.seek(offsets[column])
+                result[column] = np.fromfile(file, dtype=header['dtype'], count=rows)
+    return result
+
+
+def csv_to_binary(csv_path, binary_path=None) -> str:
+    """
+    Converts a CSV file written by autothalix.utils.write_dict_to_csv to the columnar binary format
+
+    :param csv_path: Path of the CSV file
+    :param binary_path: Path of the binary file. Defaults to the CSV path with '.atx' extension.
+    :return: Path of the binary file
+    """
+    if binary_path is None:
+        binary_path = os.path.splitext(csv_path)[0] + EXTENSION
+    with open(csv_path, newline='') as file:
+        reader = csv.reader(file)
+        columns = next(reader)
+        values = np.array([row for row in reader if row], dtype=DTYPE).reshape(-1, len(columns))
+    write_dict_to_binary({column: values[:, i] for i, column in enumerate(columns)}, binary_path)
+    return binary_path
+
+
+def _build_header(columns, rows):
+    column_bytes = rows * np.dtype(DTYPE).itemsize
+    header = {'columns': columns, 'rows': rows, 'dtype': DTYPE, 'offsets': [0] * len(columns)}
+    # offsets depend on header length, so the header is sized with placeholder offsets of maximal width first
+    data_start = _align(len(MAGIC) + 8 + len(json.dumps(header)) + len(columns) * 20)
+    offset = data_start
+    for i in range(len(columns)):
+        header['offsets'][i] = offset
+        offset += _align(column_bytes)
+    encoded = json.dumps(header).encode()
+    encoded += b' ' * (data_start - len(MAGIC) - 8 - len(encoded))
+    return MAGIC + struct.pack('<Q', len(encoded)) + encoded
+
+
+def _align(size):
+    return size + _padding(size)
+
+
+def _padding(size):
+    return -size % _ALIGNMENT
@@ -0,0 +1,178 @@
+"""
+Cache of measurement results keyed by their configuration.
+
+Set "result_cache" parameter of measurements (in the script, in the baseline file, or for all measurements with
+``BaseMeasurement.result_cache = 'results.sqlite'``) to the path of the cache. Every successful run() stores a key
+of the run, a SHA-256 hash of the measurement name, measurement id and all resolved parameters, with the output
+name and files of the run. When a campaign script is run again, a measurement whose key is in the cache and whose
+output files still exist is not measured again: run() returns at once and the measurement refers to the existing
+output (and, for manual measurements, loads measured_data from it).
+
+Parameter "cache_policy" of measurements chooses how the cache is used:
+
+* 'reuse' (default): return the cached result if it is valid
+* 'refresh': always measure and replace the cached result
+
+Parameter "cache_max_age" (seconds) makes older results expire.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+from autothalix.utils import json_default, sqlite_connection
+
+REUSE = 'reuse'
+REFRESH = 'refresh'
+CACHE_POLICIES = (REUSE, REFRESH)
+# options that change how a run is done or reported, but not its result
+UNKEYED_OPTIONS = ('cache_policy', 'cache_max_age', 'checkpoint_interval', 'log_every', 'stream_flush_interval',
+                   'stream_flush_rows')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    measurement TEXT NOT NULL,
+    measurement_id TEXT NOT NULL,
+    finished_at REAL NOT NULL,
+    output_name TEXT NOT NULL,
+    output_path TEXT,
+    output_files TEXT NOT NULL DEFAULT '[]'
+);
+CREATE INDEX IF NOT EXISTS results_measurement ON results (measurement, measurement_id);
+"""
+
+
+def result_key(measurement_name: str, measurement_id: str, parameters: dict) -> str:
+    """
+    Stable hash of a measurement configuration. Parameters are serialized as JSON with sorted keys, enums by name,
+    so the key does not depend on the order of parameters or on the process.
+    """
+    configuration = {'measurement': measurement_name, 'measurement_id': measurement_id, 'parameters': parameters}
+    text = json.dumps(configuration, sort_keys=True, separators=(',', ':'), default=json_default)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class CachedResult:
+    """
+    Result of a previous run
+
+    :ivar key: Key of the configuration
+    :ivar finished_at: Time the run finished, seconds since the epoch
+    :ivar output_name: "_output_filename" of the run
+    :ivar output_path: Directory with the output files
+    :ivar output_files: Names of the output files
+    """
+
+    def __init__(self, key, measurement, measurement_id, finished_at, output_name, output_path, output_files):
+        self.key = key
+        self.measurement = measurement
+        self.measurement_id = measurement_id
+        self.finished_at = finished_at
+        self.output_name = output_name
+        self.output_path = output_path
+        self.output_files = json.loads(output_files)
+
+    @property
+    def age(self) -> float:
+        """Seconds since the run finished"""
+        return time.time() - self.finished_at
+
+    def files_exist(self) -> bool:
+        """True if all output files are still there. Results without local output files are assumed to exist."""
+        if self.output_path is None or not os.path.isdir(self.output_path):
+            return not self.output_files
+        return all(os.path.exists(os.path.join(self.output_path, name)) for name in self.output_files)
+
+    def __repr__(self):
+        return f'CachedResult({self.measurement!r}, {self.measurement_id!r}, {self.output_name!r})'
+
+
+class ResultCache:
+    """
+    Results of measurement runs in a SQLite file, by configuration key. Thread safe, every operation uses its own
+    connection.
+
+    :param path: Path to the SQLite file. It is created if it does not exist.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with self._connect() as connection:
+            connection.executescript(_SCHEMA)
+
+    def __repr__(self):
+        return f'ResultCache({self.path!r})'
+
+    def _connect(self):
+        return sqlite_connection(self.path)
+
+    def lookup(self, key: str, max_age: float = None):
+        """
+        Finds a valid result
+
+        :param key: Key of the configuration, see :func:`result_key`
+        :param max_age: Results older than this, in seconds, are expired
+        :return: CachedResult, or None if there is no result, it expired, or its output files are gone
+        """
+        with self._connect() as connection:
+            row = connection.execute('SELECT key, measurement, measurement_id, finished_at, output_name, output_path, '
+                                     'output_files FROM results WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        result = CachedResult(*row)
+        if max_age is not None and result.age > max_age:
+            return None
+        if not result.files_exist():
+            return None
+        return result
+
+    def store(self, key: str, measurement: str, measurement_id: str, output_name: str, output_path: str = None,
+              output_files=()):
+        """Stores the result of a finished run, replacing the previous result of the configuration"""
+        with self._connect() as connection:
+            connection.execute(
+                'INSERT OR REPLACE INTO results (key, measurement, measurement_id, finished_at, output_name, '
+                'output_path, output_files) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (key, measurement, measurement_id, time.time(), output_name,
+                 None if output_path is None else os.path.abspath(output_path), json.dumps(sorted(output_files))))
+
+    def invalidate(self, measurement: str = None, measurement_id: str = None, older_than: float = None) -> int:
+        """
+        Removes results, so they are measured again
+
+        :param measurement: Only results of this measurement
+        :param measurement_id: Only results of this measurement id
+        :param older_than: Only results older than this, in seconds
+        :return: Number of removed results
+        """
+        conditions, arguments = [], []
+        for column, value in (('measurement', measurement), ('measurement_id', measurement_id)):
+            if value is not None:
+                conditions.append(f'{column} = ?')
+                arguments.append(value)
+        if older_than is not None:
+            conditions.append('finished_at < ?')
+            arguments.append(time.time() - older_than)
+        where = f' WHERE {" AND ".join(conditions)}' if conditions else ''
+        with self._connect() as connection:
+            return connection.execute(f'DELETE FROM results{where}', arguments).rowcount
+
+    def count(self) -> int:
+        """Number of cached results"""
+        with self._connect() as connection:
+            return connection.execute('SELECT count(*) FROM results').fetchone()[0]
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(path: str) -> ResultCache:
+    """Returns the ResultCache of the path. The schema is created once per process."""
+    key = os.path.abspath(path)
+    with _caches_lock:
+        if key not in _caches:
+            _caches[key] = ResultCache(path)
+        return _caches[key]
@@ -0,0 +1,241 @@
+"""
+SQLite index of measurement runs.
+
+Set "catalog" parameter of measurements (in the script, in the baseline file, or for all measurements with
+``BaseMeasurement.catalog = 'runs.sqlite'``) to the path of the index, and every run() registers the measurement
+name, id, start time, duration, outcome, all parameters and the output files. Existing output directories can be
+indexed from their file names with :meth:`RunCatalog.backfill`::
+
+    catalog = RunCatalog('runs.sqlite')
+    catalog.backfill('data')
+    for run in catalog.query('eis', 'sample_1', parameters={'potential': 0.2}):
+        print(run['started_at'], run['output_files'])
+
+Command line::
+
+    python -m autothalix.catalog runs.sqlite backfill data
+    python -m autothalix.catalog runs.sqlite query eis --id sample_1 --parameter potential=0.2
+"""
+import argparse
+import glob
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+from autothalix.logging import logger
+from autothalix.utils import json_default, parse_output_filename, sqlite_connection
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    measurement TEXT NOT NULL,
+    measurement_id TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    duration_s REAL,
+    ok INTEGER,
+    error TEXT,
+    parameters TEXT NOT NULL DEFAULT '{}',
+    output_path TEXT,
+    output_name TEXT,
+    output_files TEXT NOT NULL DEFAULT '[]',
+    source TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_measurement ON runs (measurement, measurement_id, started_at);
+CREATE INDEX IF NOT EXISTS runs_output ON runs (output_path, output_name);
+"""
+
+_COLUMNS = ('id', 'measurement', 'measurement_id', 'started_at', 'duration_s', 'ok', 'error', 'parameters',
+            'output_path', 'output_name', 'output_files', 'source')
+
+
+class RunCatalog:
+    """
+    Index of measurement runs in a SQLite file. Thread safe, every operation uses its own connection.
+
+    :param path: Path to the SQLite file. It is created if it does not exist.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with self._connect() as connection:
+            connection.executescript(_SCHEMA)
+
+    def __repr__(self):
+        return f'RunCatalog({self.path!r})'
+
+    def _connect(self):
+        return sqlite_connection(self.path, row_factory=sqlite3.Row)
+
+    def register(self, measurement: str, measurement_id: str, started_at: datetime, duration_s: float = None,
+                 ok: bool = None, error: str = None, parameters: dict = None, output_path: str = None,
+                 output_name: str = None, output_files=(), source: str = 'run') -> int:
+        """
+        Adds a run to the catalog
+
+        :param measurement: Measurement name, e.g. 'eis'
+        :param measurement_id: Measurement id
+        :param started_at: Start of the run
+        :param duration_s: Duration of the run in seconds
+        :param ok: True if the run finished without errors. None if unknown.
+        :param error: Error message of a failed run
+        :param parameters: Parameters of the measurement. Values that are not JSON types are stored as strings.
+        :param output_path: Directory with the output files
+        :param output_name: Common prefix of the output files, "_output_filename" of the measurement
+        :param output_files: Names of the output files
+        :param source: 'run' for runs registered by measurements, 'backfill' for runs found in directories
+        :return: id of the run in the catalog
+        """
+        with self._connect() as connection:
+            cursor = connection.execute(
+                'INSERT INTO runs (measurement, measurement_id, started_at, duration_s, ok, error, parameters, '
+                'output_path, output_name, output_files, source) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (measurement, measurement_id, started_at.isoformat(timespec='microseconds'), duration_s,
+                 None if ok is None else int(ok), error, json.dumps(parameters or {}, default=json_default),
+                 None if output_path is None else os.path.abspath(output_path), output_name,
+                 json.dumps(sorted(output_files)), source))
+            return cursor.lastrowid
+
+    def query(self, measurement: str = None, measurement_id: str = None, parameters: dict = None,
+              since: datetime = None, until: datetime = None, ok: bool = None, tolerance: float = 1e-9) -> list:
+        """
+        Finds runs. All given conditions must hold.
+
+        :param measurement: Measurement name
+        :param measurement_id: Measurement id
+        :param parameters: Parameter values, e.g. ``{'potential': 0.2}``. Numbers match within the tolerance.
+        :param since: Runs started at or after this time
+        :param until: Runs started before this time
+        :param ok: Only successful (True) or failed (False) runs
+        :param tolerance: Absolute tolerance of numeric parameter values
+        :return: List of dicts with the columns of the runs, ordered by start time. 'parameters' and
+            'output_files' are decoded.
+        """
+        conditions, arguments = [], []
+        for column, value in (('measurement', measurement), ('measurement_id', measurement_id), ('ok', ok)):
+            if value is not None:
+                conditions.append(f'{column} = ?')
+                arguments.append(int(value) if column == 'ok' else value)
+        if since is not None:
+            conditions.append('started_at >= ?')
+            arguments.append(since.isoformat(timespec='microseconds'))
+        if until is not None:
+            conditions.append('started_at < ?')
+            arguments.append(until.isoformat(timespec='microseconds'))
+        for name, value in (parameters or {}).items():
+            path = f'$."{name}"'
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                conditions.append("json_type(parameters, ?) IN ('integer', 'real') "
+                                  'AND abs(json_extract(parameters, ?) - ?) <= ?')
+                arguments += [path, path, value, tolerance]
+            else:
+                conditions.append('json_extract(parameters, ?) = ?')
+                arguments += [path, json.loads(json.dumps(value, default=json_default))]
+        where = f' WHERE {" AND ".join(conditions)}' if conditions else ''
+        with self._connect() as connection:
+            rows = connection.execute(f'SELECT {", ".join(_COLUMNS)} FROM runs{where} ORDER BY started_at, id',
+                                      arguments).fetchall()
+        return [_decode(row) for row in rows]
+
+    def count(self, measurement: str = None) -> int:
+        """Number of runs, optionally of one measurement"""
+        with self._connect() as connection:
+            if measurement is None:
+                return connection.execute('SELECT count(*) FROM runs').fetchone()[0]
+            return connection.execute('SELECT count(*) FROM runs WHERE measurement = ?', (measurement,)).fetchone()[0]
+
+    def backfill(self, directory: str, recursive: bool = True) -> int:
+        """
+        Indexes output files that are not in the catalog yet. Runs are recognized by file names built by
+        measurements (see autothalix.utils.parse_output_filename). Parameters, duration and outcome of such runs are
+        unknown.
+
+        :param directory: Directory with output files
+        :param recursive: Also index subdirectories
+        :return: Number of added runs
+        """
+        runs = {}
+        pattern = os.path.join(glob.escape(directory), '**', '*') if recursive else os.path.join(
+            glob.escape(directory), '*')
+        for path in glob.iglob(pattern, recursive=recursive):
+            if not os.path.isfile(path):
+                continue
+            parsed = parse_output_filename(os.path.basename(path))
+            if parsed is None:
+                continue
+            output_path = os.path.abspath(os.path.dirname(path))
+            runs.setdefault((output_path, parsed['output_name']), (parsed, []))[1].append(os.path.basename(path))
+        added = 0
+        with self._connect() as connection:
+            known = {tuple(row) for row in connection.execute('SELECT output_path, output_name FROM runs')}
+        for (output_path, output_name), (parsed, files) in sorted(runs.items()):
+            if (output_path, output_name) in known:
+                continue
+            self.register(parsed['measurement'], parsed['measurement_id'], parsed['started_at'],
+                          output_path=output_path, output_name=output_name, output_files=files, source='backfill')
+            added += 1
+        logger.info(f'Catalog {self.path}: {added} runs added from {directory}')
+        return added
+
+
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_catalog(path: str) -> RunCatalog:
+    """Returns the RunCatalog of the path. The schema is created once per process."""
+    key = os.path.abspath(path)
+    with _catalogs_lock:
+        if key not in _catalogs:
+            _catalogs[key] = RunCatalog(path)
+        return _catalogs[key]
+
+
+def _decode(row):
+    run = dict(zip(_COLUMNS, row))
+    run['parameters'] = json.loads(run['parameters'])
+    run['output_files'] = json.loads(run['output_files'])
+    run['ok'] = None if run['ok'] is None else bool(run['ok'])
+    run['started_at'] = datetime.fromisoformat(run['started_at'])
+    return run
+
+
+def _parse_parameter(text):
+    name, _, value = text.partition('=')
+    try:
+        return name, json.loads(value)
+    except ValueError:
+        return name, value
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m autothalix.catalog', description='Index of measurement runs')
+    parser.add_argument('catalog', help='Path to the SQLite file')
+    commands = parser.add_subparsers(dest='command', required=True)
+    backfill = commands.add_parser('backfill', help='Index existing output directories')
+    backfill.add_argument('directories', nargs='+')
+    backfill.add_argument('--no-recursive', action='store_true')
+    query = commands.add_parser('query', help='Print runs')
+    query.add_argument('measurement', nargs='?')
+    query.add_argument('--id', dest='measurement_id')
+    query.add_argument('--parameter', action='append', default=[], type=_parse_parameter, metavar='NAME=VALUE')
+    query.add_argument('--failed', action='store_true', help='Only failed runs')
+    args = parser.parse_args(argv)
+
+    catalog = RunCatalog(args.catalog)
+    if args.command == 'backfill':
+        for directory in args.directories:
+            print(f'{directory}: {catalog.backfill(directory, recursive=not args.no_recursive)} runs added')
+        return
+    runs = catalog.query(args.measurement, args.measurement_id, dict(args.parameter),
+                         ok=False if args.failed else None)
+    for run in runs:
+        status = {True: 'ok', False: 'failed', None: '?'}[run['ok']]
+        duration = '' if run['duration_s'] is None else f'{run["duration_s"]:.1f} s'
+        print(f'{run["started_at"]:%Y-%m-%d %H:%M:%S}\t{run["measurement"]}\t{run["measurement_id"]}\t{status}\t'
+              f'{duration}\t{os.path.join(run["output_path"] or "", run["output_name"] or "")}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+"""
+Checkpoints of long manual measurements.
+
+A checkpoint consists of two files next to the output of the measurement:
+
+* ``<output name>.journal.csv``: append-only CSV with all rows of measured data stored so far
+* ``<output name>.checkpoint.json``: state of the acquisition (phase, time within the phase, sampling interval,
+  number of rows in the journal and the parameters of the measurement)
+
+Rows are appended to the journal and fsynced before the checkpoint is replaced atomically, so after a crash the
+checkpoint always describes rows that are on disk. Both files are removed when the measurement finishes and its data
+is saved. See BaseManualMeasurements in autothalix.measurements for the parameters "checkpoint_interval" and
+"resume".
+"""
+import csv
+import glob
+import json
+import os
+import time
+
+from autothalix.utils import json_default
+
+CHECKPOINT_EXTENSION = '.checkpoint.json'
+JOURNAL_EXTENSION = '.journal.csv'
+VERSION = 1
+
+
+class Checkpointer:
+    """
+    Writes the journal and checkpoints of one run
+
+    :param checkpoint_path: Path to the checkpoint file
+    :param journal_path: Path to the journal file
+    :param interval: Minimum time in seconds between checkpoints written during sampling, see :meth:`due`
+    :param clock: Monotonic clock function returning seconds
+    """
+
+    def __init__(self, checkpoint_path: str, journal_path: str, interval: float, clock=time.monotonic):
+        self.checkpoint_path = checkpoint_path
+        self.journal_path = journal_path
+        self.interval = interval
+        self.clock = clock
+        self.rows = 0
+        self._pending = []
+        self._file = None
+        self._writer = None
+        self._last_save = clock()
+
+    def open_journal(self, columns, rows=()):
+        """
+        Starts the journal and opens it for appending. The journal is replaced atomically, so the journal of a
+        resumed run is intact until it is rewritten with its rows.
+
+        :param columns: Header row
+        :param rows: Rows of a resumed run
+        """
+        temporary_path = self.journal_path + '.part'
+        with open(temporary_path, mode='w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(columns)
+            writer.writerows(rows)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary_path, self.journal_path)
+        self.rows = len(rows)
+        self._file = open(self.journal_path, mode='a', newline='')
+        self._writer = csv.writer(self._file)
+
+    def append(self, row):
+        """Adds a row to the journal. It is written with the next checkpoint."""
+        if self._file is not None:
+            self._pending.append(row)
+
+    def due(self) -> bool:
+        """True if the last checkpoint is older than the interval"""
+        return self.clock() - self._last_save >= self.interval
+
+    def save(self, state: dict):
+        """
+        Writes pending rows to the journal and then the checkpoint with the state. 'rows' is added to the state.
+        """
+        if self._pending:
+            self._writer.writerows(self._pending)
+            self.rows += len(self._pending)
+            self._pending = []
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        state = dict(state, version=VERSION, rows=self.rows, saved_at=time.time())
+        temporary_path = self.checkpoint_path + '.part'
+        with open(temporary_path, mode='w') as file:
+            json.dump(state, file, indent=1, default=json_default)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary_path, self.checkpoint_path)
+        self._last_save = self.clock()
+
+    def close_journal(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._writer = None
+
+    def discard(self):
+        """Removes the checkpoint and the journal of a finished run"""
+        self.close_journal()
+        remove_checkpoint(self.checkpoint_path)
+
+
+def find_checkpoint(output_path: str, measurement_name: str, measurement_id: str):
+    """
+    Finds the latest checkpoint of a measurement
+
+    :return: Path to the checkpoint file or None
+    """
+    pattern = os.path.join(glob.escape(output_path),
+                           f'{glob.escape(f"{measurement_name}_{measurement_id}_")}*{CHECKPOINT_EXTENSION}')
+    paths = glob.glob(pattern)
+    return max(paths, key=os.path.getmtime) if paths else None
+
+
+def load_checkpoint(checkpoint_path: str) -> dict:
+    """Reads a checkpoint file"""
+    with open(checkpoint_path) as file:
+        state = json.load(file)
+    if state.get('version') != VERSION:
+        raise ValueError(f'Unsupported checkpoint version {state.get("version")} in {checkpoint_path}')
+    return state
+
+
+def journal_path_of(checkpoint_path: str) -> str:
+    return checkpoint_path[:-len(CHECKPOINT_EXTENSION)] + JOURNAL_EXTENSION
+
+
+def remove_checkpoint(checkpoint_path: str):
+    """Removes a checkpoint and its journal"""
+    for path in (checkpoint_path, journal_path_of(checkpoint_path)):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def read_journal(journal_path: str, rows: int):
+    """
+    Reads the rows of a journal that are covered by the checkpoint. Rows written after the checkpoint, which may be
+    incomplete, are ignored.
+
+    :param journal_path: Path to the journal
+    :param rows: Number of rows in the checkpoint
+    :return: Header row and list of rows of floats
+    """
+    with open(journal_path, newline='') as file:
+        reader = csv.reader(file)
+        columns = next(reader)
+        data = []
+        for row in reader:
+            if len(data) == rows:
+                break
+            data.append(tuple(float(value) for value in row))
+    if len(data) < rows:
+        raise ValueError(f'Journal {journal_path} has {len(data)} rows, checkpoint expects {rows}')
+    return columns, data
+
+
+def parameters_state(parameters: dict) -> dict:
+    """Parameters as they are stored in checkpoints, so they can be compared with the ones of a resumed run"""
+    return json.loads(json.dumps(parameters, default=json_default))
@@ -0,0 +1,316 @@
+"""
+Partitioned columnar dataset of the results of manual measurements.
+
+OCP, Impedance and CA runs save one small CSV each. :class:`Dataset` consolidates them into one file in the columnar
+binary format (see autothalix.binary) per measurement, measurement id and day::
+
+    <dataset>/measurement=ocp/measurement_id=sample_1/date=2024-01-31/data.atx
+
+Rows of all runs of a partition are stored one run after another, in the order they were consolidated, with the
+column "run_started_at" (POSIX seconds) added. A SQLite manifest in the dataset directory records every consolidated
+CSV with its modification time, size, partition and rows, so :meth:`Dataset.consolidate` only reads files that are
+new or changed since the previous call. Partitions are rewritten in parallel processes.
+
+Queries use the manifest to open only the partitions of the requested runs, and read only the requested columns and
+rows through memory maps::
+
+    dataset = Dataset('data/dataset')
+    dataset.consolidate('data')
+    arrays = dataset.read('ocp', 'sample_1', columns=['time_s', 'potential_V'], since=datetime(2024, 1, 1))
+
+Command line::
+
+    python -m autothalix.dataset data/dataset consolidate data
+"""
+import argparse
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from autothalix.logging import logger
+from autothalix.utils import parse_output_filename, sqlite_connection
+
+MANIFEST = 'manifest.sqlite'
+PARTITION_FILE = 'data.atx'
+RUN_COLUMN = 'run_started_at'
+# measurements whose data is saved by autothalix, see BaseManualMeasurements
+MEASUREMENTS = ('ocp', 'imp', 'ca')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    measurement TEXT NOT NULL,
+    measurement_id TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    date TEXT NOT NULL,
+    output_name TEXT NOT NULL,
+    partition TEXT NOT NULL,
+    row_start INTEGER NOT NULL,
+    rows INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sources_partition ON sources (measurement, measurement_id, date);
+"""
+
+_COLUMNS = ('path', 'mtime_ns', 'size', 'measurement', 'measurement_id', 'started_at', 'date', 'output_name',
+            'partition', 'row_start', 'rows')
+
+
+def partition_of(measurement_name: str, measurement_id: str, started_at: datetime) -> str:
+    """Relative directory of the partition of a run"""
+    return os.path.join(f'measurement={measurement_name}', f'measurement_id={measurement_id}',
+                        f'date={started_at:%Y-%m-%d}')
+
+
+class Dataset:
+    """
+    Partitioned columnar dataset in a directory
+
+    :param path: Directory of the dataset. It is created if it does not exist.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        with self._connect() as connection:
+            connection.executescript(_SCHEMA)
+
+    def __repr__(self):
+        return f'Dataset({self.path!r})'
+
+    def _connect(self):
+        return sqlite_connection(os.path.join(self.path, MANIFEST))
+
+    def consolidate(self, *directories: str, recursive: bool = True, workers: int = None) -> int:
+        """
+        Adds CSV results of OCP, Impedance and CA runs that are new or changed since the previous call. Files that
+        cannot be read, e.g. of a run killed while it was writing, are logged and skipped, and tried again next time.
+
+        :param directories: Output directories of measurements
+        :param recursive: Also search subdirectories
+        :param workers: Number of worker processes. Defaults to the number of CPUs. 1 works in this process.
+        :return: Number of consolidated files
+        """
+        with self._connect() as connection:
+            known = {row[0]: row[1:] for row in connection.execute('SELECT path, mtime_ns, size FROM sources')}
+        pending = {}
+        for path, parsed in _find_sources(directories, recursive):
+            stat = os.stat(path)
+            if known.get(path) == (stat.st_mtime_ns, stat.st_size):
+                continue
+            source = dict(parsed, path=path, mtime_ns=stat.st_mtime_ns, size=stat.st_size,
+                          partition=partition_of(parsed['measurement'], parsed['measurement_id'],
+                                                 parsed['started_at']))
+            pending.setdefault(source['partition'], []).append(source)
+        if not pending:
+            logger.info(f'Dataset {self.path}: nothing new to consolidate')
+            return 0
+
+        tasks = []
+        for partition, sources in sorted(pending.items()):
+            changed = {source['path'] for source in sources}
+            kept = [run for run in self.runs(partition=partition) if run['path'] not in changed]
+            sources.sort(key=lambda source: (source['started_at'], source['path']))
+            tasks.append((os.path.join(self.path, partition, PARTITION_FILE),
+                          [(run['row_start'], run['rows']) for run in kept],
+                          [(source['path'], source['started_at'].timestamp()) for source in sources]))
+            pending[partition] = kept + sources
+        logger.info(f'Dataset {self.path}: consolidating {sum(len(task[2]) for task in tasks)} files into '
+                    f'{len(tasks)} partitions')
+        if workers == 1 or len(tasks) < 2:
+            counts = list(map(_write_partition, *zip(*tasks)))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                counts = list(executor.map(_write_partition, *zip(*tasks)))
+
+        consolidated = 0
+        with self._connect() as connection:
+            for (partition, runs), rows in zip(sorted(pending.items()), counts):
+                connection.execute('DELETE FROM sources WHERE partition = ?', (partition,))
+                row_start = 0
+                for run, run_rows in zip(runs, rows):
+                    if isinstance(run_rows, str):  # not registered, so it is read again by the next call
+                        logger.warning(f'Dataset {self.path}: skipping {run["path"]}: {run_rows}')
+                        continue
+                    consolidated += 'row_start' not in run
+                    started_at = run['started_at']
+                    connection.execute(
+                        f'INSERT OR REPLACE INTO sources ({", ".join(_COLUMNS)}) VALUES ({", ".join("?" * 11)})',
+                        (run['path'], run['mtime_ns'], run['size'], run['measurement'], run['measurement_id'],
+                         started_at.isoformat(), started_at.strftime('%Y-%m-%d'), run['output_name'], partition,
+                         row_start, run_rows))
+                    row_start += run_rows
+        return consolidated
+
+    def runs(self, measurement: str = None, measurement_id: str = None, since: datetime = None,
+             until: datetime = None, partition: str = None) -> list:
+        """
+        Consolidated runs, ordered by partition and position in it
+
+        :param measurement: Only runs of this measurement
+        :param measurement_id: Only runs of this measurement id
+        :param since: Only runs started at or after this time
+        :param until: Only runs started before this time
+        :param partition: Only runs of this partition
+        :return: List of dicts with source path, measurement, measurement id, start time, output name, partition and
+            rows of every run
+        """
+        conditions, arguments = [], []
+        for column, value in (('measurement', measurement), ('measurement_id', measurement_id),
+                              ('partition', partition)):
+            if value is not None:
+                conditions.append(f'{column} = ?')
+                arguments.append(value)
+        # the date condition lets SQLite use the partition index, the time condition is exact
+        if since is not None:
+            conditions += ['date >= ?', 'started_at >= ?']
+            arguments += [since.strftime('%Y-%m-%d'), since.isoformat()]
+        if until is not None:
+            conditions += ['date <= ?', 'started_at < ?']
+            arguments += [until.strftime('%Y-%m-%d'), until.isoformat()]
+        where = f' WHERE {" AND ".join(conditions)}' if conditions else ''
+        with self._connect() as connection:
+            rows = connection.execute(f'SELECT {", ".join(_COLUMNS)} FROM sources{where} '
+                                      f'ORDER BY partition, row_start', arguments).fetchall()
+        runs = [dict(zip(_COLUMNS, row)) for row in rows]
+        for run in runs:
+            run['started_at'] = datetime.fromisoformat(run['started_at'])
+        return runs
+
+    def partitions(self, measurement: str = None, measurement_id: str = None) -> list:
+        """Relative directories of partitions"""
+        return sorted({run['partition'] for run in self.runs(measurement, measurement_id)})
+
+    def read(self, measurement: str, measurement_id: str = None, columns=None, since: datetime = None,
+             until: datetime = None, by_run: bool = False) -> dict:
+        """
+        Reads data of runs. Only the partitions of matching runs are opened, and only the requested columns and rows
+        are read from them.
+
+        :param measurement: Measurement name, e.g. 'ocp'
+        :param measurement_id: Only runs of this measurement id
+        :param columns: Names of columns to read, e.g. ['time_s', 'potential_V']. All columns by default. Columns
+            that a run does not have are filled with NaN.
+        :param since: Only runs started at or after this time
+        :param until: Only runs started before this time
+        :param by_run: Return the data of every run separately
+        :return: dict with column names as keys and numpy arrays of all matching runs, in order of partitions and
+            of runs in them, as values. With by_run, dict with output names as keys and such dicts as values.
+        """
+        import numpy as np
+
+        from autothalix.binary import read_binary, read_binary_header
+
+        runs = self.runs(measurement, measurement_id, since, until)
+        partitions = {}
+        for run in runs:
+            partitions.setdefault(run['partition'], []).append(run)
+        headers = {partition: read_binary_header(os.path.join(self.path, partition, PARTITION_FILE))
+                   for partition in partitions}
+        if columns is None:
+            columns = list(dict.fromkeys(column for header in headers.values() for column in header['columns']))
+        pieces = []
+        for partition, partition_runs in partitions.items():
+            file_path = os.path.join(self.path, partition, PARTITION_FILE)
+            available = [column for column in columns if column in headers[partition]['columns']]
+            arrays = read_binary(file_path, available)
+            for run in partition_runs:
+                rows = slice(run['row_start'], run['row_start'] + run['rows'])
+                pieces.append((run['output_name'], {
+                    column: np.array(arrays[column][rows]) if column in arrays else np.full(run['rows'], np.nan)
+                    for column in columns}))
+        if by_run:
+            return dict(pieces)
+        return {column: np.concatenate([piece[column] for _, piece in pieces]) if pieces else np.empty(0)
+                for column in columns}
+
+
+def _find_sources(directories, recursive):
+    """Yields paths and parsed names of result CSVs of manual measurements"""
+    for directory in directories:
+        pattern = os.path.join(glob.escape(directory), '**', '*.csv') if recursive else os.path.join(
+            glob.escape(directory), '*.csv')
+        for path in sorted(glob.iglob(pattern, recursive=recursive)):
+            name = os.path.basename(path)
+            parsed = parse_output_filename(name)
+            # other CSVs of a run, e.g. '_reduced' tables, journals and sweep manifests, are not consolidated
+            if parsed is None or parsed['measurement'] not in MEASUREMENTS or name != parsed['output_name'] + '.csv':
+                continue
+            yield os.path.abspath(path), parsed
+
+
+def _write_partition(file_path, kept, sources):
+    """
+    Rewrites a partition file with the kept row ranges of the old file followed by the sources. Runs in worker
+    processes.
+
+    :param file_path: Path to the partition file
+    :param kept: (row start, rows) of runs in the old file to keep
+    :param sources: (path, start time in POSIX seconds) of CSVs to add
+    :return: Number of rows of every kept run and source, or the error message of a source that cannot be read
+    """
+    import numpy as np
+
+    from autothalix.binary import read_binary, write_dict_to_binary
+    from autothalix.utils import read_csv_to_dict
+
+    pieces = []
+    if kept:
+        old = read_binary(file_path, mmap=False)
+        pieces += [{column: values[start:start + rows] for column, values in old.items()} for start, rows in kept]
+    results = [rows for _, rows in kept]
+    for path, started_at in sources:
+        try:
+            data = {column: np.asarray(values, dtype=float) for column, values in read_csv_to_dict(path).items()}
+        except (OSError, ValueError, StopIteration) as e:  # e.g. a run killed while it was writing
+            results.append(f'{type(e).__name__}: {e}')
+            continue
+        lengths = {len(values) for values in data.values()}
+        if len(lengths) > 1:
+            results.append('rows have different numbers of values')
+            continue
+        rows = lengths.pop() if lengths else 0
+        data[RUN_COLUMN] = np.full(rows, started_at)
+        pieces.append(data)
+        results.append(rows)
+    if not pieces:
+        return results
+    columns = list(dict.fromkeys(column for piece in pieces for column in piece))
+    counts = [len(piece[RUN_COLUMN]) for piece in pieces]
+    merged = {column: np.concatenate([piece[column] if column in piece else np.full(count, np.nan)
+                                      for piece, count in zip(pieces, counts)]) for column in columns}
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    temporary_path = file_path + '.part'
+    write_dict_to_binary(merged, temporary_path)
+    os.replace(temporary_path, file_path)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m autothalix.dataset',
+                                     description='Partitioned dataset of results of manual measurements')
+    parser.add_argument('dataset', help='Directory of the dataset')
+    commands = parser.add_subparsers(dest='command', required=True)
+    consolidate = commands.add_parser('consolidate', help='Add new and changed CSV results')
+    consolidate.add_argument('directories', nargs='+')
+    consolidate.add_argument('--no-recursive', action='store_true')
+    consolidate.add_argument('--workers', type=int)
+    runs = commands.add_parser('runs', help='Print consolidated runs')
+    runs.add_argument('measurement', nargs='?')
+    runs.add_argument('--id', dest='measurement_id')
+    args = parser.parse_args(argv)
+
+    dataset = Dataset(args.dataset)
+    if args.command == 'consolidate':
+        added = dataset.consolidate(*args.directories, recursive=not args.no_recursive, workers=args.workers)
+        print(f'{added} files consolidated')
+        return
+    for run in dataset.runs(args.measurement, args.measurement_id):
+        print(f'{run["started_at"]:%Y-%m-%d %H:%M:%S}\t{run["measurement"]}\t{run["measurement_id"]}\t'
+              f'{run["rows"]}\t{run["path"]}')
+
+
+if __name__ == '__main__':
+    main()
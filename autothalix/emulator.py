@@ -0,0 +1,266 @@
+"""
+Local stand-in for the "ScriptRemote" term of Thales.
+
+The emulator listens on a TCP port and speaks the same telegram protocol as Term, so the unmodified
+ThalesRemoteConnection and ThalesRemoteScriptWrapper can be used against it. Responses come from a simulated cell.
+It is meant for hardware-free regression tests and benchmarks on any machine::
+
+    with ScriptRemoteEmulator(latency=0.002) as emulator:
+        connection, zahner_zennium = initialize_experiment(port=emulator.port)
+        OpenCircuitPotential(zahner_zennium, 'sample_1', seconds=10).run()
+        connection.disconnectFromTerm()
+"""
+import cmath
+import math
+import random
+import socket
+import struct
+import threading
+import time
+from collections import Counter
+
+_REMOTE_CHANNEL = 2
+_TERM_CHANNEL = 128
+_CLOSE_CHANNEL = 4
+
+_POTENTIOSTAT_MODES = {
+    'Gal=0:GAL=0': 'potentiostatic',
+    'Gal=-1:GAL=1': 'galvanostatic',
+    'Gal=0:GAL=-1': 'pseudogalvanostatic',
+}
+
+
+class SimulatedCell:
+    """
+    Randles cell: series resistance followed by charge transfer resistance in parallel with double layer capacitance.
+
+    * With the potentiostat disabled the cell is at open circuit potential.
+    * In potentiostatic mode the current follows the set potential with a Cottrell-like transient after every
+      potential step.
+    * In galvanostatic modes the potential is the open circuit potential plus the ohmic drop of the set current.
+
+    :param open_circuit_potential: Open circuit potential in V
+    :param series_resistance: Series resistance in Ohm
+    :param charge_transfer_resistance: Charge transfer resistance in Ohm
+    :param double_layer_capacitance: Double layer capacitance in F
+    :param cottrell_coefficient: Amplitude of the transient in A*s^0.5 per V of the potential step
+    :param noise: Standard deviation of gaussian noise, relative to the value
+    :param seed: Seed of the noise generator
+    """
+
+    def __init__(self, open_circuit_potential: float = 0.2, series_resistance: float = 10.0,
+                 charge_transfer_resistance: float = 100.0, double_layer_capacitance: float = 20e-6,
+                 cottrell_coefficient: float = 1e-3, noise: float = 1e-3, seed: int = None):
+        self.open_circuit_potential = open_circuit_potential
+        self.series_resistance = series_resistance
+        self.charge_transfer_resistance = charge_transfer_resistance
+        self.double_layer_capacitance = double_layer_capacitance
+        self.cottrell_coefficient = cottrell_coefficient
+        self.noise = noise
+        self._random = random.Random(seed)
+
+    def potential(self, state) -> float:
+        if not state.enabled:
+            value = self.open_circuit_potential
+        elif state.mode == 'potentiostatic':
+            value = state.potential
+        else:
+            value = self.open_circuit_potential + state.current * (self.series_resistance +
+                                                                   self.charge_transfer_resistance)
+        return self._noisy(value)
+
+    def current(self, state) -> float:
+        if not state.enabled:
+            return 0.0
+        if state.mode != 'potentiostatic':
+            return self._noisy(state.current)
+        overpotential = state.potential - self.open_circuit_potential
+        steady = overpotential / (self.series_resistance + self.charge_transfer_resistance)
+        elapsed = max(time.monotonic() - state.step_time, 1e-3)
+        transient = self.cottrell_coefficient * (state.potential - state.previous_potential) / math.sqrt(elapsed)
+        return self._noisy(steady + transient)
+
+    def impedance(self, frequency: float) -> complex:
+        omega = 2 * math.pi * frequency
+        parallel = self.charge_transfer_resistance / (1 + 1j * omega * self.charge_transfer_resistance *
+                                                      self.double_layer_capacitance)
+        return self.series_resistance + parallel
+
+    def _noisy(self, value):
+        return value + self._random.gauss(0, self.noise * max(abs(value), 1e-9))
+
+
+class _InstrumentState:
+    def __init__(self):
+        self.enabled = False
+        self.mode = 'potentiostatic'
+        self.potential = 0.0
+        self.previous_potential = 0.0
+        self.current = 0.0
+        self.step_time = time.monotonic()
+        self.values = {}
+
+
+class ScriptRemoteEmulator:
+    """
+    TCP server emulating the "ScriptRemote" term of Thales.
+
+    :param host: Address to listen on
+    :param port: Port to listen on. 0 picks a free port, see :attr:`port`. Term itself uses 260.
+    :param cell: SimulatedCell that provides measured values
+    :param latency: Delay in seconds added to every remote command
+    :param command_latency: Delays of particular commands that replace ``latency``, by command name, e.g.
+        ``{'IMPEDANCE': 0.1, 'EIS': 5.0}``. Names of set commands are the Remote2 parameter names, e.g. 'Pset'.
+    :param impedance_time_scale: Fraction of the real measurement time (number of periods / frequency) that
+        IMPEDANCE command takes. 0 answers immediately.
+
+    :ivar commands: Counter of received remote commands by name
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, cell: SimulatedCell = None, latency: float = 0.0,
+                 command_latency: dict = None, impedance_time_scale: float = 0.0):
+        self.host = host
+        self.cell = cell if cell is not None else SimulatedCell()
+        self.latency = latency
+        self.command_latency = dict(command_latency or {})
+        self.impedance_time_scale = impedance_time_scale
+        self.commands = Counter()
+        self.state = _InstrumentState()
+        self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server.bind((host, port))
+        self._clients = []
+        self._threads = []
+        self._running = False
+
+    @property
+    def port(self) -> int:
+        return self._server.getsockname()[1]
+
+    def start(self):
+        """Starts accepting connections in a background thread"""
+        self._server.listen()
+        self._running = True
+        thread = threading.Thread(target=self._accept, name='ScriptRemoteEmulator', daemon=True)
+        thread.start()
+        self._threads.append(thread)
+        return self
+
+    def stop(self):
+        """Closes the server and all client connections"""
+        self._running = False
+        for sock in [self._server] + self._clients:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            sock.close()
+        for thread in self._threads:
+            thread.join(timeout=1)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def _accept(self):
+        while self._running:
+            try:
+                client, _ = self._server.accept()
+            except OSError:
+                return
+            client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._clients.append(client)
+            thread = threading.Thread(target=self._serve, args=(client,), daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _serve(self, client):
+        try:
+            name_length, = struct.unpack('<H', _receive(client, 2))
+            _receive(client, 1 + 5)  # channel and fixed registration bytes
+            name = _receive(client, name_length).decode('ascii')
+            while self._running:
+                length, = struct.unpack('<H', _receive(client, 2))
+                channel, = struct.unpack('<B', _receive(client, 1))
+                payload = _receive(client, length)
+                if channel == _CLOSE_CHANNEL:
+                    return
+                if channel == _TERM_CHANNEL:
+                    _send(client, _TERM_CHANNEL, self._term_reply(name, payload.decode('ascii')))
+                elif channel == _REMOTE_CHANNEL:
+                    _send(client, _REMOTE_CHANNEL, self._remote_reply(payload.decode('ascii')))
+        except (ConnectionError, OSError):
+            return
+        finally:
+            client.close()
+
+    @staticmethod
+    def _term_reply(name, payload):
+        parts = payload.split(',')
+        if parts[0] == '1':  # heartbeat
+            return f'1,{name},10.0'
+        if parts[0] == '3' and parts[2:] == ['6']:  # serial number
+            return f'3,{name},EMULATOR'
+        return payload
+
+    def _remote_reply(self, payload):
+        command = payload[2:-1] if payload.startswith('1:') else payload  # "1:<command>:"
+        key = command.split('=', 1)[0]
+        self.commands[key] += 1
+        delay = self.command_latency.get(key, self.latency)
+        if delay:
+            time.sleep(delay)
+        try:
+            return self._execute(command, key)
+        except (ValueError, KeyError) as e:
+            return f'ERROR: {e}'
+
+    def _execute(self, command, key):
+        state = self.state
+        if command in _POTENTIOSTAT_MODES:
+            state.mode = _POTENTIOSTAT_MODES[command]
+            return 'OK'
+        if key == 'Pot':
+            state.enabled = command == 'Pot=-1'
+            state.step_time = time.monotonic()
+            return 'OK'
+        if '=' in command:
+            value = command.split('=', 1)[1]
+            state.values[key] = value
+            if key == 'Pset':
+                state.previous_potential = state.potential
+                state.potential = float(value)
+                state.step_time = time.monotonic()
+            elif key == 'Cset':
+                state.current = float(value)
+            return 'OK'
+        if command == 'POTENTIAL':
+            return f'potential={self.cell.potential(state):.10e}V'
+        if command == 'CURRENT':
+            return f'current={self.cell.current(state):.10e}A'
+        if command == 'IMPEDANCE':
+            frequency = float(state.values['Frq'])
+            if self.impedance_time_scale:
+                time.sleep(self.impedance_time_scale * float(state.values.get('Nw', 1)) / frequency)
+            magnitude, phase = cmath.polar(self.cell.impedance(frequency))
+            return f'impedance={magnitude:.10e}, {math.degrees(phase):.10e}'
+        if command in ('EIS', 'CV', 'IE', 'CHECKCV', 'CHECKIE', 'CALOFFSETS'):
+            return 'OK'
+        raise ValueError(f'unknown command {command}')
+
+
+def _receive(sock, size):
+    data = b''
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError('Connection closed')
+        data += chunk
+    return data
+
+
+def _send(sock, channel, payload):
+    data = payload.encode('ascii')
+    sock.sendall(struct.pack('<HB', len(data), channel) + data)
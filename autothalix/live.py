@@ -0,0 +1,228 @@
+"""
+Live samples of running measurements in shared memory.
+
+With ``live=True`` a manual measurement publishes every stored row into a fixed-size ring buffer in shared memory
+named ``autothalix_<measurement>_<measurement_id>`` (or the name given in "live"). Publishing is a copy of a few
+floats into the buffer and never waits for readers, so it does not slow the acquisition loop. Any number of other
+processes, e.g. a plotting dashboard, can attach to the buffer while the measurement runs::
+
+    subscriber = LiveSubscriber(live_name('ocp', 'sample_1'))
+    while not subscriber.finished:
+        rows = subscriber.read_new()  # (n, columns) numpy array of rows published since the last call
+        ...
+        time.sleep(0.5)
+
+Layout of the buffer: a header of int64 values (magic, version, number of columns, capacity, number of published rows,
+finished flag, PID of the publisher), the column names as JSON, and a (capacity, columns) float64 array. The publisher
+writes row ``count % capacity`` and then increments the count, so readers detect rows that were overwritten while they
+were reading them.
+"""
+import json
+import os
+import re
+from multiprocessing import shared_memory
+
+MAGIC = 0x4C495645  # 'LIVE'
+VERSION = 1
+_MAGIC, _VERSION, _COLUMNS, _CAPACITY, _COUNT, _FINISHED, _PID = range(7)
+_HEADER_SIZE = 64
+_NAMES_SIZE = 1024
+_DATA_OFFSET = _HEADER_SIZE + _NAMES_SIZE
+
+
+def live_name(measurement_name: str, measurement_id: str) -> str:
+    """Default name of the shared memory of a measurement"""
+    return 'autothalix_' + re.sub(r'[^A-Za-z0-9_]', '_', f'{measurement_name}_{measurement_id}')
+
+
+class LivePublisher:
+    """
+    Creates the ring buffer and writes rows into it. Only one process writes a buffer.
+
+    :param name: Name of the shared memory
+    :param columns: Column names
+    :param capacity: Number of rows kept in the buffer
+    :raises FileExistsError: If a running publisher, e.g. a measurement with the same name and id in another process,
+        owns a buffer with the name. Buffers of finished runs and of crashed processes are replaced.
+    """
+
+    def __init__(self, name: str, columns, capacity: int = 10000):
+        import numpy as np
+
+        names = json.dumps(list(columns)).encode()
+        if len(names) > _NAMES_SIZE:
+            raise ValueError(f'Column names of live buffer {name} are too long')
+        if capacity < 1:
+            raise ValueError(f'Capacity of live buffer must be at least 1, got {capacity}')
+        self.name = name
+        self.columns = tuple(columns)
+        self.capacity = capacity
+        size = _DATA_OFFSET + capacity * len(self.columns) * 8
+        try:
+            self._memory = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            _reclaim(name)
+            self._memory = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self._header = np.ndarray((_HEADER_SIZE // 8,), dtype=np.int64, buffer=self._memory.buf)
+        self._memory.buf[_HEADER_SIZE:_HEADER_SIZE + len(names)] = names
+        self._data = np.ndarray((capacity, len(self.columns)), dtype=np.float64, buffer=self._memory.buf,
+                                offset=_DATA_OFFSET)
+        self._count = 0
+        self._header[[_VERSION, _COLUMNS, _CAPACITY, _COUNT, _FINISHED, _PID]] = (VERSION, len(self.columns), capacity,
+                                                                                 0, 0, os.getpid())
+        self._header[_MAGIC] = MAGIC  # written last, readers attach only to complete buffers
+
+    def publish(self, row):
+        """Writes a row (sequence of numbers in order of columns). Never blocks."""
+        self._data[self._count % self.capacity] = row
+        self._count += 1
+        self._header[_COUNT] = self._count
+
+    def close(self):
+        """Marks the buffer finished and removes its name. Attached readers keep their mapping."""
+        if self._memory is None:
+            return
+        self._header[_FINISHED] = 1
+        self._header = self._data = None
+        self._memory.close()
+        self._memory.unlink()
+        self._memory = None
+
+
+class LiveSubscriber:
+    """
+    Reads a ring buffer of a running measurement
+
+    :param name: Name of the shared memory, see :func:`live_name`
+    :raises FileNotFoundError: If there is no such buffer
+    """
+
+    def __init__(self, name: str):
+        import numpy as np
+
+        self.name = name
+        self._memory = _attach(name)
+        header = np.ndarray((_HEADER_SIZE // 8,), dtype=np.int64, buffer=self._memory.buf)
+        if header[_MAGIC] != MAGIC or header[_VERSION] != VERSION:
+            self._memory.close()
+            raise ValueError(f'Shared memory {name} is not a live buffer of version {VERSION}')
+        names = bytes(self._memory.buf[_HEADER_SIZE:_DATA_OFFSET]).rstrip(b'\0')
+        self.columns = tuple(json.loads(names))
+        self.capacity = int(header[_CAPACITY])
+        self._header = header
+        self._data = np.ndarray((self.capacity, len(self.columns)), dtype=np.float64, buffer=self._memory.buf,
+                                offset=_DATA_OFFSET)
+        self._read = 0
+        self.missed = 0
+
+    @property
+    def count(self) -> int:
+        """Number of rows published so far"""
+        return int(self._header[_COUNT])
+
+    @property
+    def finished(self) -> bool:
+        """True when the measurement stopped publishing"""
+        return bool(self._header[_FINISHED])
+
+    @property
+    def buffer(self):
+        """The ring itself, without copying. Row i of the measurement is at i % capacity. See :attr:`count`."""
+        return self._data
+
+    def latest(self, n: int = None):
+        """
+        Copy of the last n rows (all rows in the buffer by default), oldest first
+
+        :return: (rows, columns) numpy array
+        """
+        count = self.count
+        n = min(count, self.capacity if n is None else n)
+        rows, _ = self._copy(count - n, count)
+        return rows
+
+    def read_new(self):
+        """
+        Copy of the rows published since the previous call, oldest first. Rows that were overwritten before they
+        were read are skipped and counted in :attr:`missed`.
+
+        :return: (rows, columns) numpy array
+        """
+        count = self.count
+        rows, start = self._copy(self._read, count)
+        self.missed += start - self._read
+        self._read = count
+        return rows
+
+    def _copy(self, start, end):
+        """Copies rows start..end and drops those that the publisher overwrote meanwhile"""
+        import numpy as np
+
+        start = max(start, end - self.capacity)
+        indices = np.arange(start, end) % self.capacity
+        rows = self._data[indices]
+        # the row after count may be being written, rows before it may have been replaced during the copy
+        overwritten = self.count + (not self.finished) - self.capacity
+        if overwritten > start:
+            rows = rows[overwritten - start:]
+            start = overwritten
+        return rows, start
+
+    def close(self):
+        if self._memory is not None:
+            self._header = self._data = None
+            self._memory.close()
+            self._memory = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def _reclaim(name):
+    """Removes an existing buffer if it is finished or its publisher is dead, raises FileExistsError otherwise"""
+    import numpy as np
+
+    stale = _attach(name)
+    try:
+        header = np.ndarray((_HEADER_SIZE // 8,), dtype=np.int64, buffer=stale.buf) if stale.size >= _HEADER_SIZE \
+            else None
+        owner = None if header is None else int(header[_PID])
+        reclaimable = header is not None and header[_MAGIC] == MAGIC and (header[_FINISHED] or not _alive(owner))
+        del header
+    finally:
+        stale.close()
+    if not reclaimable:
+        raise FileExistsError(f'Live buffer {name} is in use by a running publisher (PID {owner}). Use another '
+                              f'"live" name or measurement id.')
+    stale = shared_memory.SharedMemory(name=name)
+    stale.close()
+    stale.unlink()
+
+
+def _alive(pid):
+    if not pid:
+        return True  # unknown owner, e.g. a buffer that is being created
+    if os.name == 'nt':
+        return True  # Windows removes shared memory of exited processes, an existing buffer has a live owner
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _attach(name):
+    """Attaches to shared memory without letting the resource tracker of this process remove it at exit"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  # Python < 3.13
+        from multiprocessing import resource_tracker
+
+        memory = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(memory._name, 'shared_memory')
+        return memory
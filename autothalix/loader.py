@@ -0,0 +1,192 @@
+"""
+Loader of result files that Thales writes for measurements implemented on the side of the potentiostat.
+
+CyclicVoltammetry, LinearSweepVoltammetry and ElectrochemicalImpedanceSpectroscopy leave their results in
+``output_path`` as files whose names start with ``_output_filename`` of the measurement. The loader finds these files,
+parses them with zahner_analysis in a process pool and returns every file as a dict of float64 numpy arrays:
+
+* eis ('.ism'): frequency_Hz, impedance_Ohm, phase_deg
+* cv ('.isc'): time_s, potential_V, current_A
+* lsv ('.iss'): time_s, potential_V, current_A
+
+Parsed files are cached in the columnar binary format (see autothalix.binary) in a '.autothalix_cache' directory
+next to them. The cache entry of a file is valid while modification time and size of the file do not change, so
+repeated loads of a campaign only open memory maps::
+
+    spectra = load_results('data', 'eis', 'sample_1')
+    for path, arrays in spectra.items():
+        print(path, arrays['frequency_Hz'][0], arrays['impedance_Ohm'][0])
+"""
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from autothalix.binary import EXTENSION as BINARY_EXTENSION, read_binary, write_dict_to_binary
+from autothalix.logging import logger
+from autothalix.utils import parse_output_filename
+
+CACHE_DIRECTORY = '.autothalix_cache'
+
+
+def parse_ism(file_path) -> dict:
+    """Parses an impedance spectrum file"""
+    from zahner_analysis.file_import.ism_import import IsmImport
+
+    ism = IsmImport(file_path)
+    return {
+        'frequency_Hz': ism.getFrequencyArray(),
+        'impedance_Ohm': ism.getImpedanceArray(),
+        'phase_deg': ism.getPhaseArray(degree=True),
+    }
+
+
+def parse_isc(file_path) -> dict:
+    """Parses a cyclic voltammetry file"""
+    from zahner_analysis.file_import.isc_import import IscImport
+
+    isc = IscImport(file_path)
+    return {'time_s': isc.getTimeArray(), 'potential_V': isc.getVoltageArray(), 'current_A': isc.getCurrentArray()}
+
+
+def parse_iss(file_path) -> dict:
+    """Parses a current-voltage curve file"""
+    from zahner_analysis.file_import.iss_import import IssImport
+
+    iss = IssImport(file_path)
+    return {'time_s': iss.getTimeArray(), 'potential_V': iss.getVoltageArray(), 'current_A': iss.getCurrentArray()}
+
+
+# measurement name: (extension of Thales files, parser)
+FILE_TYPES = {
+    'eis': ('.ism', parse_ism),
+    'cv': ('.isc', parse_isc),
+    'lsv': ('.iss', parse_iss),
+}
+
+
+def find_results(output_path: str, measurement_name: str, measurement_id: str = None) -> list:
+    """
+    Finds Thales result files of a measurement
+
+    :param output_path: Directory with the results, "output_path" parameter of the measurement
+    :param measurement_name: 'eis', 'cv' or 'lsv'
+    :param measurement_id: Only files of this measurement id. Files of all ids by default.
+    :return: Sorted list of paths
+    """
+    extension, _ = _file_type(measurement_name)
+    pattern = os.path.join(glob.escape(output_path), f'{glob.escape(measurement_name)}_*{extension}')
+    paths = glob.glob(pattern)
+    if measurement_id is not None:  # the id may be a prefix of other ids, e.g. sample_1 of sample_1_b
+        paths = [path for path in paths if _measurement_id(path) == measurement_id]
+    return sorted(paths)
+
+
+def _measurement_id(path):
+    parsed = parse_output_filename(os.path.basename(path))
+    return None if parsed is None else parsed['measurement_id']
+
+
+def load_result(file_path, parser=None, cache: bool = True) -> dict:
+    """
+    Loads one result file
+
+    :param file_path: Path to the file
+    :param parser: Function that parses the file to a dict of arrays. Chosen by file extension by default.
+    :param cache: Read from and write to the cache
+    :return: dict with column names as keys and numpy arrays as values
+    """
+    if parser is None:
+        parser = _parser_by_extension(file_path)
+    if cache:
+        cached = _read_cache(file_path)
+        if cached is not None:
+            return cached
+    arrays = parser(file_path)
+    if cache:
+        _write_cache(file_path, arrays)
+    return arrays
+
+
+def load_results(output_path: str, measurement_name: str, measurement_id: str = None, workers: int = None,
+                 parser=None, cache: bool = True) -> dict:
+    """
+    Loads all result files of a measurement. Files that are not cached are parsed in parallel processes.
+
+    :param output_path: Directory with the results
+    :param measurement_name: 'eis', 'cv' or 'lsv'
+    :param measurement_id: Only files of this measurement id. Files of all ids by default.
+    :param workers: Number of worker processes. Defaults to the number of CPUs. 1 parses in this process.
+    :param parser: Function that parses a file to a dict of arrays. Must be picklable (defined at module level).
+        Defaults to the parser of the measurement, see FILE_TYPES.
+    :param cache: Read from and write to the cache
+    :return: dict with file paths as keys and dicts of numpy arrays as values, sorted by path
+    """
+    if parser is None:
+        _, parser = _file_type(measurement_name)
+    paths = find_results(output_path, measurement_name, measurement_id)
+    results = {}
+    missing = []
+    for path in paths:
+        cached = _read_cache(path) if cache else None
+        if cached is None:
+            missing.append(path)
+        else:
+            results[path] = cached
+    logger.info(f'Loading {len(paths)} {measurement_name} files from {output_path}: {len(results)} cached, '
+                f'{len(missing)} to parse')
+    if workers == 1 or len(missing) < 2:
+        parsed = map(parser, missing)
+        results.update(zip(missing, parsed))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results.update(zip(missing, executor.map(parser, missing)))
+    if cache:
+        for path in missing:
+            _write_cache(path, results[path])
+    return {path: results[path] for path in paths}
+
+
+def _file_type(measurement_name):
+    if measurement_name not in FILE_TYPES:
+        raise ValueError(f'Results of "{measurement_name}" are not written by Thales. '
+                         f'Use one of: {", ".join(FILE_TYPES)}')
+    return FILE_TYPES[measurement_name]
+
+
+def _parser_by_extension(file_path):
+    extension = os.path.splitext(file_path)[1].lower()
+    for file_extension, parser in FILE_TYPES.values():
+        if extension == file_extension:
+            return parser
+    raise ValueError(f'Unknown result file type "{extension}" of {file_path}')
+
+
+def _cache_path(file_path):
+    """Cache entry name contains modification time and size of the file, so a changed file misses the cache"""
+    stat = os.stat(file_path)
+    directory, name = os.path.split(os.path.abspath(file_path))
+    return os.path.join(directory, CACHE_DIRECTORY, f'{name}.{stat.st_mtime_ns}.{stat.st_size}{BINARY_EXTENSION}')
+
+
+def _read_cache(file_path):
+    cache_path = _cache_path(file_path)
+    if not os.path.exists(cache_path):
+        return None
+    try:
+        return read_binary(cache_path)
+    except (OSError, ValueError) as e:
+        logger.warning(f'Ignoring broken cache entry {cache_path}: {e}')
+        return None
+
+
+def _write_cache(file_path, arrays):
+    cache_path = _cache_path(file_path)
+    directory, name = os.path.split(cache_path)
+    os.makedirs(directory, exist_ok=True)
+    stale_prefix = os.path.basename(file_path) + '.'
+    for entry in os.listdir(directory):  # entries of previous versions of the file
+        if entry.startswith(stale_prefix) and entry != name:
+            os.remove(os.path.join(directory, entry))
+    temporary_path = cache_path + '.part'
+    write_dict_to_binary(arrays, temporary_path)
+    os.replace(temporary_path, cache_path)
@@ -1,15 +1,124 @@
+"""
+Logger of autothalix.
+
+By default messages go to the console and to 'experiment.log' next to the running script, as they are written. The
+default handlers are created when the first message is logged, so importing autothalix does not create files.
+Use configure_logging() to choose the log file, the level and whether handlers are drained by a background thread::
+
+    configure_logging(log_file='data/run_1.log', queued=True)
+
+In queued mode logging calls only put records into a queue, so file and console I/O do not delay sampling loops.
+Records are formatted and written by a listener thread. Call stop_logging() (done automatically at exit) to write
+the remaining records.
+"""
+import atexit
 import logging
 import os
+import queue
 import sys
+
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
-
-script_path = sys.argv[0]
 formatter = logging.Formatter('%(asctime)s [%(levelname)s] %(message)s')
-file_handler = logging.FileHandler(os.path.join(os.path.dirname(script_path), 'experiment.log'))
-file_handler.setFormatter(formatter)
-console_handler = logging.StreamHandler()
-console_handler.setFormatter(formatter)
-logger.addHandler(file_handler)
-logger.addHandler(console_handler)
\ No newline at end of file
+
+_IMMUTABLE = (str, int, float, complex, bool, type(None))
+
+_listener = None
+
+
+class _DeferredQueueHandler(logging.Handler):
+    """
+    Puts records into a queue and leaves formatting to the listener thread.
+
+    The standard QueueHandler formats every record in the calling thread. Records with immutable arguments are
+    passed as they are; others are rendered to the message first, so later changes of the arguments are not logged.
+    """
+
+    def __init__(self, records):
+        super().__init__()
+        self.records = records
+
+    def emit(self, record):
+        try:
+            self.records.put_nowait(self.prepare(record))
+        except Exception:
+            self.handleError(record)
+
+    def prepare(self, record):
+        if record.args and not all(isinstance(arg, _IMMUTABLE) for arg in _args(record)):
+            record = logging.makeLogRecord(record.__dict__)
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+
+def _args(record):
+    return record.args.values() if isinstance(record.args, dict) else record.args
+
+
+class _DefaultSetupHandler(logging.Handler):
+    """Placeholder handler that sets up default handlers on the first record if configure_logging() was not called"""
+
+    def emit(self, record):
+        configure_logging()
+        for handler in logger.handlers:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+
+def default_log_file() -> str:
+    """'experiment.log' in the directory of the running script"""
+    return os.path.join(os.path.dirname(sys.argv[0]), 'experiment.log')
+
+
+def configure_logging(log_file: str = None, console: bool = True, level: int = logging.INFO, queued: bool = False):
+    """
+    Replaces handlers of the autothalix logger
+
+    :param log_file: Path to the log file. Defaults to 'experiment.log' next to the running script. Empty string
+        disables the file log.
+    :param console: Log to stderr
+    :param level: Level of the logger, e.g. logging.DEBUG
+    :param queued: Write logs from a background thread. Logging calls then cost only a queue put.
+    :return: The logger
+    """
+    stop_logging()
+    previous, logger.handlers = logger.handlers, []  # new list, the old one may be iterated by the logging call
+    for handler in previous:
+        handler.close()
+    logger.setLevel(level)
+    handlers = []
+    if log_file is None:
+        log_file = default_log_file()
+    if log_file:
+        handlers.append(logging.FileHandler(log_file))
+    if console:
+        handlers.append(logging.StreamHandler())
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    if queued and handlers:
+        from logging.handlers import QueueListener
+
+        global _listener
+        records = queue.SimpleQueue()
+        _listener = QueueListener(records, *handlers, respect_handler_level=True)
+        _listener.start()
+        handlers = [_DeferredQueueHandler(records)]
+    logger.handlers = handlers
+    return logger
+
+
+def stop_logging():
+    """Writes queued records and stops the listener thread of queued mode. Does nothing in direct mode."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(stop_logging)
+
+logger.addHandler(_DefaultSetupHandler())
@@ -1,26 +1,60 @@
+import glob
 import os
 import time
 from abc import ABC, abstractmethod
+from contextlib import contextmanager, nullcontext
 from datetime import datetime
+from typing import TYPE_CHECKING
 
-import yaml
-from thales_remote.script_wrapper import PotentiostatMode
-from thales_remote.script_wrapper import ThalesRemoteScriptWrapper
-
+from autothalix.analytics import ElectrolysisAnalytics, Regression
+from autothalix.baseline import DEFAULT_BASELINE_PATH, baseline_registry
+from autothalix.checkpoint import (CHECKPOINT_EXTENSION, JOURNAL_EXTENSION, Checkpointer, find_checkpoint,
+                                   journal_path_of, load_checkpoint, parameters_state, read_journal, remove_checkpoint)
 from autothalix.logging import logger
-from autothalix.utils import write_dict_to_csv, safe_pot
+from autothalix.metrics import call_metrics
+from autothalix.scheduler import CATCH_UP, ChangeDrivenSpacing, DeadlineScheduler, LogSpacing
+from autothalix.schema import SCHEMAS, ParameterError, PotentiostatModeChoice
+from autothalix.session import connection_session
+from autothalix.shadow import parameter_shadow, invalidate_parameter_shadow
+from autothalix.streaming import StreamingCSVWriter
+from autothalix.utils import (OUTPUT_DATETIME_FORMAT, asafe_pot, read_csv_to_dict, run_in_executor, safe_pot,
+                              write_dict_to_csv)
+
+if TYPE_CHECKING:  # thales_remote is imported when a measurement needs it, so analysis scripts import fast
+    from thales_remote.script_wrapper import ThalesRemoteScriptWrapper
+
+_check_potentiostat_mode = PotentiostatModeChoice().compile('potentiostat_mode')
 
 
 class BaseMeasurement(ABC):
-    def __init__(self, wr_connection: ThalesRemoteScriptWrapper, measurement_id: str, **kwargs):
+    baseline_path = DEFAULT_BASELINE_PATH
+    catalog = None  # path to the run catalog or RunCatalog, see autothalix.catalog
+    result_cache = None  # path to the result cache or ResultCache, see autothalix.cache
+    cache_policy = 'reuse'
+    cache_max_age = None
+    _manages_potentiostat = False  # True if the measurement enables and disables the potentiostat by itself
+
+    def __init__(self, wr_connection: 'ThalesRemoteScriptWrapper', measurement_id: str, baseline_path: str = None,
+                 **kwargs):
         """
         :param wr_connection: ThalesRemoteScriptWrapper object to communicate with Thales. You can create it with
             initialize_experiment() function. See autothalix.utils
         :param kwargs: For required parameters look into attribute "parameters" or into baseline file
         :param measurement_id: Unique identifier of the measurement. It will be used in filename with results
+        :param baseline_path: Path to the baseline file with default parameters. Defaults to 'baseline.yaml' in the
+            current working directory.
+
+        Optional parameter "catalog" is the path to a SQLite run catalog. If it is set, every run is registered in it
+        with its parameters, duration, outcome and output files. See autothalix.catalog
+
+        Optional parameter "result_cache" is the path to a SQLite result cache. If it is set, a run with the same
+        measurement id and parameters as a cached run is not measured again, see autothalix.cache. "cache_policy"
+        ('reuse' or 'refresh') and "cache_max_age" in seconds control reuse of cached results.
         """
+        if baseline_path is not None:
+            self.baseline_path = baseline_path
         self.load_baseline()  # sets default parameters for a measurement
-        self.current_datetime = datetime.today().strftime('%d_%m_%Y_%H_%M_%S')
+        self.current_datetime = datetime.today().strftime(OUTPUT_DATETIME_FORMAT)
         self.measurement_id = measurement_id
         for key, value in kwargs.items():
             setattr(self, key, value)
@@ -30,24 +64,52 @@ class BaseMeasurement(ABC):
     def _check_connection(self):
         return self.wr_connection._remote_connection.isConnectedToTerm()
 
+    @property
+    def _shadow(self):
+        """ParameterShadow of the connection, or None if it is not enabled. See autothalix.shadow"""
+        return parameter_shadow(self.wr_connection)
+
+    def _set(self, setter: str, value, force: bool = False):
+        """
+        Sends a parameter to the potentiostat. If parameter shadow is enabled for the connection, unchanged values
+        are not sent.
+
+        :param setter: Name of the ThalesRemoteScriptWrapper setter, e.g. 'setCVScanRate'
+        :param value: Value of the parameter
+        :param force: Send the value even if the potentiostat already holds it
+        """
+        shadow = self._shadow
+        if shadow is None:
+            return getattr(self.wr_connection, setter)(value)
+        return shadow.send(self.wr_connection, setter, value, force=force)
+
     def _check_parameters(self):
-        """Checks if all mandatory parameters are set"""
+        """
+        Checks if all mandatory parameters are set and valid, see autothalix.schema
+
+        :raises ParameterError: With all problems of the parameters. It is a ValueError.
+        """
         for parameter in self.parameters:
             if not hasattr(self, parameter):
                 raise ValueError(f'Parameter {parameter} is not set. Check if this parameters in '
                                  f'baseline file {self._baseline_path} and if it is set in the script.')
+        schema = SCHEMAS.get(self.measurement_name)
+        if schema is not None:
+            schema.validate(schema.values_of(self))
 
     @property
     def _baseline_path(self):
-        return 'baseline.yaml'
+        return self.baseline_path
 
     def load_baseline(self):
-        """ Loads baseline parameters from baseline.yaml file """
-        with open('baseline.yaml', 'r') as file:
-            data = yaml.safe_load(file)[self.measurement_name]
-        for parameter_dict in data:
-            parameter_value = list(parameter_dict.values())[0]
-            parameter_name = list(parameter_dict.keys())[0]
+        """
+        Loads baseline parameters from the baseline file.
+
+        The file is parsed once per process and shared between all measurements, see
+        autothalix.baseline.BaselineRegistry
+        """
+        for parameter_name, parameter_value in baseline_registry.defaults(self.measurement_name,
+                                                                          self._baseline_path).items():
             setattr(self, parameter_name, parameter_value)
 
     @property
@@ -85,14 +147,160 @@ class BaseMeasurement(ABC):
             If connection is not established, raises ConnectionError with message
             'Connection is not established. Check that connection is established and try again.'
         """
+        if self._reuse_cached_result():
+            return True
+        with self._cataloged():
+            with self._running():
+                self._send_parameters()
+                self._start_measurements()
+            self._save_data()
+        self._completed()
+        return True
+
+    async def arun(self):
+        """
+        Asynchronous version of run().
+
+        Remote calls are executed in the default executor of the event loop and waiting is done with awaitable
+        timers, so other tasks (saving, analysis, monitoring) can run while the measurement is in progress. Do not
+        run several measurements on the same connection at the same time.
+
+        :return: bool
+            Returns True if measurement was successful.
+
+        :raises ConnectionError:
+            If connection is not established
+        """
+        if await run_in_executor(self._reuse_cached_result):
+            return True
+        with self._cataloged():
+            await run_in_executor(self._ensure_connection)  # reconnecting blocks for seconds
+            with self._running():
+                await run_in_executor(self._send_parameters)
+                await self._astart_measurements()
+            await run_in_executor(self._save_data)
+        self._completed()
+        return True
+
+    def _ensure_connection(self):
+        """Reconnects a dropped connection of a session, see autothalix.session. Other connections must be open."""
         if self._check_connection():
-            logger.info(self._run_message)
-            self._send_parameters()
-            self._start_measurements()
-        else:
-            raise ConnectionError('Connection is not established. Check that connection is established and try again.')
+            return
+        session = connection_session(self.wr_connection)
+        if session is None:
+            invalidate_parameter_shadow(self.wr_connection)
+            raise ConnectionError('Connection is not established. Check that connection is established and try '
+                                  'again.')
+        logger.warning('Connection to Thales is closed, reconnecting')
+        session.reconnect()
+
+    @contextmanager
+    def _running(self):
+        """Checks the connection before a run and reports after it. Shared by run() and arun()"""
+        self._ensure_connection()
+        session = connection_session(self.wr_connection)
+        logger.info(self._run_message)
+        metrics = call_metrics(self.wr_connection)
+        with session.busy() if session is not None else nullcontext():
+            if metrics is None:
+                yield
+            else:
+                with metrics.measuring(self.measurement_name):
+                    yield
+                logger.info(metrics.summary(self.measurement_name))
+        if self._shadow is not None:
+            logger.debug(f'Parameter shadow: {self._shadow.calls_saved} remote calls saved in total')
+
+    @contextmanager
+    def _cataloged(self):
+        """Registers the run in the catalog, if it is set, with the outcome of the block"""
+        if not self.catalog:
+            yield
+            return
+        started_at = datetime.now()
+        start = time.perf_counter()
+        error = None
+        try:
+            yield
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self._register_run(started_at, time.perf_counter() - start, error)
+
+    def _register_run(self, started_at, duration, error):
+        from autothalix.catalog import RunCatalog, get_catalog
+
+        output_path = getattr(self, 'output_path', None)
+        output_files = self._output_files()
+        try:
+            catalog = self.catalog if isinstance(self.catalog, RunCatalog) else get_catalog(self.catalog)
+            catalog.register(self.measurement_name, self.measurement_id, started_at, duration_s=duration,
+                             ok=error is None, error=None if error is None else repr(error),
+                             parameters={parameter: getattr(self, parameter) for parameter in self.parameters},
+                             output_path=output_path, output_name=self._output_filename, output_files=output_files)
+        except Exception as e:  # a broken catalog must not fail the measurement
+            logger.error(f'Could not register {self} {self.measurement_id} in catalog {self.catalog}: "{e}"')
+
+    def _output_files(self):
+        """Names of the output files of the run, if output_path is a local directory"""
+        output_path = getattr(self, 'output_path', None)
+        if output_path is None or not os.path.isdir(output_path):
+            return []
+        return [os.path.basename(path) for path in
+                glob.glob(os.path.join(glob.escape(output_path), glob.escape(self._output_filename) + '*'))]
+
+    def _result_key(self):
+        """Key of the configuration in the result cache: measurement id and all resolved parameters"""
+        from autothalix.cache import UNKEYED_OPTIONS, result_key
+
+        parameters = {parameter: getattr(self, parameter) for parameter in self.parameters}
+        schema = SCHEMAS.get(self.measurement_name)
+        if schema is not None:
+            parameters.update(schema.values_of(self))
+        for option in UNKEYED_OPTIONS:
+            parameters.pop(option, None)
+        return result_key(self.measurement_name, self.measurement_id, parameters)
+
+    def _get_result_cache(self):
+        from autothalix.cache import ResultCache, get_cache
+
+        return self.result_cache if isinstance(self.result_cache, ResultCache) else get_cache(self.result_cache)
+
+    def _reuse_cached_result(self):
+        """
+        Takes over the output of an identical cached run, if there is a valid one
+
+        :return: True if the run can be skipped
+        """
+        if not self.result_cache or self.cache_policy == 'refresh':
+            return False
+        try:
+            cached = self._get_result_cache().lookup(self._result_key(), self.cache_max_age)
+        except Exception as e:  # a broken cache must not fail the measurement
+            logger.error(f'Could not look up {self} {self.measurement_id} in result cache {self.result_cache}: "{e}"')
+            return False
+        if cached is None:
+            return False
+        logger.info(f'{self} {self.measurement_id}: identical run finished {cached.age:.0f} s ago, reusing its '
+                    f'result {cached.output_name}')
+        self.current_datetime = cached.output_name[len(f'{self.measurement_name}_{self.measurement_id}_'):]
+        self._load_cached_result()
         return True
 
+    def _load_cached_result(self):
+        """Loads data of a reused run. Data of measurements run on the potentiostat stays in files"""
+
+    def _cache_result(self):
+        if not self.result_cache:
+            return
+        try:
+            self._get_result_cache().store(self._result_key(), self.measurement_name, self.measurement_id,
+                                           self._output_filename, getattr(self, 'output_path', None),
+                                           self._output_files())
+        except Exception as e:
+            logger.error(f'Could not store {self} {self.measurement_id} in result cache {self.result_cache}: "{e}"')
+
     @property
     @abstractmethod
     def parameters(self):
@@ -102,22 +310,44 @@ class BaseMeasurement(ABC):
     def _start_measurements(self):
         pass
 
+    async def _astart_measurements(self):
+        """
+        Asynchronous version of _start_measurements. Measurements implemented on the side of the potentiostat
+        consist of a few blocking remote calls, so by default they are run in the executor.
+        """
+        await run_in_executor(self._start_measurements)
+
     @abstractmethod
     def _send_parameters(self):
         pass
 
+    def _save_data(self):
+        """Saves measured data. Measurements implemented on the side of the potentiostat are saved by Thales"""
+
+    def _completed(self):
+        """Called after a successful run, when its data is saved"""
+        self._cache_result()
+
     @property
     def potentiostat_mode(self):
         return self._PotentiostatMode
 
     @potentiostat_mode.setter
     def potentiostat_mode(self, value: str):
+        from thales_remote.script_wrapper import PotentiostatMode
+
         mapping = {
             'pseudogalvanostatic': PotentiostatMode.POTMODE_PSEUDOGALVANOSTATIC,
             'galvanostatic': PotentiostatMode.POTMODE_GALVANOSTATIC,
             'potentiostatic': PotentiostatMode.POTMODE_POTENTIOSTATIC,
         }
 
+        if isinstance(value, PotentiostatMode):
+            self._PotentiostatMode = value
+            return
+        problem = _check_potentiostat_mode(value)
+        if problem is not None:
+            raise ParameterError(self.measurement_name, [problem])
         self._PotentiostatMode = mapping[str.lower(value)]
 
 
@@ -152,30 +382,34 @@ class CyclicVoltammetry(BaseMeasurement):
         ]
 
     def _send_parameters(self):
-        self.wr_connection.setCVCounter(self.counter)
-        self.wr_connection.setCVOutputPath(self.output_path)
-        self.wr_connection.setCVOutputFileName(self._output_filename)
-        self.wr_connection.setCVNaming(self.naming)
-        self.wr_connection.setCVStartPotential(self.start_potential)
-        self.wr_connection.setCVUpperReversingPotential(self.upper_reversing_potential)
-        self.wr_connection.setCVLowerReversingPotential(self.lower_reversing_potential)
-        self.wr_connection.setCVEndPotential(self.end_potential)
-        self.wr_connection.setCVStartHoldTime(self.start_hold_time)
-        self.wr_connection.setCVEndHoldTime(self.end_hold_time)
-        self.wr_connection.setCVCycles(self.cycles)
-        self.wr_connection.setCVSamplesPerCycle(self.samples_per_cycle)
-        self.wr_connection.setCVScanRate(self.scan_rate)
-        self.wr_connection.setCVMaximumCurrent(self.maximum_current)
-        self.wr_connection.setCVMinimumCurrent(self.minimum_current)
-        self.wr_connection.setCVOhmicDrop(self.ohmic_drop)
-        self.wr_connection.enableCVAnalogFunctionGenerator(self.analog_function_generator)
-        self.wr_connection.enableCVAutoRestartAtCurrentOverflow(self.auto_restart_at_current_overflow)
-        self.wr_connection.enableCVAutoRestartAtCurrentUnderflow(self.auto_restart_at_current_underflow)
+        self._set('setCVCounter', self.counter, force=True)
+        self._set('setCVOutputPath', self.output_path)
+        self._set('setCVOutputFileName', self._output_filename)
+        self._set('setCVNaming', self.naming)
+        self._set('setCVStartPotential', self.start_potential)
+        self._set('setCVUpperReversingPotential', self.upper_reversing_potential)
+        self._set('setCVLowerReversingPotential', self.lower_reversing_potential)
+        self._set('setCVEndPotential', self.end_potential)
+        self._set('setCVStartHoldTime', self.start_hold_time)
+        self._set('setCVEndHoldTime', self.end_hold_time)
+        self._set('setCVCycles', self.cycles)
+        self._set('setCVSamplesPerCycle', self.samples_per_cycle)
+        self._set('setCVScanRate', self.scan_rate)
+        self._set('setCVMaximumCurrent', self.maximum_current)
+        self._set('setCVMinimumCurrent', self.minimum_current)
+        self._set('setCVOhmicDrop', self.ohmic_drop)
+        self._set('enableCVAnalogFunctionGenerator', self.analog_function_generator)
+        self._set('enableCVAutoRestartAtCurrentOverflow', self.auto_restart_at_current_overflow)
+        self._set('enableCVAutoRestartAtCurrentUnderflow', self.auto_restart_at_current_underflow)
 
     def _start_measurements(self):
         self.wr_connection.disableCVAutoRestartAtCurrentOverflow()
         self.wr_connection.disableCVAutoRestartAtCurrentUnderflow()
         self.wr_connection.disableCVAnalogFunctionGenerator()
+        if self._shadow is not None:
+            self._shadow.record('enableCVAutoRestartAtCurrentOverflow', False)
+            self._shadow.record('enableCVAutoRestartAtCurrentUnderflow', False)
+            self._shadow.record('enableCVAnalogFunctionGenerator', False)
         self.wr_connection.checkCVSetup()
         self.wr_connection.measureCV()
 
@@ -212,28 +446,28 @@ class LinearSweepVoltammetry(BaseMeasurement):
         ]
 
     def _send_parameters(self):
-        self.wr_connection.setIEAbsoluteTolerance(self.absolute_tolerance)
-        self.wr_connection.setIECounter(self.counter)
-        self.wr_connection.setIEFirstEdgePotential(self.first_edge_potential)
-        self.wr_connection.setIEFirstEdgePotentialRelation(self.first_edge_potential_relation)
-        self.wr_connection.setIEFourthEdgePotential(self.fourth_edge_potential)
-        self.wr_connection.setIEFourthEdgePotentialRelation(self.fourth_edge_potential_relation)
-        self.wr_connection.setIEMaximumCurrent(self.maximum_current)
-        self.wr_connection.setIEMaximumWaitingTime(self.maximum_waiting_time)
-        self.wr_connection.setIEMinimumCurrent(self.minimum_current)
-        self.wr_connection.setIEMinimumWaitingTime(self.minimum_waiting_time)
-        self.wr_connection.setIENaming(self.naming)
-        self.wr_connection.setIEOhmicDrop(self.ohmic_drop)
-        self.wr_connection.setIEOutputFileName(self._output_filename)
-        self.wr_connection.setIEOutputPath(self.output_path)
-        self.wr_connection.setIEPotentialResolution(self.potential_resolution)
-        self.wr_connection.setIERelativeTolerance(self.relative_tolerance)
-        self.wr_connection.setIEScanRate(self.scan_rate)
-        self.wr_connection.setIESecondEdgePotential(self.second_edge_potential)
-        self.wr_connection.setIESecondEdgePotentialRelation(self.second_edge_potential_relation)
-        self.wr_connection.setIESweepMode(self.sweep_mode)
-        self.wr_connection.setIEThirdEdgePotential(self.third_edge_potential)
-        self.wr_connection.setIEThirdEdgePotentialRelation(self.third_edge_potential_relation)
+        self._set('setIEAbsoluteTolerance', self.absolute_tolerance)
+        self._set('setIECounter', self.counter, force=True)
+        self._set('setIEFirstEdgePotential', self.first_edge_potential)
+        self._set('setIEFirstEdgePotentialRelation', self.first_edge_potential_relation)
+        self._set('setIEFourthEdgePotential', self.fourth_edge_potential)
+        self._set('setIEFourthEdgePotentialRelation', self.fourth_edge_potential_relation)
+        self._set('setIEMaximumCurrent', self.maximum_current)
+        self._set('setIEMaximumWaitingTime', self.maximum_waiting_time)
+        self._set('setIEMinimumCurrent', self.minimum_current)
+        self._set('setIEMinimumWaitingTime', self.minimum_waiting_time)
+        self._set('setIENaming', self.naming)
+        self._set('setIEOhmicDrop', self.ohmic_drop)
+        self._set('setIEOutputFileName', self._output_filename)
+        self._set('setIEOutputPath', self.output_path)
+        self._set('setIEPotentialResolution', self.potential_resolution)
+        self._set('setIERelativeTolerance', self.relative_tolerance)
+        self._set('setIEScanRate', self.scan_rate)
+        self._set('setIESecondEdgePotential', self.second_edge_potential)
+        self._set('setIESecondEdgePotentialRelation', self.second_edge_potential_relation)
+        self._set('setIESweepMode', self.sweep_mode)
+        self._set('setIEThirdEdgePotential', self.third_edge_potential)
+        self._set('setIEThirdEdgePotentialRelation', self.third_edge_potential_relation)
 
     def _start_measurements(self):
         self.wr_connection.checkIESetup()
@@ -245,26 +479,27 @@ class ElectrochemicalImpedanceSpectroscopy(BaseMeasurement):
 
     _measurement_name = 'eis'
     _measurement_full_name = 'Electrochemical Impedance Spectroscopy'
+    _manages_potentiostat = True
 
     def __str__(self):
         return self._measurement_name
 
     def _send_parameters(self):
-        self.wr_connection.setPotentiostatMode(self.potentiostat_mode)
-        self.wr_connection.setAmplitude(self.amplitude)
-        self.wr_connection.setPotential(self.potential)
-        self.wr_connection.setLowerFrequencyLimit(self.lower_frequency_limit)
-        self.wr_connection.setStartFrequency(self.start_frequency)
-        self.wr_connection.setUpperFrequencyLimit(self.upper_frequency_limit)
-        self.wr_connection.setLowerNumberOfPeriods(self.lower_number_of_periods)
-        self.wr_connection.setLowerStepsPerDecade(self.lower_steps_per_decade)
-        self.wr_connection.setUpperNumberOfPeriods(self.upper_number_of_periods)
-        self.wr_connection.setUpperStepsPerDecade(self.upper_steps_per_decade)
-        self.wr_connection.setScanDirection(self.scan_direction)
-        self.wr_connection.setScanStrategy(self.scan_strategy)
-        self.wr_connection.setEISOutputPath(self.output_path)
-        self.wr_connection.setEISOutputFileName(self._output_filename)
-        self.wr_connection.setEISNaming(self.naming)
+        self._set('setPotentiostatMode', self.potentiostat_mode)
+        self._set('setAmplitude', self.amplitude)
+        self._set('setPotential', self.potential)
+        self._set('setLowerFrequencyLimit', self.lower_frequency_limit)
+        self._set('setStartFrequency', self.start_frequency)
+        self._set('setUpperFrequencyLimit', self.upper_frequency_limit)
+        self._set('setLowerNumberOfPeriods', self.lower_number_of_periods)
+        self._set('setLowerStepsPerDecade', self.lower_steps_per_decade)
+        self._set('setUpperNumberOfPeriods', self.upper_number_of_periods)
+        self._set('setUpperStepsPerDecade', self.upper_steps_per_decade)
+        self._set('setScanDirection', self.scan_direction)
+        self._set('setScanStrategy', self.scan_strategy)
+        self._set('setEISOutputPath', self.output_path)
+        self._set('setEISOutputFileName', self._output_filename)
+        self._set('setEISNaming', self.naming)
 
     @property
     def parameters(self):
@@ -286,27 +521,282 @@ class ElectrochemicalImpedanceSpectroscopy(BaseMeasurement):
             "naming",
         ]
 
+    @safe_pot
     def _start_measurements(self):
-        self.wr_connection.enablePotentiostat()
         self.wr_connection.measureEIS()
-        self.wr_connection.disablePotentiostat()
+        if self._shadow is not None:
+            self._shadow.forget('setFrequency', 'setNumberOfPeriods')  # changed by the spectrum sweep
 
 
 class BaseManualMeasurements(BaseMeasurement, ABC):
     """
     Base class for manual measurements
-    """
 
-    def __init__(self, wr_connection: ThalesRemoteScriptWrapper, measurement_id: str, **kwargs):
+    Samples are taken by DeadlineScheduler (see autothalix.scheduler). Optional parameters, that can be set in the
+    script or in the baseline file:
+
+    * sampling_policy: 'catch_up' (default) or 'skip'. What to do with samples that missed their deadline.
+    * record_timing: If True, actual timestamp and latency of every remote call are stored in measured data as
+      'timestamp_s' and 'latency_s' columns. Defaults to False.
+    * streaming: If True, samples are not kept in measured_data, but appended to the output CSV file during the
+      measurement by a background thread (see autothalix.streaming). Defaults to False.
+    * stream_flush_interval: Maximum time in seconds a sample waits in memory in streaming mode. Defaults to 5.
+    * stream_flush_rows: Number of samples that triggers writing in streaming mode. Defaults to 1000.
+    * output_format: 'csv' (default), 'binary' or 'both'. Binary files ('.atx') store columns as contiguous float64
+      arrays that can be opened with numpy.memmap, see autothalix.binary. In streaming mode the binary file is
+      converted from the streamed CSV at the end.
+    * log_every: Log a line about every n-th sample. 0 logs only the sampling summary at the end. Defaults to 1.
+      See also autothalix.logging.configure_logging() to move log I/O out of the sampling loop.
+    * checkpoint_interval: If set, measured data is journaled and the state of the acquisition is checkpointed every
+      checkpoint_interval seconds (and when sampling ends, also on errors), see autothalix.checkpoint. The files
+      are removed when the run finishes. 0 checkpoints after every sample. Defaults to None (no checkpoints).
+    * resume: True to continue the latest checkpointed run of the measurement id in output_path, or the path to a
+      checkpoint file. Data of the interrupted run is restored, sampling continues at the time of the checkpoint and
+      results are saved under the output name of the interrupted run. If there is no checkpoint, the measurement
+      starts from the beginning. Defaults to False.
+    * live: If True, every stored row is published into a shared memory ring buffer named
+      ``autothalix_<measurement>_<measurement_id>``, or the name given instead of True, that other processes can
+      read during the measurement with autothalix.live.LiveSubscriber. Defaults to False.
+    * live_capacity: Number of rows in the ring buffer. Defaults to 10000.
+    """
+    _manages_potentiostat = True
+    sampling_policy = CATCH_UP
+    record_timing = False
+    streaming = False
+    stream_flush_interval = 5.0
+    stream_flush_rows = 1000
+    output_format = 'csv'
+    log_every = 1
+    checkpoint_interval = None
+    resume = False
+    live = False
+    live_capacity = 10000
+
+    def __init__(self, wr_connection: 'ThalesRemoteScriptWrapper', measurement_id: str, **kwargs):
+        self.sampling_stats = None
+        self._writer = None
+        self._active_scheduler = None
+        self._checkpointer = None
+        self._publisher = None
+        self._resume_state = None
+        self._resumed_from = None
+        self._phase = 'sampling'
+        self._resume_at = 0.0  # scheduled time of the next sample within the phase
         super().__init__(wr_connection, measurement_id, **kwargs)
+        if self.resume:
+            self._load_checkpoint()
+
+    def _load_checkpoint(self):
+        """Loads the checkpoint to resume from and continues the output name of the interrupted run"""
+        path = self.resume
+        if path is True:
+            path = find_checkpoint(self.output_path, self.measurement_name, self.measurement_id)
+            if path is None:
+                logger.info(f'No checkpoint of {self} {self.measurement_id} in {self.output_path}, '
+                            f'starting from the beginning')
+                return
+        state = load_checkpoint(path)
+        if (state['measurement'], state['measurement_id']) != (self.measurement_name, self.measurement_id):
+            raise ValueError(f'Checkpoint {path} belongs to {state["measurement"]} {state["measurement_id"]}, '
+                             f'not to {self.measurement_name} {self.measurement_id}')
+        parameters = parameters_state({parameter: getattr(self, parameter) for parameter in self.parameters})
+        changed = [name for name, value in parameters.items() if state['parameters'].get(name) != value]
+        if changed:
+            logger.warning(f'Parameters {", ".join(changed)} differ from the checkpointed run')
+        self.current_datetime = state['current_datetime']
+        self._phase = state['phase']
+        self._resume_at = state['elapsed']
+        self._resume_state = state
+        self._resumed_from = path
+        logger.info(f'Resuming {self} {self.measurement_id} from {path}: {state["phase"]} phase at '
+                    f'{state["elapsed"]:.3f} s, {state["rows"]} rows')
+
+    @property
+    def _resumed_phase(self):
+        """Phase of the checkpoint the run resumes from, None if it does not resume"""
+        return None if self._resume_state is None else self._resume_state['phase']
+
+    def _save_checkpoint(self):
+        if self._checkpointer is None:
+            return
+        scheduler = self._active_scheduler
+        self._checkpointer.save({
+            'measurement': self.measurement_name,
+            'measurement_id': self.measurement_id,
+            'current_datetime': self.current_datetime,
+            'phase': self._phase,
+            'elapsed': self._resume_at,
+            'interval': None if scheduler is None else scheduler.interval,
+            'parameters': parameters_state({parameter: getattr(self, parameter) for parameter in self.parameters}),
+        })
+
+    def _restore_rows(self, rows):
+        """Stores rows of the interrupted run. Overridden by measurements that derive state from the data."""
+        for row in rows:
+            self._store(row)
+
+    def _completed(self):
+        if self._checkpointer is not None:
+            self._checkpointer.discard()
+            self._checkpointer = None
+        if self._resumed_from is not None:
+            remove_checkpoint(self._resumed_from)
+            self._resumed_from = None
+        super()._completed()
+
+    def _load_cached_result(self):
+        """Loads measured_data from the output of a reused run, from the CSV file or else from the binary file"""
+        csv_path = self._output_file('.csv')
+        if os.path.exists(csv_path):
+            self.measured_data = read_csv_to_dict(csv_path)
+            return
+        from autothalix import binary
+
+        binary_path = self._output_file(binary.EXTENSION)
+        if os.path.exists(binary_path):
+            self.measured_data = binary.read_binary(binary_path)
+
+    def _output_file(self, extension='.csv', name_suffix=''):
+        return os.path.join(self.output_path, self._output_filename + name_suffix + extension)
+
+    def _scheduler(self, interval, duration):
+        offset = 0
+        if self._resume_state is not None:  # continue the phase of the checkpoint
+            offset = self._resume_state['elapsed']
+            interval = self._resume_state['interval'] or interval
+            self._resume_state = None
+        self._resume_at = offset
+        scheduler = DeadlineScheduler(interval, duration, policy=self.sampling_policy, offset=offset)
+        self.sampling_stats = scheduler.stats
+        self._active_scheduler = scheduler  # _process_sample can change its interval
+        return scheduler
+
+    @contextmanager
+    def _recording(self, *columns, timing: bool = True):
+        """
+        Prepares measured_data (or the streaming writer) for the given columns. Use :meth:`_record` inside the block.
+        The streaming writer is finalized when the block ends, also on errors and KeyboardInterrupt.
+
+        :param timing: Add timing columns if record_timing is set. Pass False for rows that are not single samples.
+        """
+        if self.record_timing and timing:
+            columns += ('timestamp_s', 'latency_s')
+        self.measured_data = {column: [] for column in columns}
+        self._data_columns = list(self.measured_data.values())
+        if self.streaming:
+            self._writer = StreamingCSVWriter(self._output_file('.csv'), columns,
+                                              flush_interval=self.stream_flush_interval,
+                                              flush_rows=self.stream_flush_rows)
+        if self.live:
+            from autothalix.live import LivePublisher, live_name
+
+            name = self.live if isinstance(self.live, str) else live_name(self.measurement_name, self.measurement_id)
+            self._publisher = LivePublisher(name, columns, self.live_capacity)
+            logger.info(f'Publishing live {self.measurement_name} data to shared memory {name}')
+        rows = []
+        if self._resume_state is not None:
+            journal_columns, rows = read_journal(journal_path_of(self._resumed_from), self._resume_state['rows'])
+            if tuple(journal_columns) != columns:
+                raise ValueError(f'Columns {journal_columns} of the checkpointed run differ from {list(columns)}')
+            self._restore_rows(rows)
+        if self.checkpoint_interval is not None:
+            self._checkpointer = Checkpointer(self._output_file(CHECKPOINT_EXTENSION),
+                                              self._output_file(JOURNAL_EXTENSION), self.checkpoint_interval)
+            self._checkpointer.open_journal(columns, rows)
+        try:
+            yield
+        finally:
+            if self._checkpointer is not None:
+                self._save_checkpoint()
+                self._checkpointer.close_journal()
+            if self._publisher is not None:
+                self._publisher.close()
+                self._publisher = None
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+    def _record(self, tick, *values):
+        """Stores one sample. Values are given in order of the columns passed to :meth:`_recording`"""
+        if self.record_timing:
+            values += (tick.timestamp, tick.latency)
+        self._store(values)
+
+    def _store(self, values):
+        """Stores one row of values in order of the columns passed to :meth:`_recording`"""
+        if self._writer is not None:
+            self._writer.append(values)
+        else:
+            for column, value in zip(self._data_columns, values):
+                column.append(value)
+        if self._checkpointer is not None:
+            self._checkpointer.append(values)
+        if self._publisher is not None:
+            self._publisher.publish(values)
+
+    def _sample(self, interval, duration, func, *args):
+        """Calls func on schedule and passes every result to :meth:`_process_sample`"""
+        for tick in self._scheduler(interval, duration):
+            self._process_sample(tick, tick.call(func, *args))
+            self._checkpoint_sample(tick)
+        logger.info(f'{self} sampling: {self.sampling_stats}')
+
+    async def _asample(self, interval, duration, func, *args):
+        """Asynchronous version of :meth:`_sample`"""
+        async for tick in self._scheduler(interval, duration):
+            self._process_sample(tick, await tick.acall(func, *args))
+            self._checkpoint_sample(tick)
+        logger.info(f'{self} sampling: {self.sampling_stats}')
+
+    def _checkpoint_sample(self, tick):
+        """Remembers where to resume after the sample and writes a checkpoint if it is due"""
+        self._resume_at = tick.scheduled + self._active_scheduler.interval
+        if self._checkpointer is not None and self._checkpointer.due():
+            self._save_checkpoint()
+
+    def _log_sample(self, tick, message, *args):
+        """
+        Logs a line about a sample if it is one of every ``log_every`` samples. 0 disables lines about samples, the
+        sampling summary is logged anyway. Arguments are formatted only if the line is logged.
+        """
+        if self.log_every and tick.index % self.log_every == 0:
+            logger.info(message, *args)
+
+    @abstractmethod
+    def _process_sample(self, tick, value):
+        """Logs and records the result of one remote call made by :meth:`_sample`"""
 
     def _save_data(self):
-        logger.info(f"Saving {self.measurement_name} data to {self._output_filename}.csv")
-        write_dict_to_csv(self.measured_data, os.path.join(self.output_path, self._output_filename + '.csv'))
+        self._save_table(self.measured_data)
 
-    def run(self):
-        super().run()
-        self._save_data()
+    def _save_table(self, data, name_suffix=''):
+        """
+        Saves a table in the output format, or finalizes the format of a table that was streamed
+
+        :param data: dict of columns. Ignored in streaming mode.
+        :param name_suffix: Added to the output file name, e.g. '_reduced'
+        """
+        if self.output_format not in ('csv', 'binary', 'both'):
+            raise ValueError(f'Unknown output format "{self.output_format}". Use "csv", "binary" or "both"')
+        from autothalix import binary  # imports numpy
+
+        name = self._output_filename + name_suffix
+        csv_path = self._output_file('.csv', name_suffix)
+        binary_path = self._output_file(binary.EXTENSION, name_suffix)
+        if self.streaming:
+            logger.info(f"{self.measurement_name} data was streamed to {name}.csv")
+            if self.output_format != 'csv':
+                logger.info(f"Converting {self.measurement_name} data to {name}{binary.EXTENSION}")
+                binary.csv_to_binary(csv_path, binary_path)
+            if self.output_format == 'binary':
+                os.remove(csv_path)
+            return
+        if self.output_format != 'binary':
+            logger.info(f"Saving {self.measurement_name} data to {name}.csv")
+            write_dict_to_csv(data, csv_path)
+        if self.output_format != 'csv':
+            logger.info(f"Saving {self.measurement_name} data to {name}{binary.EXTENSION}")
+            binary.write_dict_to_binary(data, binary_path)
 
 
 class OpenCircuitPotential(BaseManualMeasurements):
@@ -314,8 +804,51 @@ class OpenCircuitPotential(BaseManualMeasurements):
     Open Circuit Potential measurement class. This class is used to measure the open circuit potential of the sample.
     It is a manually implemented measurement. For more information on implementation please refer _start_measurements
     method.
+
+    Optional parameters to reduce long recordings during acquisition (see autothalix.reducers):
+
+    * reducer: None (default), 'bucket', 'deadband' or 'lttb'
+    * bucket_seconds: Width of buckets of the 'bucket' reducer, which stores min, max and mean potential and the
+      number of samples of every bucket. Defaults to 60.
+    * deadband: Potential change in V that the 'deadband' reducer needs to store a sample. Defaults to 0.001.
+    * deadband_max_interval: The 'deadband' reducer stores a sample at least this often, in seconds. Defaults to
+      None (no limit).
+    * lttb_bucket_size: Number of samples per stored sample of the 'lttb' reducer, which keeps the visual shape of
+      the curve. Defaults to 100.
+    * store_raw: If True (default), all samples are stored in measured_data as usual and the reduced series in
+      reduced_data, saved to a file with '_reduced' suffix. If False, only the reduced series is kept, in
+      measured_data, so memory use and file size are bounded by the reduction.
+
+    Optional parameters to end the measurement as soon as the potential has settled:
+
+    * steady_state: If True, the drift of the potential is the slope of a least squares line through the samples of
+      the last steady_state_window seconds, updated with every sample. The measurement ends when the drift is
+      smaller than steady_state_drift with confidence, i.e. ``abs(slope) + steady_state_z * standard error of the
+      slope <= steady_state_drift``, so noise delays the end instead of being mistaken for a flat potential.
+      "seconds" is the maximum duration. Defaults to False.
+    * steady_state_drift: Largest drift of a settled potential in V/s. Defaults to 1e-5 (0.6 mV/min).
+    * steady_state_window: Seconds of samples the drift is fitted to. Defaults to 60.
+    * steady_state_z: Number of standard errors added to the drift. Defaults to 2.
     """
     _measurement_name = 'ocp'
+    reducer = None
+    bucket_seconds = 60.0
+    deadband = 0.001
+    deadband_max_interval = None
+    lttb_bucket_size = 100
+    store_raw = True
+    steady_state = False
+    steady_state_drift = 1e-5
+    steady_state_window = 60.0
+    steady_state_z = 2.0
+
+    def __init__(self, wr_connection: 'ThalesRemoteScriptWrapper', measurement_id: str, **kwargs):
+        self.drift = None
+        self.steady_at = None
+        self._reducer = None
+        self.reduced_data = None
+        self._reduced_writer = None
+        super().__init__(wr_connection, measurement_id, **kwargs)
 
     def __str__(self):
         return 'Open Circuit Potential'
@@ -332,19 +865,107 @@ class OpenCircuitPotential(BaseManualMeasurements):
         ]
 
     def _send_parameters(self):
-        self.wr_connection.setPotentiostatMode(self.potentiostat_mode)
-        self.wr_connection.setCurrent(self.current)
+        self._set('setPotentiostatMode', self.potentiostat_mode)
+        self._set('setCurrent', self.current)
+
+    def _create_reducer(self):
+        from autothalix import reducers
+
+        if self.reducer == 'bucket':
+            return reducers.BucketReducer(self.bucket_seconds, 'potential_V')
+        if self.reducer == 'deadband':
+            return reducers.DeadbandReducer(self.deadband, self.deadband_max_interval, 'potential_V')
+        return reducers.LTTBReducer(self.lttb_bucket_size, 'potential_V')
+
+    @contextmanager
+    def _ocp_recording(self):
+        """Prepares raw and reduced outputs. Remaining reduced rows are stored when the block ends."""
+        self.drift = None
+        self.steady_at = None
+        if self.steady_state:  # a window of n samples spans n - 1 intervals
+            self.drift = Regression(max(3, round(self.steady_state_window / self.delta) + 1))
+        self._reducer = None if self.reducer is None else self._create_reducer()
+        if self._reducer is None:
+            with self._recording('time', 'potential_V'):
+                yield
+            return
+        if not self.store_raw:
+            with self._recording(*self._reducer.columns, timing=False):
+                try:
+                    yield
+                finally:
+                    self._store_reduced(self._reducer.flush())
+            return
+        self.reduced_data = {column: [] for column in self._reducer.columns}
+        if self.streaming:
+            self._reduced_writer = StreamingCSVWriter(self._output_file('.csv', '_reduced'), self._reducer.columns,
+                                                      flush_interval=self.stream_flush_interval,
+                                                      flush_rows=self.stream_flush_rows)
+        try:
+            with self._recording('time', 'potential_V'):
+                yield
+        finally:
+            self._store_reduced(self._reducer.flush())
+            if self._reduced_writer is not None:
+                self._reduced_writer.close()
+                self._reduced_writer = None
+
+    def _store_reduced(self, rows):
+        for row in rows:
+            if not self.store_raw:
+                self._store(row)
+            elif self._reduced_writer is not None:
+                self._reduced_writer.append(row)
+            else:
+                for column, value in zip(self.reduced_data.values(), row):
+                    column.append(value)
+
+    def _restore_rows(self, rows):
+        super()._restore_rows(rows)
+        raw = self._reducer is None or self.store_raw
+        if self.drift is not None and raw:
+            for row in rows:
+                self.drift.add(row[0], row[1])
+        if self._reducer is not None and self.store_raw:  # rebuild reduced data from the raw samples
+            for row in rows:
+                self._store_reduced(self._reducer.add(row[0], row[1]))
+
+    def _process_sample(self, tick, potential):
+        self._log_sample(tick, 'Second:\t%s\tPotential:\t%sV', tick.scheduled, potential)
+        if self._reducer is None or self.store_raw:
+            self._record(tick, tick.scheduled, potential)
+        if self._reducer is not None:
+            self._store_reduced(self._reducer.add(tick.scheduled, potential))
+        if self.drift is not None:
+            self._check_steady_state(tick.scheduled, potential)
+
+    def _check_steady_state(self, time, potential):
+        """Updates the drift and stops sampling if the potential has settled"""
+        drift = self.drift
+        drift.add(time, float(potential))
+        if not drift.full:
+            return
+        if abs(drift.slope) + self.steady_state_z * drift.slope_stderr <= self.steady_state_drift:
+            self.steady_at = time
+            logger.info(f'Steady state after {time:.3f} s: drift {drift.slope * 1e3:.4f} '
+                        f'+- {drift.slope_stderr * 1e3:.4f} mV/s over the last {self.steady_state_window} s')
+            self._active_scheduler.stop()
+
+    def _save_data(self):
+        super()._save_data()
+        if self.reducer is not None and self.store_raw:
+            self._save_table(self.reduced_data, '_reduced')
 
     @safe_pot
     def _start_measurements(self):
-        measured_data = {'time': [], 'potential_V': []}
-        for i in range(0, self.seconds, self.delta):
-            potential = self.wr_connection.getPotential()
-            logger.info(f'Second:\t{i}\tPotential:\t{potential}V')
-            measured_data['time'].append(i)
-            measured_data['potential_V'].append(potential)
-            time.sleep(self.delta)
-        self.measured_data = measured_data
+        with self._ocp_recording():
+            self._sample(self.delta, self.seconds, self.wr_connection.getPotential)
+        return True
+
+    @asafe_pot
+    async def _astart_measurements(self):
+        with self._ocp_recording():
+            await self._asample(self.delta, self.seconds, self.wr_connection.getPotential)
         return True
 
 
@@ -352,8 +973,29 @@ class Impedance(BaseManualMeasurements):
     """
     This class is used to measure impedance of a cell. It is a manually implemented measurement. For more information
     on implementation please refer _start_measurements method.
+
+    Optional parameters for tracking impedance at several frequencies:
+
+    * frequencies: List of frequencies in Hz. If set, every sample is a sweep over these frequencies instead of one
+      measurement at "frequency". Sweeps go from high to low and back in turns, so consecutive sweeps start at the
+      frequency where the previous one ended and the potentiostat does not have to jump across the whole range.
+    * sweep_budget: Time in seconds one sweep should take. Defaults to delta. Starting from the highest frequency,
+      every frequency gets an equal share of the time that is left, and its number of periods is what fits into
+      the share, but not more than number_of_periods. Time that capped frequencies do not use goes to the lower
+      frequencies.
+    * min_number_of_periods: Number of periods of frequencies whose share is shorter than one period. Defaults to 1.
+
+    In this mode measured_data has one row per sweep with 'time' and 'impedance_Ohm_<f>Hz' and 'phase_deg_<f>Hz'
+    columns for every frequency. See :meth:`impedance_array`.
     """
     _measurement_name = 'imp'
+    frequencies = None
+    sweep_budget = None
+    min_number_of_periods = 1
+
+    def __init__(self, wr_connection: 'ThalesRemoteScriptWrapper', measurement_id: str, **kwargs):
+        self._sweeps = 0
+        super().__init__(wr_connection, measurement_id, **kwargs)
 
     def __str__(self):
         return 'Impedance'
@@ -372,37 +1014,149 @@ class Impedance(BaseManualMeasurements):
         ]
 
     def _send_parameters(self):
-        self.wr_connection.setPotentiostatMode(self.potentiostat_mode)
-        self.wr_connection.setCurrent(self.current)
+        self._set('setPotentiostatMode', self.potentiostat_mode)
+        self._set('setCurrent', self.current)
+
+    def _get_impedance(self, frequency, amplitude, number_of_periods):
+        shadow = self._shadow
+        if shadow is None:
+            return self.wr_connection.getImpedance(
+                frequency=frequency,
+                amplitude=amplitude,
+                number_of_periods=number_of_periods)
+        # getImpedance sends all three values on every call, the shadow sends only changed ones
+        shadow.send(self.wr_connection, 'setFrequency', frequency)
+        shadow.send(self.wr_connection, 'setAmplitude', amplitude)
+        shadow.send(self.wr_connection, 'setNumberOfPeriods', number_of_periods)
+        return self.wr_connection.getImpedance()
+
+    @property
+    def sweep_plan(self):
+        """
+        Frequencies of a sweep from high to low with their numbers of periods
+
+        :return: list of (frequency, number_of_periods) tuples
+        """
+        remaining = self.delta if self.sweep_budget is None else self.sweep_budget
+        frequencies = sorted(self.frequencies, reverse=True)
+        plan = []
+        for index, frequency in enumerate(frequencies):
+            share = remaining / (len(frequencies) - index)
+            periods = int(min(self.number_of_periods, max(self.min_number_of_periods, share * frequency)))
+            plan.append((frequency, periods))
+            remaining -= periods / frequency
+        return plan
+
+    def _sweep(self, plan):
+        """Measures all frequencies of the plan, in reverse order every second sweep. Results are in plan order"""
+        order = plan if self._sweeps % 2 == 0 else plan[::-1]
+        self._sweeps += 1
+        results = {frequency: self._get_impedance(frequency, self.amplitude, periods) for frequency, periods in order}
+        return [results[frequency] for frequency, _ in plan]
+
+    def _sampling_target(self):
+        """Columns of measured data, function called on every tick and its arguments"""
+        if self.frequencies is None:
+            return ('time', 'impedance_Ohm', 'phase_deg'), self._get_impedance, (
+                self.frequency, self.amplitude, self.number_of_periods)
+        plan = self.sweep_plan
+        acquisition_time = sum(periods / frequency for frequency, periods in plan)
+        logger.info(f'Sweep over {len(plan)} frequencies, {acquisition_time:.3f} s of acquisition: ' +
+                    ', '.join(f'{frequency:g} Hz x {periods}' for frequency, periods in plan))
+        if acquisition_time > self.delta:
+            logger.warning(f'Acquisition time of a sweep {acquisition_time:.3f} s exceeds delta {self.delta} s, '
+                           f'samples will be late')
+        columns = ['time']
+        for frequency, _ in plan:
+            columns += [f'impedance_Ohm_{frequency:g}Hz', f'phase_deg_{frequency:g}Hz']
+        self._sweeps = 0
+        return tuple(columns), self._sweep, (plan,)
+
+    def _process_sample(self, tick, response):
+        if self.frequencies is not None:
+            values = [value for impedance in response for value in (float(impedance.real), float(impedance.imag))]
+            self._record(tick, tick.scheduled, *values)
+            self._log_sample(tick, 'Seconds:\t%s\tSweep:\t%s', tick.scheduled, values)
+            return
+        imp = float(response.real)
+        phase = float(response.imag)
+        self._record(tick, tick.scheduled, imp, phase)
+        self._log_sample(tick, 'Seconds:\t%s\tImpedance:\t %s Ohm\tPhase:\t%s°', tick.scheduled, imp, phase)
+
+    def impedance_array(self):
+        """
+        Measured data of the multi-frequency mode as arrays. Not available in streaming mode.
+
+        :return: frequencies (n,), times (m,), impedance (n, m) and phase (n, m) numpy arrays, frequencies from high
+            to low
+        """
+        import numpy as np
+
+        if self.frequencies is None:
+            raise ValueError('impedance_array() is available only when frequencies are set')
+        frequencies = np.array(sorted(self.frequencies, reverse=True), dtype=float)
+        impedance = np.array([self.measured_data[f'impedance_Ohm_{frequency:g}Hz'] for frequency in frequencies])
+        phase = np.array([self.measured_data[f'phase_deg_{frequency:g}Hz'] for frequency in frequencies])
+        return frequencies, np.array(self.measured_data['time'], dtype=float), impedance, phase
 
     @safe_pot
     def _start_measurements(self):
         """
         Start measurements for Impedance measurement
         """
-        measured_data = {'time': [], 'impedance_Ohm': [], 'phase_deg': []}
-        for i in range(0, self.seconds, self.delta):
-            response = self.wr_connection.getImpedance(
-                frequency=self.frequency,
-                amplitude=self.amplitude,
-                number_of_periods=self.number_of_periods)
-
-            imp = float(response.real)
-            phase = float(response.imag)
-            measured_data['time'].append(i)
-            measured_data['impedance_Ohm'].append(imp)
-            measured_data['phase_deg'].append(phase)
-            logger.info(f'Seconds:\t{i}\tImpedance:\t {imp} Ohm\tPhase:\t{phase}°')
-            time.sleep(self.delta)
-        self.measured_data = measured_data
+        columns, func, args = self._sampling_target()
+        with self._recording(*columns):
+            self._sample(self.delta, self.seconds, func, *args)
+        return True
+
+    @asafe_pot
+    async def _astart_measurements(self):
+        columns, func, args = self._sampling_target()
+        with self._recording(*columns):
+            await self._asample(self.delta, self.seconds, func, *args)
         return True
 
 
 class ChronoAmperometry(BaseManualMeasurements):
     """
     This class will perform a chronoamperometry measurement.
+
+    Optional parameters of sampling during electrolysis:
+
+    * sampling_mode: 'fixed' (default) samples at sample_rate. 'log' starts at min_sampling_interval right after the
+      potential step and makes intervals grow, so there are points_per_decade samples per decade of time.
+      'adaptive' doubles the interval while the current changes by less than change_threshold (relative) between
+      samples and halves it when the current changes faster. See autothalix.scheduler.LogSpacing and
+      ChangeDrivenSpacing.
+    * min_sampling_interval: First and smallest interval in seconds in 'log' and 'adaptive' modes. Defaults to 0.01.
+    * max_sampling_interval: Largest interval in seconds in 'log' and 'adaptive' modes. Defaults to 10.
+    * points_per_decade: Samples per decade of time in 'log' mode. Defaults to 10.
+    * change_threshold: Relative change of the current in 'adaptive' mode. Defaults to 0.01.
+
+    During electrolysis, charge, mean current, rolling mean and standard deviation of the current and the Cottrell
+    slope are updated with every sample in :attr:`analytics` (see autothalix.analytics.ElectrolysisAnalytics), which
+    can be read while the measurement runs. Optional parameters to end electrolysis before electrolysis_t:
+
+    * stop_charge: Charge in C. Electrolysis ends when the absolute charge reaches it. Defaults to None.
+    * stop_current_stable: Relative standard deviation of the current, e.g. 0.01. Electrolysis ends when the standard
+      deviation of the last analytics_window samples is at most this fraction of their mean. Defaults to None.
+    * analytics_window: Number of samples of the rolling statistics. Defaults to 20.
     """
     _measurement_name = 'ca'
+    sampling_mode = 'fixed'
+    min_sampling_interval = 0.01
+    max_sampling_interval = 10.0
+    points_per_decade = 10
+    change_threshold = 0.01
+    stop_charge = None
+    stop_current_stable = None
+    analytics_window = 20
+
+    def __init__(self, wr_connection: 'ThalesRemoteScriptWrapper', measurement_id: str, **kwargs):
+        self._spacing = None
+        self.analytics = None
+        self.stop_reason = None
+        super().__init__(wr_connection, measurement_id, **kwargs)
 
     def __str__(self):
         return 'Chronoamperometry'
@@ -422,40 +1176,117 @@ class ChronoAmperometry(BaseManualMeasurements):
         ]
 
     def _send_parameters(self):
-        self.wr_connection.setPotentiostatMode(self.potentiostat_mode)
+        self._set('setPotentiostatMode', self.potentiostat_mode)
 
     def _set_induction(self):
-        self.wr_connection.setPotential(self.induction_pot)
+        logger.info(f'Induction phase for {self.induction_t} seconds with {self.induction_pot} V')
+        self._set('setPotential', self.induction_pot)
 
     def _set_electrolysis(self):
-        self.wr_connection.setPotential(self.electrolysis_pot)
+        self._phase = 'electrolysis'
+        logger.info(f'Electrolysis phase for {self.electrolysis_t} seconds with {self.electrolysis_pot} V')
+        self._set('setPotential', self.electrolysis_pot)
 
     def _set_relaxation(self):
-        self.wr_connection.setPotential(self.relaxation_pot)
+        self._phase = 'relaxation'
+        self._resume_state = None
+        self._resume_at = 0.0
+        self._save_checkpoint()
+        logger.info(f'Relaxation phase for {self.relaxation_t} seconds with {self.relaxation_pot} V')
+        self._set('setPotential', self.relaxation_pot)
+
+    def _start_sampling(self):
+        """Prepares analytics and spacing of samples and returns the first sampling interval"""
+        self.analytics = ElectrolysisAnalytics(self.analytics_window)
+        self.stop_reason = None
+        if self.sampling_mode == 'log':
+            self._spacing = LogSpacing(self.min_sampling_interval, self.max_sampling_interval, self.points_per_decade)
+        elif self.sampling_mode == 'adaptive':
+            self._spacing = ChangeDrivenSpacing(self.min_sampling_interval, self.max_sampling_interval,
+                                                threshold=self.change_threshold)
+        else:
+            self._spacing = None
+            return 1 / self.sample_rate  # if sample rate 0.5 will sample every 2 seconds
+        return self.min_sampling_interval
+
+    def _restore_rows(self, rows):
+        super()._restore_rows(rows)
+        for row in rows:
+            self.analytics.add(row[0], row[1])
+        if self._spacing is not None:  # state of adaptive spacing follows the restored currents
+            for row in rows:
+                self._spacing.next_interval(row[0], row[1])
+
+    def _process_sample(self, tick, current):
+        self._record(tick, tick.timestamp, current)
+        self._log_sample(tick, 'Seconds:\t%s\tCurrent:\t %s A', tick.timestamp, current)
+        self.analytics.add(tick.timestamp, current)
+        reason = self._stop_condition()
+        if reason is not None:
+            self.stop_reason = reason
+            logger.info(f'Ending electrolysis after {tick.timestamp:.3f} s: {reason}')
+            self._active_scheduler.stop()
+        elif self._spacing is not None:
+            self._active_scheduler.interval = self._spacing.next_interval(tick.scheduled, current)
+
+    def _stop_condition(self):
+        """Returns the reason to end electrolysis early, or None"""
+        analytics = self.analytics
+        if self.stop_charge is not None and abs(analytics.charge.charge) >= self.stop_charge:
+            return f'charge {analytics.charge.charge:.6g} C reached {self.stop_charge} C'
+        if (self.stop_current_stable is not None and analytics.rolling.full
+                and analytics.relative_std <= self.stop_current_stable):
+            return (f'current {analytics.rolling.mean:.6g} A is stable within {analytics.relative_std:.3%} over '
+                    f'{analytics.rolling.window} samples')
+        return None
 
     @safe_pot
     def _start_measurements(self):
-        measured_data = {'time': [], 'current_A': []}
-        # induction phase
-        logger.info(f'Induction phase for {self.induction_t} seconds with {self.induction_pot} V')
-        self._set_induction()
-        time.sleep(self.induction_t)
+        resumed_phase = self._resumed_phase
+
+        # induction phase, skipped if the run resumes after it
+        if resumed_phase is None:
+            self._set_induction()
+            time.sleep(self.induction_t)
 
         # electrolysis phase
-        logger.info(f'Electrolysis phase for {self.electrolysis_t} seconds with {self.electrolysis_pot} V')
-        start_time = datetime.now().timestamp()  # get start phase time
-        self._set_electrolysis()
-        while (datetime.now().timestamp() - start_time) < self.electrolysis_t:
-            current = self.wr_connection.getCurrent()
-            seconds = datetime.now().timestamp() - start_time
-            measured_data['time'].append(seconds)
-            measured_data['current_A'].append(current)
-            logger.info(f'Seconds:\t{seconds}\tCurrent:\t {current} A')
-            time.sleep(1 / self.sample_rate)  # if sample rate 0.5 will wait 2 seconds between samples
+        interval = self._start_sampling()
+        with self._recording('time', 'current_A'):
+            if resumed_phase != 'relaxation':
+                self._set_electrolysis()
+                self._sample(interval, self.electrolysis_t, self.wr_connection.getCurrent)
+                logger.info(f'{self} electrolysis: {self.analytics}')
 
         # relaxation phase
-        logger.info(f'Relaxation phase for {self.relaxation_t} seconds with {self.relaxation_pot} V')
         self._set_relaxation()
         time.sleep(self.relaxation_t)
 
-        self.measured_data = measured_data
+    @asafe_pot
+    async def _astart_measurements(self):
+        import asyncio
+
+        resumed_phase = self._resumed_phase
+
+        # induction phase, skipped if the run resumes after it
+        if resumed_phase is None:
+            await run_in_executor(self._set_induction)
+            await asyncio.sleep(self.induction_t)
+
+        # electrolysis phase
+        interval = self._start_sampling()
+        with self._recording('time', 'current_A'):
+            if resumed_phase != 'relaxation':
+                await run_in_executor(self._set_electrolysis)
+                await self._asample(interval, self.electrolysis_t, self.wr_connection.getCurrent)
+                logger.info(f'{self} electrolysis: {self.analytics}')
+
+        # relaxation phase
+        await run_in_executor(self._set_relaxation)
+        await asyncio.sleep(self.relaxation_t)
+
+
+MEASUREMENT_CLASSES = {
+    measurement_class._measurement_name: measurement_class
+    for measurement_class in (CyclicVoltammetry, LinearSweepVoltammetry, ElectrochemicalImpedanceSpectroscopy,
+                              OpenCircuitPotential, Impedance, ChronoAmperometry)
+}
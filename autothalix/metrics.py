@@ -0,0 +1,214 @@
+"""
+Opt-in latency metrics of remote calls.
+
+Wrap the script wrapper with InstrumentedScriptWrapper (or call initialize_experiment(collect_metrics=True)) and
+use the wrapped object everywhere instead of the original one. Every public method call is timed, and counts and
+latency histograms are collected per command and per measurement. Measurements dump the summary of their calls at
+the end of run(). Without the wrapper nothing is measured and remote calls are not slowed down.
+"""
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+UNLABELED = '-'
+
+_BUCKET_BASE = 1e-6  # upper bound of the first histogram bucket in seconds
+_BUCKETS = 32  # buckets double in width, the last one ends at about 35 minutes
+
+
+def _bucket(seconds: float) -> int:
+    if seconds <= _BUCKET_BASE:
+        return 0
+    return min(int(math.ceil(math.log2(seconds / _BUCKET_BASE))), _BUCKETS - 1)
+
+
+def bucket_upper_bound(index: int) -> float:
+    """Upper bound in seconds of the histogram bucket with the given index"""
+    return _BUCKET_BASE * 2 ** index
+
+
+class CallStats:
+    """
+    Count and latency histogram of one command
+
+    :ivar count: Number of calls
+    :ivar errors: Number of calls that raised
+    :ivar total: Sum of latencies in seconds
+    :ivar min: Minimal latency in seconds
+    :ivar max: Maximal latency in seconds
+    :ivar histogram: Number of calls per bucket, bucket i holds latencies up to bucket_upper_bound(i)
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+        self.histogram = [0] * _BUCKETS
+
+    def add(self, seconds: float, failed: bool = False):
+        self.count += 1
+        self.errors += failed
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        self.histogram[_bucket(seconds)] += 1
+
+    def merge(self, other: 'CallStats'):
+        self.count += other.count
+        self.errors += other.errors
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.histogram = [a + b for a, b in zip(self.histogram, other.histogram)]
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, q: float) -> float:
+        """
+        Approximate latency percentile: upper bound of the histogram bucket, limited by the maximal latency
+
+        :param q: Percentile from 0 to 100
+        """
+        if not 0 <= q <= 100:
+            raise ValueError(f'Percentile must be between 0 and 100, got {q}')
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(self.count * q / 100))
+        cumulative = 0
+        for index, number in enumerate(self.histogram):
+            cumulative += number
+            if cumulative >= rank:
+                return min(bucket_upper_bound(index), self.max)
+        return self.max
+
+    def __str__(self):
+        return (f'{self.count} calls, {self.total:.3f} s total, mean {self.mean * 1000:.3f} ms, '
+                f'p50 {self.percentile(50) * 1000:.3f} ms, p99 {self.percentile(99) * 1000:.3f} ms, '
+                f'max {self.max * 1000:.3f} ms' + (f', {self.errors} errors' if self.errors else ''))
+
+
+class CallMetrics:
+    """
+    Call statistics of one connection by measurement and command. Thread safe.
+
+    :ivar measurement: Label of the measurement that calls are attributed to, see :meth:`measuring`
+    """
+
+    def __init__(self):
+        self._stats = {}
+        self._lock = threading.Lock()
+        self.measurement = UNLABELED
+
+    def record(self, command: str, seconds: float, failed: bool = False, measurement: str = None):
+        """Adds a call of the command to the statistics of the current (or given) measurement"""
+        key = (self.measurement if measurement is None else measurement, command)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = CallStats()
+            stats.add(seconds, failed)
+
+    @contextmanager
+    def measuring(self, measurement: str):
+        """Attributes calls made inside the block to the measurement"""
+        previous, self.measurement = self.measurement, measurement
+        try:
+            yield self
+        finally:
+            self.measurement = previous
+
+    @property
+    def measurements(self) -> list:
+        with self._lock:
+            return sorted({measurement for measurement, _ in self._stats})
+
+    def by_command(self, measurement: str = None) -> dict:
+        """
+        Statistics by command name
+
+        :param measurement: Only calls of this measurement. All calls by default.
+        :return: dict of CallStats copies
+        """
+        result = {}
+        with self._lock:
+            for (label, command), stats in self._stats.items():
+                if measurement is not None and label != measurement:
+                    continue
+                result.setdefault(command, CallStats()).merge(stats)
+        return result
+
+    def total(self, measurement: str = None) -> CallStats:
+        """Statistics of all calls of the measurement, or of all calls"""
+        total = CallStats()
+        for stats in self.by_command(measurement).values():
+            total.merge(stats)
+        return total
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+    def summary(self, measurement: str = None) -> str:
+        """Human readable table of statistics, slowest commands first"""
+        stats = self.by_command(measurement)
+        title = 'Remote calls' + (f' of {measurement}' if measurement is not None else '')
+        message = f'{title}: {self.total(measurement)}\n'
+        for command, command_stats in sorted(stats.items(), key=lambda item: -item[1].total):
+            message += f'\t{command}: {command_stats}\n'
+        return message
+
+
+class InstrumentedScriptWrapper:
+    """
+    Proxy of ThalesRemoteScriptWrapper that times every public method call.
+
+    Attributes that are not methods are read from and written to the wrapped object.
+
+    :param wr_connection: ThalesRemoteScriptWrapper object
+    :param metrics: CallMetrics to collect into. A new one is created by default.
+    :ivar metrics: CallMetrics of the connection
+    """
+
+    def __init__(self, wr_connection, metrics: CallMetrics = None):
+        object.__setattr__(self, 'wrapped', wr_connection)
+        object.__setattr__(self, 'metrics', metrics if metrics is not None else CallMetrics())
+
+    def __getattr__(self, name):
+        attribute = getattr(self.wrapped, name)
+        if name.startswith('_') or not callable(attribute):
+            return attribute
+        timed = self._timed(name, attribute)
+        object.__setattr__(self, name, timed)  # cached, next lookups do not reach __getattr__
+        return timed
+
+    def __setattr__(self, name, value):
+        setattr(self.wrapped, name, value)
+
+    def _timed(self, name, method):
+        metrics = self.metrics
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = method(*args, **kwargs)
+            except BaseException:
+                metrics.record(name, time.perf_counter() - start, failed=True)
+                raise
+            metrics.record(name, time.perf_counter() - start)
+            return result
+
+        timed.__name__ = name
+        timed.__doc__ = getattr(method, '__doc__', None)
+        return timed
+
+
+def call_metrics(wr_connection):
+    """Returns CallMetrics of an InstrumentedScriptWrapper, or None for other connections"""
+    if isinstance(wr_connection, InstrumentedScriptWrapper):
+        return wr_connection.metrics
+    return None
@@ -0,0 +1,145 @@
+"""
+Streaming reducers of sampled series.
+
+A reducer receives (time, value) samples one by one with :meth:`add` and returns rows of the reduced series as soon
+as they are final; :meth:`flush` returns the rest at the end. Memory use does not depend on the number of samples.
+
+* BucketReducer: min, max, mean and count of the samples in consecutive time buckets
+* DeadbandReducer: only samples that differ from the last stored one by more than a threshold
+* LTTBReducer: Largest-Triangle-Three-Buckets downsampling, which keeps the visual shape of the series
+"""
+import math
+
+
+class BucketReducer:
+    """
+    Aggregates samples in time buckets of fixed width
+
+    :param width: Width of a bucket in seconds
+    :param value_column: Name of the value column, used as a prefix of the aggregate columns
+    """
+
+    def __init__(self, width: float, value_column: str = 'value'):
+        if width <= 0:
+            raise ValueError(f'Bucket width must be positive, got {width}')
+        self.width = width
+        self.columns = ('time', f'{value_column}_min', f'{value_column}_max', f'{value_column}_mean', 'samples')
+        self._bucket = None
+        self._min = self._max = self._sum = 0.0
+        self._count = 0
+
+    def add(self, time: float, value: float) -> list:
+        bucket = math.floor(time / self.width)
+        rows = []
+        if bucket != self._bucket:
+            rows = self.flush()
+            self._bucket = bucket
+            self._min = self._max = value
+        self._min = min(self._min, value)
+        self._max = max(self._max, value)
+        self._sum += value
+        self._count += 1
+        return rows
+
+    def flush(self) -> list:
+        if not self._count:
+            return []
+        row = (self._bucket * self.width, self._min, self._max, self._sum / self._count, self._count)
+        self._sum = 0.0
+        self._count = 0
+        return [row]
+
+
+class DeadbandReducer:
+    """
+    Stores a sample only if its value differs from the last stored value by more than the threshold. The last
+    sample of the series is always stored.
+
+    :param threshold: Absolute threshold in units of the value
+    :param max_interval: Store a sample at least every max_interval seconds even if the value does not change,
+        so gaps in the reduced series are bounded. None disables it.
+    :param value_column: Name of the value column
+    """
+
+    def __init__(self, threshold: float, max_interval: float = None, value_column: str = 'value'):
+        if threshold < 0:
+            raise ValueError(f'Deadband threshold must not be negative, got {threshold}')
+        self.threshold = threshold
+        self.max_interval = max_interval
+        self.columns = ('time', value_column)
+        self._stored = None
+        self._last = None
+
+    def add(self, time: float, value: float) -> list:
+        stored = self._stored
+        if (stored is None or abs(value - stored[1]) > self.threshold
+                or (self.max_interval is not None and time - stored[0] >= self.max_interval)):
+            self._stored = self._last = (time, value)
+            return [self._stored]
+        self._last = (time, value)
+        return []
+
+    def flush(self) -> list:
+        if self._last is None or self._last is self._stored:
+            return []
+        self._stored = self._last
+        return [self._last]
+
+
+class LTTBReducer:
+    """
+    Streaming Largest-Triangle-Three-Buckets downsampling.
+
+    Samples are split into buckets of bucket_size samples, and from every bucket the sample that forms the largest
+    triangle with the previously selected sample and the average of the next bucket is kept. The first and the last
+    samples are always kept. Only two buckets are held in memory.
+
+    :param bucket_size: Number of samples per kept sample
+    :param value_column: Name of the value column
+    """
+
+    def __init__(self, bucket_size: int, value_column: str = 'value'):
+        if bucket_size < 1:
+            raise ValueError(f'Bucket size must be at least 1, got {bucket_size}')
+        self.bucket_size = bucket_size
+        self.columns = ('time', value_column)
+        self._selected = None
+        self._current = []
+        self._next = []
+
+    def add(self, time: float, value: float) -> list:
+        if self._selected is None:
+            self._selected = (time, value)
+            return [self._selected]
+        if len(self._current) < self.bucket_size:
+            self._current.append((time, value))
+            return []
+        self._next.append((time, value))
+        if len(self._next) < self.bucket_size:
+            return []
+        row = self._select(self._current, _average(self._next))
+        self._current, self._next = self._next, []
+        return [row]
+
+    def flush(self) -> list:
+        rows = []
+        if self._next:
+            rows.append(self._select(self._current, _average(self._next)))
+            self._current, self._next = self._next, []
+        if self._current:
+            last = self._current[-1]
+            if len(self._current) > 1:
+                rows.append(self._select(self._current[:-1], last))
+            rows.append(last)
+            self._selected = last
+            self._current = []
+        return rows
+
+    def _select(self, bucket, target):
+        (at, av), (ct, cv) = self._selected, target
+        self._selected = max(bucket, key=lambda point: abs((at - ct) * (point[1] - av) - (at - point[0]) * (cv - av)))
+        return self._selected
+
+
+def _average(points):
+    return sum(point[0] for point in points) / len(points), sum(point[1] for point in points) / len(points)
@@ -0,0 +1,265 @@
+import functools
+import math
+import time
+
+CATCH_UP = 'catch_up'
+SKIP = 'skip'
+POLICIES = (CATCH_UP, SKIP)
+
+
+class SamplingStats:
+    """
+    Running statistics of a sampling loop. Computed incrementally, so memory use does not depend on the number of
+    samples.
+
+    Jitter is the delay between the scheduled time of a sample and the moment the remote call was actually started.
+    Latency is the duration of the remote call.
+    """
+
+    def __init__(self):
+        self.samples = 0
+        self.missed_deadlines = 0
+        self.mean_jitter = 0.0
+        self.max_jitter = 0.0
+        self.mean_latency = 0.0
+        self.max_latency = 0.0
+        self._jitter_m2 = 0.0
+
+    def add(self, jitter: float, latency: float):
+        self.samples += 1
+        delta = jitter - self.mean_jitter
+        self.mean_jitter += delta / self.samples
+        self._jitter_m2 += delta * (jitter - self.mean_jitter)
+        self.max_jitter = max(self.max_jitter, jitter)
+        self.mean_latency += (latency - self.mean_latency) / self.samples
+        self.max_latency = max(self.max_latency, latency)
+
+    @property
+    def std_jitter(self) -> float:
+        return math.sqrt(self._jitter_m2 / self.samples) if self.samples else 0.0
+
+    def __str__(self):
+        return (f'{self.samples} samples, {self.missed_deadlines} missed deadlines, '
+                f'jitter mean {self.mean_jitter * 1e3:.3f} ms, std {self.std_jitter * 1e3:.3f} ms, '
+                f'max {self.max_jitter * 1e3:.3f} ms, '
+                f'latency mean {self.mean_latency * 1e3:.3f} ms, max {self.max_latency * 1e3:.3f} ms')
+
+
+class Tick:
+    """
+    One scheduled sample of DeadlineScheduler
+
+    :ivar index: Number of the sample
+    :ivar scheduled: Scheduled time of the sample in seconds since the start of the loop
+    :ivar timestamp: Actual time when the remote call was started, in seconds since the start of the loop.
+        Set by :meth:`call`.
+    :ivar latency: Duration of the remote call in seconds. Set by :meth:`call`.
+    """
+    __slots__ = ('index', 'scheduled', 'timestamp', 'latency', '_scheduler')
+
+    def __init__(self, scheduler, index, scheduled):
+        self._scheduler = scheduler
+        self.index = index
+        self.scheduled = scheduled
+        self.timestamp = None
+        self.latency = None
+
+    def call(self, func, *args, **kwargs):
+        """Calls func, measures its timestamp and latency and returns its result"""
+        clock = self._scheduler.clock
+        start = clock()
+        result = func(*args, **kwargs)
+        end = clock()
+        self.timestamp = start - self._scheduler.start_time
+        self.latency = end - start
+        self._scheduler.stats.add(self.timestamp - self.scheduled, self.latency)
+        return result
+
+    async def acall(self, func, *args, **kwargs):
+        """Asynchronous version of :meth:`call`. Runs func in the default executor of the event loop."""
+        import asyncio
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(self.call, func, *args, **kwargs))
+
+
+class DeadlineScheduler:
+    """
+    Sampling loop that targets absolute deadlines on a monotonic clock.
+
+    Deadlines are ``start + n * interval``, so time spent in remote calls does not accumulate into drift. If a sample
+    is late by a whole interval or more, the deadline is counted as missed and handled according to the policy:
+
+    * 'catch_up': every scheduled sample is still taken, late ones immediately one after another
+    * 'skip': missed deadlines are dropped and the sample is taken for the latest deadline that has passed
+
+    Iterate over the scheduler to get :class:`Tick` objects and use :meth:`Tick.call` for the remote call::
+
+        for tick in DeadlineScheduler(interval=1, duration=600):
+            potential = tick.call(wr_connection.getPotential)
+
+    In coroutines use ``async for`` and :meth:`Tick.acall` instead, then waiting does not block the event loop.
+
+    When the duration is set, iteration lasts for the whole duration, i.e. after the last sample the scheduler
+    waits until the duration has passed.
+
+    :param interval: Time between samples in seconds. It can be changed during iteration.
+    :param duration: Duration of the loop in seconds. Samples are scheduled while ``scheduled < duration``.
+        If None, the loop runs until :meth:`stop` is called.
+    :param policy: 'catch_up' or 'skip'
+    :param clock: Monotonic clock function returning seconds
+    :param sleep: Sleep function
+    :param offset: Scheduled time of the first sample. The loop behaves as if it had started offset seconds ago,
+        which is used to resume interrupted measurements.
+    """
+
+    def __init__(self, interval: float, duration: float = None, policy: str = CATCH_UP,
+                 clock=time.perf_counter, sleep=time.sleep, offset: float = 0):
+        if interval <= 0:
+            raise ValueError(f'Sampling interval must be positive, got {interval}')
+        if policy not in POLICIES:
+            raise ValueError(f'Unknown sampling policy "{policy}". Use one of: {", ".join(POLICIES)}')
+        self.interval = interval
+        self.duration = duration
+        self.policy = policy
+        self.clock = clock
+        self.sleep = sleep
+        self.stats = SamplingStats()
+        self.offset = offset
+        self.start_time = None
+        self._stopped = False
+
+    def stop(self):
+        """Stops the loop after the current sample without waiting for the rest of the duration"""
+        self._stopped = True
+
+    def elapsed(self) -> float:
+        """Seconds since the start of the loop"""
+        return self.clock() - self.start_time
+
+    def __iter__(self):
+        for wait, tick in self._schedule():
+            if wait > 0:
+                self.sleep(wait)
+            if tick is not None:
+                yield tick
+
+    async def _aiterate(self):
+        import asyncio
+        for wait, tick in self._schedule():
+            if wait > 0:
+                await asyncio.sleep(wait)
+            if tick is not None:
+                yield tick
+
+    def __aiter__(self):
+        return self._aiterate()
+
+    def _schedule(self):
+        """
+        Yields (seconds to wait, tick) pairs. The last pair has tick None and waits for the rest of the duration.
+        Shared by synchronous and asynchronous iteration, which only differ in how they wait.
+        """
+        self.start_time = self.clock() - self.offset
+        scheduled = self.offset
+        index = 0
+        while not self._stopped and self._in_duration(scheduled):
+            wait = 0
+            lateness = self.elapsed() - scheduled
+            if lateness < 0:
+                wait = -lateness
+            elif lateness >= self.interval:
+                scheduled = self._handle_missed(scheduled, lateness)
+            yield wait, Tick(self, index, scheduled)
+            index += 1
+            scheduled += self.interval
+        if not self._stopped and self.duration is not None:
+            remaining = self.duration - self.elapsed()
+            if remaining > 0:
+                yield remaining, None
+
+    def _in_duration(self, scheduled):
+        return self.duration is None or scheduled < self.duration
+
+    def _handle_missed(self, scheduled, lateness):
+        """Counts missed deadlines and returns the deadline for the next sample"""
+        if self.policy == CATCH_UP:
+            self.stats.missed_deadlines += 1
+            return scheduled
+        skipped = math.floor(lateness / self.interval)
+        if self.duration is not None:  # do not skip past the end of the loop
+            skipped = min(skipped, math.ceil((self.duration - scheduled) / self.interval) - 1)
+        self.stats.missed_deadlines += skipped
+        return scheduled + skipped * self.interval
+
+
+class LogSpacing:
+    """
+    Sampling intervals that grow with the time since the start of the loop, so samples are evenly spaced on a
+    logarithmic time axis: dense after a potential step, sparse on the plateau.
+
+    Use it to change :attr:`DeadlineScheduler.interval` after every sample::
+
+        scheduler.interval = spacing.next_interval(tick.scheduled, value)
+
+    :param min_interval: First and smallest interval in seconds
+    :param max_interval: Largest interval in seconds
+    :param points_per_decade: Number of samples per decade of time
+    """
+
+    def __init__(self, min_interval: float, max_interval: float, points_per_decade: float = 10):
+        _check_intervals(min_interval, max_interval)
+        if points_per_decade <= 0:
+            raise ValueError(f'Points per decade must be positive, got {points_per_decade}')
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.points_per_decade = points_per_decade
+        self._growth = 10 ** (1 / points_per_decade) - 1
+
+    def next_interval(self, scheduled: float, value=None) -> float:
+        """Interval after the sample scheduled at the given time. The value is not used."""
+        return min(max(self.min_interval, scheduled * self._growth), self.max_interval)
+
+
+class ChangeDrivenSpacing:
+    """
+    Sampling intervals driven by the change of the measured value: the interval grows by ``factor`` while the
+    relative change between consecutive samples stays below the threshold, and shrinks by ``factor`` when it
+    exceeds it.
+
+    :param min_interval: First and smallest interval in seconds
+    :param max_interval: Largest interval in seconds
+    :param threshold: Relative change between consecutive samples, e.g. 0.01 for 1 %
+    :param floor: Absolute value below which changes are compared to the floor instead of the value, so noise
+        around zero does not keep the interval small
+    :param factor: Factor the interval grows or shrinks by
+    """
+
+    def __init__(self, min_interval: float, max_interval: float, threshold: float = 0.01, floor: float = 1e-9,
+                 factor: float = 2.0):
+        _check_intervals(min_interval, max_interval)
+        if threshold <= 0 or factor <= 1:
+            raise ValueError(f'Threshold must be positive and factor greater than 1, got {threshold} and {factor}')
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.threshold = threshold
+        self.floor = floor
+        self.factor = factor
+        self._interval = min_interval
+        self._previous = None
+
+    def next_interval(self, scheduled: float, value: float) -> float:
+        """Interval after the sample with the given value"""
+        if self._previous is not None:
+            change = abs(value - self._previous) / max(abs(self._previous), self.floor)
+            if change < self.threshold:
+                self._interval = min(self._interval * self.factor, self.max_interval)
+            else:
+                self._interval = max(self._interval / self.factor, self.min_interval)
+        self._previous = value
+        return self._interval
+
+
+def _check_intervals(min_interval, max_interval):
+    if not 0 < min_interval <= max_interval:
+        raise ValueError(f'Intervals must satisfy 0 < min_interval <= max_interval, got {min_interval} and '
+                         f'{max_interval}')
@@ -0,0 +1,436 @@
+"""
+Schemas of measurement parameters.
+
+Every measurement has a schema with types, ranges and allowed values of its parameters and constraints between
+parameters. Schemas are compiled once into lists of small check functions, so validation of a parameter set takes
+microseconds. Measurements validate their parameters on construction, before anything is sent to the instrument, and
+raise ParameterError that lists all problems at once. Many parameter sets, e.g. of a sweep, can be checked with
+:func:`validate_many` without creating measurements.
+"""
+import numbers
+import os
+from abc import ABC, abstractmethod
+
+from autothalix.scheduler import POLICIES
+
+_MISSING = object()
+POTENTIOSTAT_MODES = ('Potentiostatic', 'Galvanostatic', 'PseudoGalvanostatic')
+
+
+class ParameterError(ValueError):
+    """
+    Invalid measurement parameters
+
+    :ivar problems: List of messages, one per problem
+    """
+
+    def __init__(self, measurement_name: str, problems: list):
+        self.measurement_name = measurement_name
+        self.problems = list(problems)
+        super().__init__(f'Invalid parameters of {measurement_name}:\n\t' + '\n\t'.join(self.problems))
+
+
+class Field(ABC):
+    """
+    Base of parameter fields
+
+    :param required: The parameter must be set. Optional parameters have defaults in measurement classes.
+    :param nullable: None is allowed
+    """
+
+    def __init__(self, required: bool = True, nullable: bool = False):
+        self.required = required
+        self.nullable = nullable
+
+    def compile(self, name):
+        """Returns a function that takes a value and returns a problem message or None"""
+        check = self._compile(name)
+        if not self.nullable:
+            return check
+
+        def nullable_check(value):
+            return None if value is None else check(value)
+        return nullable_check
+
+    @abstractmethod
+    def _compile(self, name):
+        pass
+
+
+class Number(Field):
+    """
+    Real number. Booleans are rejected.
+
+    :param minimum: Smallest allowed value
+    :param maximum: Largest allowed value
+    :param positive: The value must be greater than 0
+    :param integer: The value must be an int
+    :param multiple_of: The value must be a multiple of this number
+    """
+
+    def __init__(self, minimum: float = None, maximum: float = None, positive: bool = False, integer: bool = False,
+                 multiple_of: float = None, **kwargs):
+        super().__init__(**kwargs)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.positive = positive
+        self.integer = integer
+        self.multiple_of = multiple_of
+
+    def _compile(self, name):
+        kind = numbers.Integral if self.integer else numbers.Real
+        kind_name = 'an integer' if self.integer else 'a number'
+        minimum, maximum, positive, multiple_of = self.minimum, self.maximum, self.positive, self.multiple_of
+
+        def check(value):
+            if isinstance(value, bool) or not isinstance(value, kind):
+                return f'{name} must be {kind_name}, got {value!r}'
+            if positive and value <= 0:
+                return f'{name} must be positive, got {value!r}'
+            if minimum is not None and value < minimum:
+                return f'{name} must be at least {minimum}, got {value!r}'
+            if maximum is not None and value > maximum:
+                return f'{name} must be at most {maximum}, got {value!r}'
+            if multiple_of is not None and value % multiple_of:
+                return f'{name} must be a multiple of {multiple_of}, got {value!r}'
+            return None
+        return check
+
+
+class Choice(Field):
+    """One of the given values, compared exactly as Thales compares them"""
+
+    def __init__(self, *choices, **kwargs):
+        super().__init__(**kwargs)
+        self.choices = choices
+
+    def _compile(self, name):
+        choices = frozenset(self.choices)
+        listed = ', '.join(repr(choice) for choice in self.choices)
+
+        def check(value):
+            try:
+                if value in choices:
+                    return None
+            except TypeError:  # unhashable
+                pass
+            return f'{name} must be one of {listed}, got {value!r}'
+        return check
+
+
+class PotentiostatModeChoice(Choice):
+    """Name of a potentiostat mode as in the baseline file, in any case, or a member of PotentiostatMode"""
+
+    def __init__(self, **kwargs):
+        super().__init__(*POTENTIOSTAT_MODES, **kwargs)
+
+    def _compile(self, name):
+        names = {choice.lower() for choice in self.choices}
+        listed = ', '.join(repr(choice) for choice in self.choices)
+
+        def check(value):
+            if isinstance(value, str) and value.lower() in names:
+                return None
+            enum_name = getattr(value, 'name', None)  # PotentiostatMode.POTMODE_GALVANOSTATIC
+            if isinstance(enum_name, str) and enum_name.lower().replace('potmode_', '', 1) in names:
+                return None
+            return f'{name} must be one of {listed}, got {value!r}'
+        return check
+
+
+class Text(Field):
+    """Non-empty string or path"""
+
+    def _compile(self, name):
+        def check(value):
+            if not isinstance(value, (str, os.PathLike)) or not os.fspath(value):
+                return f'{name} must be a non-empty string, got {value!r}'
+            return None
+        return check
+
+
+class Flag(Field):
+    """Boolean, 'yes' and 'no' in YAML"""
+
+    def _compile(self, name):
+        def check(value):
+            if not isinstance(value, bool):
+                return f'{name} must be true or false (yes or no), got {value!r}'
+            return None
+        return check
+
+
+class Items(Field):
+    """
+    Non-empty list or tuple
+
+    :param item: Field of the items
+    :param unique: Items must be unique
+    """
+
+    def __init__(self, item: Field, unique: bool = False, **kwargs):
+        super().__init__(**kwargs)
+        self.item = item
+        self.unique = unique
+
+    def _compile(self, name):
+        check_item = self.item.compile(f'{name} item')
+        unique = self.unique
+
+        def check(value):
+            if not isinstance(value, (list, tuple)) or not value:
+                return f'{name} must be a non-empty list, got {value!r}'
+            for item in value:
+                problem = check_item(item)
+                if problem is not None:
+                    return problem
+            if unique and len(set(value)) != len(value):
+                return f'{name} must not contain duplicates, got {value!r}'
+            return None
+        return check
+
+
+def ordered(*names, strict: bool = False):
+    """Constraint that the parameters are in non-decreasing (or increasing if strict) order"""
+    relation = '<' if strict else '<='
+
+    def rule(values):
+        present = [(name, values[name]) for name in names if values.get(name) is not None]
+        for (first, a), (second, b) in zip(present, present[1:]):
+            if (a >= b) if strict else (a > b):
+                return f'{first} ({a}) must be {relation} {second} ({b})'
+        return None
+    return rule
+
+
+class Schema:
+    """
+    Compiled schema of one measurement
+
+    :param measurement_name: Name of the measurement
+    :param fields: dict of parameter names and Fields
+    :param rules: Functions that take a dict of values and return a problem message or None. They are called only if
+        all fields are valid.
+    """
+
+    def __init__(self, measurement_name: str, fields: dict, rules=()):
+        self.measurement_name = measurement_name
+        self.fields = dict(fields)
+        self.rules = list(rules)
+        self.required = [name for name, field in self.fields.items() if field.required]
+        self._checks = [(name, field.compile(name)) for name, field in self.fields.items()]
+
+    def extend(self, measurement_name: str, fields: dict, rules=()) -> 'Schema':
+        """Returns a new schema with the fields and rules of this one and the given ones"""
+        return Schema(measurement_name, {**self.fields, **fields}, self.rules + list(rules))
+
+    def problems(self, values: dict) -> list:
+        """
+        Validates parameter values
+
+        :param values: dict of parameter values. Missing optional parameters are not checked.
+        :return: List of problem messages, empty if the values are valid
+        """
+        problems = [f'{name} is not set' for name in self.required if name not in values]
+        for name, check in self._checks:
+            value = values.get(name, _MISSING)
+            if value is not _MISSING:
+                problem = check(value)
+                if problem is not None:
+                    problems.append(problem)
+        if problems:
+            return problems
+        for rule in self.rules:
+            problem = rule(values)
+            if problem is not None:
+                problems.append(problem)
+        return problems
+
+    def validate(self, values: dict):
+        """Raises ParameterError listing all problems of the values"""
+        problems = self.problems(values)
+        if problems:
+            raise ParameterError(self.measurement_name, problems)
+
+    def values_of(self, measurement) -> dict:
+        """Values of the fields of a measurement object"""
+        return {name: getattr(measurement, name) for name in self.fields if hasattr(measurement, name)}
+
+
+_NAMING = Choice('dateTime', 'counter', 'individual')
+_COMMON = {
+    'cache_policy': Choice('reuse', 'refresh', required=False),
+    'cache_max_age': Number(positive=True, required=False, nullable=True),
+}
+_RELATION = Choice('absolute', 'relative')
+
+CV = Schema('cv', {
+    **_COMMON,
+    'counter': Number(integer=True, minimum=0),
+    'cycles': Number(minimum=0.5, multiple_of=0.5),
+    'end_hold_time': Number(minimum=0),
+    'end_potential': Number(),
+    'lower_reversing_potential': Number(),
+    'naming': _NAMING,
+    'maximum_current': Number(),
+    'minimum_current': Number(),
+    'output_path': Text(),
+    'ohmic_drop': Number(minimum=0),
+    'samples_per_cycle': Number(integer=True, positive=True),
+    'scan_rate': Number(positive=True),
+    'start_hold_time': Number(minimum=0),
+    'start_potential': Number(),
+    'upper_reversing_potential': Number(),
+    'analog_function_generator': Flag(),
+    'auto_restart_at_current_overflow': Flag(),
+    'auto_restart_at_current_underflow': Flag(),
+}, [
+    ordered('lower_reversing_potential', 'start_potential', 'upper_reversing_potential'),
+    ordered('lower_reversing_potential', 'end_potential', 'upper_reversing_potential'),
+    ordered('lower_reversing_potential', 'upper_reversing_potential', strict=True),
+    ordered('minimum_current', 'maximum_current', strict=True),
+])
+
+LSV = Schema('lsv', {
+    **_COMMON,
+    'absolute_tolerance': Number(minimum=0),
+    'counter': Number(integer=True, minimum=0),
+    'first_edge_potential': Number(),
+    'first_edge_potential_relation': _RELATION,
+    'fourth_edge_potential': Number(),
+    'fourth_edge_potential_relation': _RELATION,
+    'maximum_current': Number(),
+    'maximum_waiting_time': Number(minimum=0),
+    'minimum_current': Number(),
+    'minimum_waiting_time': Number(minimum=0),
+    'naming': _NAMING,
+    'ohmic_drop': Number(minimum=0),
+    'output_path': Text(),
+    'potential_resolution': Number(positive=True),
+    'relative_tolerance': Number(minimum=0),
+    'scan_rate': Number(positive=True),
+    'second_edge_potential': Number(),
+    'second_edge_potential_relation': _RELATION,
+    'sweep_mode': Choice('steady state', 'fixed sampling', 'dynamic scan'),
+    'third_edge_potential': Number(),
+    'third_edge_potential_relation': _RELATION,
+}, [
+    ordered('minimum_waiting_time', 'maximum_waiting_time'),
+    ordered('minimum_current', 'maximum_current', strict=True),
+])
+
+EIS = Schema('eis', {
+    **_COMMON,
+    'potentiostat_mode': PotentiostatModeChoice(),
+    'amplitude': Number(positive=True),
+    'potential': Number(),
+    'lower_frequency_limit': Number(positive=True),
+    'start_frequency': Number(positive=True),
+    'upper_frequency_limit': Number(positive=True),
+    'lower_number_of_periods': Number(integer=True, positive=True),
+    'lower_steps_per_decade': Number(positive=True),
+    'upper_number_of_periods': Number(integer=True, positive=True),
+    'upper_steps_per_decade': Number(positive=True),
+    'scan_direction': Choice('startToMax', 'startToMin'),
+    'scan_strategy': Choice('single', 'multi', 'table'),
+    'output_path': Text(),
+    'naming': _NAMING,
+}, [
+    ordered('lower_frequency_limit', 'start_frequency', 'upper_frequency_limit'),
+])
+
+_MANUAL = Schema('manual', {
+    **_COMMON,
+    'potentiostat_mode': PotentiostatModeChoice(),
+    'output_path': Text(),
+    'sampling_policy': Choice(*POLICIES, required=False),
+    'record_timing': Flag(required=False),
+    'streaming': Flag(required=False),
+    'stream_flush_interval': Number(positive=True, required=False),
+    'stream_flush_rows': Number(integer=True, positive=True, required=False),
+    'output_format': Choice('csv', 'binary', 'both', required=False),
+    'log_every': Number(integer=True, minimum=0, required=False),
+    'checkpoint_interval': Number(minimum=0, required=False, nullable=True),
+    'live_capacity': Number(integer=True, positive=True, required=False),
+})
+
+OCP = _MANUAL.extend('ocp', {
+    'current': Number(),
+    'delta': Number(positive=True),
+    'seconds': Number(positive=True),
+    'reducer': Choice('bucket', 'deadband', 'lttb', required=False, nullable=True),
+    'bucket_seconds': Number(positive=True, required=False),
+    'deadband': Number(minimum=0, required=False),
+    'deadband_max_interval': Number(positive=True, required=False, nullable=True),
+    'lttb_bucket_size': Number(integer=True, positive=True, required=False),
+    'store_raw': Flag(required=False),
+    'steady_state': Flag(required=False),
+    'steady_state_drift': Number(positive=True, required=False),
+    'steady_state_window': Number(positive=True, required=False),
+    'steady_state_z': Number(minimum=0, required=False),
+})
+
+IMP = _MANUAL.extend('imp', {
+    'amplitude': Number(positive=True),
+    'current': Number(),
+    'delta': Number(positive=True),
+    'frequency': Number(positive=True),
+    'number_of_periods': Number(integer=True, positive=True),
+    'seconds': Number(positive=True),
+    'frequencies': Items(Number(positive=True), unique=True, required=False, nullable=True),
+    'sweep_budget': Number(positive=True, required=False, nullable=True),
+    'min_number_of_periods': Number(integer=True, positive=True, required=False),
+}, [
+    ordered('min_number_of_periods', 'number_of_periods'),
+])
+
+CA = _MANUAL.extend('ca', {
+    'induction_pot': Number(),
+    'induction_t': Number(minimum=0),
+    'electrolysis_pot': Number(),
+    'electrolysis_t': Number(positive=True),
+    'relaxation_pot': Number(),
+    'relaxation_t': Number(minimum=0),
+    'sample_rate': Number(positive=True),
+    'sampling_mode': Choice('fixed', 'log', 'adaptive', required=False),
+    'min_sampling_interval': Number(positive=True, required=False),
+    'max_sampling_interval': Number(positive=True, required=False),
+    'points_per_decade': Number(positive=True, required=False),
+    'change_threshold': Number(positive=True, required=False),
+    'stop_charge': Number(positive=True, required=False, nullable=True),
+    'stop_current_stable': Number(positive=True, required=False, nullable=True),
+    'analytics_window': Number(integer=True, minimum=2, required=False),
+}, [
+    ordered('min_sampling_interval', 'max_sampling_interval'),
+])
+
+SCHEMAS = {schema.measurement_name: schema for schema in (CV, LSV, EIS, OCP, IMP, CA)}
+
+
+def schema_for(measurement_name: str) -> Schema:
+    if measurement_name not in SCHEMAS:
+        raise ValueError(f'No schema for measurement "{measurement_name}". Use one of: {", ".join(SCHEMAS)}')
+    return SCHEMAS[measurement_name]
+
+
+def validate_many(measurement_name: str, parameter_sets, baseline_path: str = None) -> dict:
+    """
+    Validates many parameter sets of one measurement without creating measurements, e.g. all points of a sweep
+
+    :param measurement_name: Name of the measurement
+    :param parameter_sets: Iterable of dicts with parameters. Parameters that are not set are taken from the baseline
+        file, like measurements do.
+    :param baseline_path: Path to the baseline file. Defaults to 'baseline.yaml' in the current working directory.
+    :return: dict with indices of invalid parameter sets as keys and lists of problems as values. Empty if all sets
+        are valid.
+    """
+    from autothalix.baseline import DEFAULT_BASELINE_PATH, baseline_registry
+
+    schema = schema_for(measurement_name)
+    defaults = baseline_registry.defaults(measurement_name, baseline_path or DEFAULT_BASELINE_PATH)
+    invalid = {}
+    for index, parameters in enumerate(parameter_sets):
+        problems = schema.problems({**defaults, **parameters})
+        if problems:
+            invalid[index] = problems
+    return invalid
@@ -0,0 +1,168 @@
+import time
+from datetime import datetime
+
+from autothalix.logging import logger
+from autothalix.measurements import MEASUREMENT_CLASSES
+from autothalix.shadow import disable_parameter_shadow, enable_parameter_shadow, parameter_shadow
+from autothalix.utils import hold_potentiostat, release_potentiostat
+
+
+class StepResult:
+    """
+    Outcome of one step of a Sequence
+
+    :ivar measurement: The measurement object of the step
+    :ivar started_at: datetime when the step started
+    :ivar seconds: Duration of the step in seconds
+    :ivar ok: True if the step finished without errors
+    :ivar error: The exception raised by the step, if any
+    """
+
+    def __init__(self, measurement, started_at, seconds, ok, error=None):
+        self.measurement = measurement
+        self.started_at = started_at
+        self.seconds = seconds
+        self.ok = ok
+        self.error = error
+
+    def __str__(self):
+        status = 'ok' if self.ok else f'failed: {self.error}'
+        return f'{self.measurement} {self.measurement.measurement_id}: {self.seconds:.3f} s, {status}'
+
+
+class Sequence:
+    """
+    Runs measurements one after another over one connection.
+
+    Compared to calling run() of every measurement:
+
+    * parameters that the potentiostat already holds from a previous step are not sent again (see autothalix.shadow)
+    * the potentiostat is kept enabled between consecutive steps that enable it by themselves (EIS and manual
+      measurements) and use the same potentiostat mode. It is disabled before other steps, at the end of the
+      sequence and if a step fails.
+    * duration of every step is reported
+
+    :param wr_connection: ThalesRemoteScriptWrapper object
+    :param steps: List of measurement objects created with the same wr_connection
+    :param keep_potentiostat: Keep the potentiostat enabled between compatible steps
+    :param skip_unchanged_parameters: Enable parameter shadow for the connection during the sequence
+    :param stop_on_error: Stop at the first failed step and raise its exception. If False, failed steps are
+        reported in results and the sequence goes on.
+    """
+
+    def __init__(self, wr_connection, steps, keep_potentiostat: bool = True, skip_unchanged_parameters: bool = True,
+                 stop_on_error: bool = True):
+        for step in steps:
+            if step.wr_connection is not wr_connection:
+                raise ValueError(f'Step {step} {step.measurement_id} uses another connection')
+        self.wr_connection = wr_connection
+        self.steps = list(steps)
+        self.keep_potentiostat = keep_potentiostat
+        self.skip_unchanged_parameters = skip_unchanged_parameters
+        self.stop_on_error = stop_on_error
+        self.results = []
+
+    @classmethod
+    def from_yaml(cls, wr_connection, path: str, name: str = None, measurement_id: str = None,
+                  baseline_path: str = None, **kwargs):
+        """
+        Creates a sequence from a YAML file. Every protocol in the file is a list of steps, and every step is a
+        single-key dict with the measurement name and its parameters, the same way as in the baseline file::
+
+            ca_then_eis:
+              - ca:
+                  measurement_id: sample_1
+                  electrolysis_t: 60.0
+              - eis:
+                  measurement_id: sample_1
+                  potential: 0.2
+
+        Parameters that are not set in the step are taken from the baseline file.
+
+        :param wr_connection: ThalesRemoteScriptWrapper object
+        :param path: Path to the YAML file
+        :param name: Name of the protocol in the file. Can be omitted if the file contains only one protocol.
+        :param measurement_id: Default measurement_id for steps that do not set it
+        :param baseline_path: Path to the baseline file for the measurements
+        :param kwargs: Passed to Sequence constructor
+        """
+        import yaml
+
+        with open(path, 'r') as file:
+            protocols = yaml.safe_load(file)
+        if name is None:
+            if len(protocols) != 1:
+                raise ValueError(f'{path} contains several protocols, choose one of: {", ".join(protocols)}')
+            name = next(iter(protocols))
+        steps = []
+        for step in protocols[name]:
+            (measurement_name, parameters), = step.items()
+            if measurement_name not in MEASUREMENT_CLASSES:
+                raise ValueError(f'Unknown measurement "{measurement_name}" in protocol {name}. '
+                                 f'Use one of: {", ".join(MEASUREMENT_CLASSES)}')
+            parameters = dict(parameters or {})
+            step_id = parameters.pop('measurement_id', measurement_id)
+            if step_id is None:
+                raise ValueError(f'measurement_id is not set for step {measurement_name} of protocol {name}')
+            steps.append(MEASUREMENT_CLASSES[measurement_name](wr_connection, step_id, baseline_path=baseline_path,
+                                                               **parameters))
+        return cls(wr_connection, steps, **kwargs)
+
+    def run(self):
+        """
+        Runs all steps. Stops at the first failed step and raises its exception, unless stop_on_error is False.
+
+        :return: List of StepResult
+        """
+        self.results = []
+        shadow_enabled = parameter_shadow(self.wr_connection) is not None
+        if self.skip_unchanged_parameters:
+            enable_parameter_shadow(self.wr_connection)
+        previous = None
+        try:
+            for step in self.steps:
+                self._prepare_potentiostat(previous, step)
+                self._run_step(step)
+                previous = step
+        finally:
+            release_potentiostat(self.wr_connection)
+            self._log_summary()
+            if self.skip_unchanged_parameters and not shadow_enabled:
+                disable_parameter_shadow(self.wr_connection)
+        return self.results
+
+    def _prepare_potentiostat(self, previous, step):
+        if not self.keep_potentiostat:
+            return
+        if previous is not None and not self._compatible(previous, step):
+            release_potentiostat(self.wr_connection)
+        if step._manages_potentiostat:
+            hold_potentiostat(self.wr_connection)
+
+    @staticmethod
+    def _compatible(previous, step):
+        """Whether the potentiostat can stay enabled between two steps"""
+        return (previous._manages_potentiostat and step._manages_potentiostat
+                and previous.potentiostat_mode == step.potentiostat_mode)
+
+    def _run_step(self, step):
+        started_at = datetime.now()
+        start = time.perf_counter()
+        try:
+            step.run()
+        except BaseException as e:
+            self.results.append(StepResult(step, started_at, time.perf_counter() - start, False, e))
+            if self.stop_on_error or not isinstance(e, Exception):  # KeyboardInterrupt always stops
+                raise
+            logger.error(f'Step {step} {step.measurement_id} failed, continuing: "{e}"')
+            return
+        self.results.append(StepResult(step, started_at, time.perf_counter() - start, True))
+
+    def _log_summary(self):
+        message = f'Sequence finished {len(self.results)} of {len(self.steps)} steps:\n'
+        for result in self.results:
+            message += f'\t{result}\n'
+        shadow = parameter_shadow(self.wr_connection)
+        if shadow is not None:
+            message += f'\t{shadow.calls_saved} remote calls saved by parameter shadow\n'
+        logger.info(message)
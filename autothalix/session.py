@@ -0,0 +1,252 @@
+"""
+Long-lived connection to Thales.
+
+:class:`Session` replaces initialize_experiment() in scripts that run for a long time or are started often:
+
+* offset calibration is skipped if the workstation was calibrated less than ``calibration_ttl`` seconds ago. Times of
+  calibrations are kept in a small JSON file by serial number of the workstation, so they survive restarts of the
+  script.
+* an optional keep-alive thread sends heartbeats to the Term while no measurement runs and reconnects if the
+  connection dropped
+* measurements run through a session reconnect instead of raising ConnectionError, and the parameters that the
+  potentiostat held before the drop are sent again (see autothalix.shadow)
+
+Usage::
+
+    with Session(calibration_ttl=3600, keep_alive_interval=30) as zahner_zennium:
+        OpenCircuitPotential(zahner_zennium, 'sample_1').run()
+"""
+import json
+import os
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+
+from autothalix.logging import logger
+from autothalix.metrics import InstrumentedScriptWrapper
+from autothalix.shadow import enable_parameter_shadow, parameter_shadow
+from autothalix.utils import calibrate_offsets
+
+DEFAULT_CALIBRATION_FILE = '.autothalix_calibration.json'
+
+_sessions = weakref.WeakKeyDictionary()
+
+
+def connection_session(wr_connection):
+    """
+    :return: Session that manages the connection, or None
+    """
+    return _sessions.get(wr_connection)
+
+
+class Session:
+    """
+    Connection to Thales that is kept alive, reconnects and caches offset calibration
+
+    :param port: Port of the Term on localhost. Defaults to the Term port 260.
+    :param calibration_ttl: Seconds a calibration stays valid. 0 calibrates on every connect, None never
+        recalibrates a workstation that was calibrated once.
+    :param calibration_file: JSON file with times of calibrations by workstation serial number. None keeps them only
+        in this process.
+    :param keep_alive_interval: Seconds between heartbeats while no measurement runs. None disables keep-alive.
+    :param reconnect_attempts: Number of attempts to reconnect before ConnectionError is raised
+    :param reconnect_delay: Seconds between attempts to reconnect
+    :param collect_metrics: Wrap the script wrapper in InstrumentedScriptWrapper, see autothalix.metrics
+
+    Parameter shadow is always enabled for connections of a session, it holds the state replayed after reconnects.
+    """
+
+    def __init__(self, port: int = None, calibration_ttl: float = 3600, calibration_file=DEFAULT_CALIBRATION_FILE,
+                 keep_alive_interval: float = None, reconnect_attempts: int = 3, reconnect_delay: float = 1.0,
+                 collect_metrics: bool = False):
+        self.port = port
+        self.calibration_ttl = calibration_ttl
+        self.calibration_file = calibration_file
+        self.keep_alive_interval = keep_alive_interval
+        self.reconnect_attempts = reconnect_attempts
+        self.reconnect_delay = reconnect_delay
+        self.collect_metrics = collect_metrics
+        self.wr_connection = None
+        self.connection = None
+        self.serial_number = None
+        self.reconnects = 0
+        self._calibrations = {}
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._keep_alive_thread = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def open(self):
+        """
+        Connects to Thales, forces it into remote script mode and calibrates offsets unless a valid calibration exists
+
+        :return: ThalesRemoteScriptWrapper object
+        """
+        from thales_remote.script_wrapper import ThalesRemoteScriptWrapper
+
+        with self._lock:
+            self.connection = self._connect()
+            self.wr_connection = ThalesRemoteScriptWrapper(self.connection)
+            if self.collect_metrics:
+                self.wr_connection = InstrumentedScriptWrapper(self.wr_connection)
+            enable_parameter_shadow(self.wr_connection)
+            _sessions[self.wr_connection] = self
+            self._prepare()
+        if self.keep_alive_interval:
+            self._stop.clear()
+            self._keep_alive_thread = threading.Thread(target=self._keep_alive, name='autothalix Session keep-alive',
+                                                       daemon=True)
+            self._keep_alive_thread.start()
+        return self.wr_connection
+
+    def close(self):
+        """Stops keep-alive and disconnects"""
+        self._stop.set()
+        if self._keep_alive_thread is not None:
+            self._keep_alive_thread.join()
+            self._keep_alive_thread = None
+        with self._lock:
+            if self.connection is not None and self.connection.isConnectedToTerm():
+                self.connection.disconnectFromTerm()
+            if self.wr_connection is not None:
+                _sessions.pop(self.wr_connection, None)
+
+    def _connect(self):
+        from thales_remote.connection import ThalesRemoteConnection
+
+        connection = ThalesRemoteConnection()
+        if self.port is not None:
+            connection._term_port = self.port
+        connection.connectToTerm("localhost", "ScriptRemote")  # do not change to anything besides localhost
+        return connection
+
+    def _prepare(self):
+        """Puts Thales into remote script mode and calibrates offsets if needed"""
+        self.wr_connection.forceThalesIntoRemoteScript()
+        if self.serial_number is None:
+            self.serial_number = self.wr_connection.getSerialNumberFromTerm()
+        self.calibrate()
+
+    @property
+    def calibration_age(self):
+        """Seconds since the last calibration of the workstation, None if it is unknown"""
+        calibrated_at = self._load_calibrations().get(self.serial_number)
+        return None if calibrated_at is None else time.time() - calibrated_at
+
+    def calibrate(self, force: bool = False) -> bool:
+        """
+        Calibrates offsets unless a valid calibration exists
+
+        :param force: Calibrate anyway
+        :return: True if offsets were calibrated
+        """
+        with self._lock:
+            age = self.calibration_age
+            if not force and age is not None and (self.calibration_ttl is None or age < self.calibration_ttl):
+                logger.info(f'Offsets of workstation {self.serial_number} were calibrated {age:.0f} s ago, '
+                            f'skipping calibration')
+                return False
+            logger.info(f'Calibrating offsets of workstation {self.serial_number}')
+            calibrate_offsets(self.wr_connection)
+            self._save_calibration(time.time())
+            return True
+
+    def _load_calibrations(self):
+        if self.calibration_file is not None and os.path.exists(self.calibration_file):
+            try:
+                with open(self.calibration_file) as file:
+                    self._calibrations.update(json.load(file))
+            except (OSError, ValueError) as e:
+                logger.warning(f'Ignoring calibration file {self.calibration_file}: {e}')
+        return self._calibrations
+
+    def _save_calibration(self, calibrated_at):
+        self._calibrations = dict(self._load_calibrations(), **{self.serial_number: calibrated_at})
+        if self.calibration_file is None:
+            return
+        temporary_path = self.calibration_file + '.part'
+        with open(temporary_path, 'w') as file:
+            json.dump(self._calibrations, file, indent=1)
+        os.replace(temporary_path, self.calibration_file)
+
+    def reconnect(self):
+        """
+        Replaces the dropped connection with a new one and sends again the parameters the potentiostat held
+
+        :raises ConnectionError: If all attempts fail
+        """
+        with self._lock:
+            shadow = parameter_shadow(self.wr_connection)
+            held = shadow.values if shadow is not None else {}
+            if self.connection is not None:
+                _tear_down(self.connection)
+            for attempt in range(1, self.reconnect_attempts + 1):
+                try:
+                    self.connection = self._connect()
+                    break
+                except Exception as e:
+                    logger.warning(f'Reconnect attempt {attempt} of {self.reconnect_attempts} failed: "{e}"')
+                    if attempt == self.reconnect_attempts:
+                        raise ConnectionError(f'Could not reconnect to Thales after {attempt} attempts') from e
+                    time.sleep(self.reconnect_delay)
+            self.wr_connection._remote_connection = self.connection
+            self.reconnects += 1
+            self._prepare()
+            shadow = enable_parameter_shadow(self.wr_connection)
+            shadow.invalidate()
+            for setter, value in held.items():
+                shadow.send(self.wr_connection, setter, value)
+            logger.info(f'Reconnected to Thales, {len(held)} parameters sent again')
+
+    def ensure_connected(self):
+        """Reconnects if the connection is closed"""
+        with self._lock:
+            if not self.connection.isConnectedToTerm():
+                logger.warning('Connection to Thales is closed, reconnecting')
+                self.reconnect()
+
+    @contextmanager
+    def busy(self):
+        """Pauses keep-alive while the block runs, so heartbeats do not interleave with measurement commands"""
+        with self._lock:
+            yield
+
+    def _keep_alive(self):
+        while not self._stop.wait(self.keep_alive_interval):
+            if not self._lock.acquire(blocking=False):
+                continue  # a measurement is running
+            try:
+                if self.connection.isConnectedToTerm():
+                    self.wr_connection.getWorkstationHeartBeat(timeout=self.keep_alive_interval)
+                else:
+                    self.reconnect()
+            except Exception as e:
+                logger.warning(f'Heartbeat failed: "{e}", reconnecting')
+                try:
+                    self.reconnect()
+                except ConnectionError as error:
+                    logger.error(str(error))
+            finally:
+                self._lock.release()
+
+
+def _tear_down(connection):
+    """
+    Releases a dropped connection like ThalesRemoteConnection.disconnectFromTerm, without the farewell to the Term:
+    stops the receiving thread, closes the socket and frees threads waiting for replies. Errors are ignored, the
+    connection may be half closed.
+    """
+    if connection.isConnectedToTerm():
+        for step in (connection._stopTelegramListener, connection._closeSocket):
+            try:
+                step()
+            except Exception as e:
+                logger.debug(f'Ignoring error while closing the dropped connection: "{e}"')
+    for queue in getattr(connection, '_queuesForChannels', {}).values():
+        queue.put(None)
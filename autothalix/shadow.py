@@ -0,0 +1,96 @@
+import weakref
+
+
+class ParameterShadow:
+    """
+    Last parameter values sent to the instrument through one connection.
+
+    Setters are called through :meth:`send`, which skips the remote call if the instrument already holds the same
+    value. Values are compared together with their type, because Thales receives ints and floats in different
+    formats. If a setter raises, its value is forgotten, because the state of the instrument is unknown.
+    """
+
+    def __init__(self):
+        self._values = {}
+        self.calls_sent = 0
+        self.calls_saved = 0
+
+    def send(self, wr_connection, setter: str, value, force: bool = False):
+        """
+        Calls ``wr_connection.<setter>(value)`` unless the same value was already sent
+
+        :param wr_connection: ThalesRemoteScriptWrapper object
+        :param setter: Name of the setter method, e.g. 'setCVScanRate'
+        :param value: Value to set
+        :param force: Send the value even if it did not change. Use for values that the instrument changes by
+            itself, e.g. file counters.
+        :return: Response of the setter, or None if the call was skipped
+        """
+        if not force and self.holds(setter, value):
+            self.calls_saved += 1
+            return None
+        self._values.pop(setter, None)
+        result = getattr(wr_connection, setter)(value)
+        self._values[setter] = value
+        self.calls_sent += 1
+        return result
+
+    def holds(self, setter: str, value) -> bool:
+        """Returns True if the instrument holds the value of the setter"""
+        if setter not in self._values:
+            return False
+        last = self._values[setter]
+        return type(last) is type(value) and last == value
+
+    def record(self, setter: str, value):
+        """Records a value that was set on the instrument bypassing :meth:`send`"""
+        self._values[setter] = value
+
+    def forget(self, *setters: str):
+        """Forgets values of the setters, so they will be sent next time"""
+        for setter in setters:
+            self._values.pop(setter, None)
+
+    def invalidate(self):
+        """Forgets all values. Call it after reconnect or offsets calibration."""
+        self._values.clear()
+
+    @property
+    def values(self) -> dict:
+        """Copy of last sent values by setter name"""
+        return dict(self._values)
+
+
+_shadows = weakref.WeakKeyDictionary()
+
+
+def enable_parameter_shadow(wr_connection) -> ParameterShadow:
+    """
+    Enables parameter shadow for the connection. After that measurements will send only changed parameters.
+
+    :param wr_connection: ThalesRemoteScriptWrapper object
+    :return: ParameterShadow of the connection
+    """
+    shadow = _shadows.get(wr_connection)
+    if shadow is None:
+        shadow = _shadows[wr_connection] = ParameterShadow()
+    return shadow
+
+
+def disable_parameter_shadow(wr_connection):
+    """Disables parameter shadow for the connection"""
+    _shadows.pop(wr_connection, None)
+
+
+def parameter_shadow(wr_connection):
+    """
+    :return: ParameterShadow of the connection, or None if it is not enabled
+    """
+    return _shadows.get(wr_connection)
+
+
+def invalidate_parameter_shadow(wr_connection):
+    """Forgets all values sent through the connection, if parameter shadow is enabled for it"""
+    shadow = _shadows.get(wr_connection)
+    if shadow is not None:
+        shadow.invalidate()
@@ -0,0 +1,94 @@
+import csv
+import os
+import threading
+
+
+class StreamingCSVWriter:
+    """
+    Appends rows to a CSV file from a background thread.
+
+    :meth:`append` only puts a row into the current chunk, so disk latency never stalls the acquisition loop. The
+    background thread takes the chunk when it has ``flush_rows`` rows or every ``flush_interval`` seconds, writes it
+    to ``<file_path>.part`` and flushes it to disk. If the process crashes, the ``.part`` file contains everything up
+    to the last flush. :meth:`close` writes the rest and atomically renames the file to ``file_path``.
+
+    :param file_path: Path of the final CSV file
+    :param columns: Header row
+    :param flush_interval: Maximum time in seconds a row waits in memory before it is written
+    :param flush_rows: Number of rows that triggers writing before flush_interval passed
+    """
+
+    def __init__(self, file_path: str, columns, flush_interval: float = 5.0, flush_rows: int = 1000):
+        self.file_path = file_path
+        self.part_path = file_path + '.part'
+        self.flush_interval = flush_interval
+        self.flush_rows = flush_rows
+        self.rows_written = 0
+        self._chunk = []
+        self._closing = False
+        self._error = None
+        self._condition = threading.Condition()
+        self._file = open(self.part_path, mode='w', newline='')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(columns)
+        self._thread = threading.Thread(target=self._run, name=f'StreamingCSVWriter({os.path.basename(file_path)})',
+                                        daemon=True)
+        self._thread.start()
+
+    def append(self, row):
+        """
+        Appends a row (sequence of values in order of columns)
+
+        :raises Exception: Error of the background thread if writing failed, rows are not accepted anymore
+        """
+        if self._error is not None:
+            raise self._error
+        with self._condition:
+            self._chunk.append(row)
+            if len(self._chunk) >= self.flush_rows:
+                self._condition.notify()
+
+    def close(self):
+        """
+        Writes remaining rows and renames the .part file to the final file path
+
+        :raises Exception: Error of the background thread if writing failed. The .part file is kept.
+        """
+        if self._thread is None:
+            return
+        with self._condition:
+            self._closing = True
+            self._condition.notify()
+        self._thread.join()
+        self._thread = None
+        self._file.close()
+        if self._error is not None:
+            raise self._error
+        os.replace(self.part_path, self.file_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if not self._closing and len(self._chunk) < self.flush_rows:
+                    self._condition.wait(self.flush_interval)
+                chunk, self._chunk = self._chunk, []
+                closing = self._closing
+            if chunk and self._error is None:
+                try:
+                    self._write(chunk)
+                except Exception as e:  # raised by the next append() and by close()
+                    self._error = e
+            if closing:
+                return
+
+    def _write(self, chunk):
+        self._writer.writerows(chunk)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.rows_written += len(chunk)
@@ -0,0 +1,209 @@
+"""
+Parameter sweeps over measurements.
+
+A sweep runs one measurement at many points of a design, e.g. EIS at 20 potentials and 3 amplitudes::
+
+    sweep = Sweep(zahner_zennium, 'eis', 'sample_1', grid(potential=potentials, amplitude=[0.005, 0.01, 0.02]))
+    sweep.run()
+
+Designs are lists of dicts with parameter values: :func:`grid` for full factorial designs, :func:`random_design` and
+:func:`latin_hypercube` for sampling ranges of numeric parameters. All points are validated against the schema of the
+measurement before the first one runs (see autothalix.schema). Points are ordered so that consecutive points differ
+as little as possible (:func:`serpentine`): the first parameter changes monotonically and the others go back and
+forth, so the potentiostat never jumps across the whole range of a parameter. Measurements run as a Sequence, so
+unchanged parameters are not sent again and the potentiostat is kept enabled between points.
+
+Every point gets the measurement id ``<measurement_id>_<index in the design>``. Progress and ETA are logged after
+every point, and a manifest with one row per point (outcome, duration, output name and parameters) is written next
+to the results.
+"""
+import itertools
+import os
+import random
+import time
+from datetime import datetime
+
+from autothalix.logging import logger
+from autothalix.measurements import MEASUREMENT_CLASSES
+from autothalix.schema import ParameterError, validate_many
+from autothalix.sequence import Sequence
+from autothalix.utils import OUTPUT_DATETIME_FORMAT, write_dict_to_csv
+
+
+def grid(**axes) -> list:
+    """
+    Full factorial design
+
+    :param axes: Parameter names and lists of their values
+    :return: List of dicts with all combinations of the values, the last parameter changing fastest
+    """
+    names = list(axes)
+    return [dict(zip(names, values)) for values in itertools.product(*axes.values())]
+
+
+def random_design(n: int, seed=None, **ranges) -> list:
+    """
+    Points sampled uniformly from ranges of parameters
+
+    :param n: Number of points
+    :param seed: Seed of the random generator, for reproducible designs
+    :param ranges: Parameter names and (low, high) tuples
+    """
+    generator = random.Random(seed)
+    return [{name: generator.uniform(low, high) for name, (low, high) in ranges.items()} for _ in range(n)]
+
+
+def latin_hypercube(n: int, seed=None, **ranges) -> list:
+    """
+    Latin hypercube design: the range of every parameter is split into n equal strata and every stratum contains
+    exactly one point, so n points cover every parameter evenly
+
+    :param n: Number of points
+    :param seed: Seed of the random generator, for reproducible designs
+    :param ranges: Parameter names and (low, high) tuples
+    """
+    generator = random.Random(seed)
+    points = [{} for _ in range(n)]
+    for name, (low, high) in ranges.items():
+        strata = list(range(n))
+        generator.shuffle(strata)
+        for point, stratum in zip(points, strata):
+            point[name] = low + (stratum + generator.random()) / n * (high - low)
+    return points
+
+
+def serpentine(points, keys) -> list:
+    """
+    Orders points so that the first key is non-decreasing and every following key goes up and down in turns
+    within groups of equal preceding keys. Consecutive points then differ by one step of one parameter wherever
+    the design allows it.
+
+    :param points: List of dicts
+    :param keys: Parameter names, the one that is the slowest or most expensive to change first
+    """
+    if not keys:
+        return list(points)
+    key, rest = keys[0], keys[1:]
+    groups = {}
+    for point in points:
+        groups.setdefault(point.get(key), []).append(point)
+    ordered = []
+    for number, value in enumerate(sorted(groups, key=_sort_key)):
+        group = serpentine(groups[value], rest)
+        ordered += group[::-1] if number % 2 else group
+    return ordered
+
+
+def _sort_key(value):
+    return (value is None, value)
+
+
+class Sweep(Sequence):
+    """
+    Runs a measurement at every point of a design
+
+    :param wr_connection: ThalesRemoteScriptWrapper object
+    :param measurement: Measurement class or name, e.g. 'eis'
+    :param measurement_id: Prefix of the measurement ids of the points
+    :param points: List of dicts with parameters of every point, see :func:`grid`, :func:`random_design` and
+        :func:`latin_hypercube`
+    :param parameters: Parameters common to all points
+    :param order_by: Parameter names for :func:`serpentine` ordering. Defaults to the parameters of the first point
+        in their order, so put the one that is the slowest to change first. Empty list keeps the design order.
+    :param baseline_path: Path to the baseline file for the measurements
+    :param manifest_path: Path to the manifest CSV. Defaults to
+        ``<output_path>/<measurement>_<measurement_id>_<datetime>_sweep.csv`` if output_path of the measurement is a
+        directory. False disables the manifest.
+    :param progress: Function called after every point with the number of finished points, the number of all points
+        and the estimated remaining time in seconds
+    :param kwargs: Passed to Sequence, e.g. stop_on_error=False to go on after failed points
+    :raises ParameterError: If any point is invalid, with problems of all invalid points
+    """
+
+    def __init__(self, wr_connection, measurement, measurement_id: str, points, parameters: dict = None,
+                 order_by=None, baseline_path: str = None, manifest_path=None, progress=None, **kwargs):
+        measurement_class = MEASUREMENT_CLASSES[measurement] if isinstance(measurement, str) else measurement
+        name = measurement_class._measurement_name
+        points = list(points)
+        if order_by is None:
+            order_by = list(points[0]) if points else []
+        points = [dict(parameters or {}, **point) for point in points]
+        invalid = validate_many(name, points, baseline_path)
+        if invalid:
+            raise ParameterError(name, [f'point {index} {points[index]}: {problem}'
+                                        for index, problems in invalid.items() for problem in problems])
+        self.points = points
+        width = max(3, len(str(len(points) - 1)))
+        indexed = [dict(point, _index=index) for index, point in enumerate(points)]
+        self.order = [point.pop('_index') for point in serpentine(indexed, list(order_by))]
+        steps = [measurement_class(wr_connection, f'{measurement_id}_{index:0{width}d}', baseline_path=baseline_path,
+                                   **points[index]) for index in self.order]
+        super().__init__(wr_connection, steps, **kwargs)
+        self.measurement_name = name
+        self.measurement_id = measurement_id
+        self.manifest_path = manifest_path
+        self.progress = progress
+        self.created_at = datetime.today().strftime(OUTPUT_DATETIME_FORMAT)
+        self._started = None
+        logger.info(f'Sweep of {name} {measurement_id} over {len(steps)} points ordered by {", ".join(order_by)}')
+
+    def run(self):
+        """
+        Runs all points in the sweep order and writes the manifest, also if the sweep stops at a failed point
+
+        :return: List of StepResult in the sweep order
+        """
+        self._started = time.perf_counter()
+        try:
+            return super().run()
+        finally:
+            self._write_manifest()
+
+    def _run_step(self, step):
+        try:
+            super()._run_step(step)
+        finally:
+            self._report_progress()
+
+    def _report_progress(self):
+        done, total = len(self.results), len(self.steps)
+        elapsed = time.perf_counter() - self._started
+        eta = elapsed / done * (total - done)
+        failed = sum(not result.ok for result in self.results)
+        logger.info(f'Sweep {self.measurement_id}: {done}/{total} points done ({failed} failed), '
+                    f'{elapsed:.0f} s elapsed, ETA {eta:.0f} s')
+        if self.progress is not None:
+            self.progress(done, total, eta)
+
+    @property
+    def manifest(self) -> list:
+        """One dict per finished point with index, measurement id, outcome, duration, output name and parameters"""
+        rows = []
+        for index, result in zip(self.order, self.results):
+            step = result.measurement
+            rows.append(dict({
+                'index': index,
+                'measurement_id': step.measurement_id,
+                'ok': result.ok,
+                'started_at': result.started_at.isoformat(timespec='seconds'),
+                'seconds': round(result.seconds, 3),
+                'error': '' if result.error is None else repr(result.error),
+                'output_name': step._output_filename,
+            }, **self.points[index]))
+        return rows
+
+    def _write_manifest(self):
+        path = self.manifest_path
+        if path is False or not self.results:
+            return
+        if path is None:
+            output_path = getattr(self.steps[0], 'output_path', None)
+            if output_path is None or not os.path.isdir(output_path):
+                return
+            path = os.path.join(output_path,
+                                f'{self.measurement_name}_{self.measurement_id}_{self.created_at}_sweep.csv')
+        rows = self.manifest
+        columns = {column: [row.get(column, '') for row in rows] for column in dict.fromkeys(
+            column for row in rows for column in row)}
+        write_dict_to_csv(columns, path)
+        logger.info(f'Sweep manifest saved to {path}')
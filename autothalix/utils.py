@@ -1,23 +1,54 @@
 import csv
+import functools
+import re
+import weakref
+from contextlib import contextmanager
+from datetime import datetime
 from autothalix.logging import logger
-from thales_remote.connection import ThalesRemoteConnection
-from thales_remote.script_wrapper import ThalesRemoteScriptWrapper
+from autothalix.metrics import InstrumentedScriptWrapper
+from autothalix.shadow import enable_parameter_shadow, invalidate_parameter_shadow
 
 
-def initialize_experiment():
+def initialize_experiment(shadow_parameters: bool = False, port: int = None, collect_metrics: bool = False):
     """
     Initialize the experiment by connecting to the Thales Zennium and calibrating the offsets
+    :param shadow_parameters: If True, measurements will send to the potentiostat only parameters that changed since
+        the previous measurement. See autothalix.shadow
+    :param port: Port of the Term on localhost. Defaults to the Term port 260. Use it to connect to
+        autothalix.emulator.ScriptRemoteEmulator.
+    :param collect_metrics: If True, zahner_zennium is wrapped in InstrumentedScriptWrapper that collects latency of
+        every remote call. See autothalix.metrics
     :return: zennium_connection, zahner_zennium
     :rtype: ThalesRemoteConnection, ThalesRemoteScriptWrapper
     """
+    from thales_remote.connection import ThalesRemoteConnection
+    from thales_remote.script_wrapper import ThalesRemoteScriptWrapper
+
     zennium_connection = ThalesRemoteConnection()
+    if port is not None:
+        zennium_connection._term_port = port
     zennium_connection.connectToTerm("localhost", "ScriptRemote")  # do not change to anything besides localhost
     zahner_zennium = ThalesRemoteScriptWrapper(zennium_connection)
+    if collect_metrics:
+        zahner_zennium = InstrumentedScriptWrapper(zahner_zennium)
     zahner_zennium.forceThalesIntoRemoteScript()
-    zahner_zennium.calibrateOffsets()
+    if shadow_parameters:
+        enable_parameter_shadow(zahner_zennium)
+    calibrate_offsets(zahner_zennium)
     return zennium_connection, zahner_zennium
 
 
+def calibrate_offsets(wr_connection):
+    """
+    Performs offset calibration and forgets parameters remembered by parameter shadow of the connection
+    :param wr_connection: ThalesRemoteScriptWrapper object
+    :return: response string from the device
+    """
+    response = wr_connection.calibrateOffsets()
+    invalidate_parameter_shadow(wr_connection)
+    return response
+
+
 def write_dict_to_csv(dict_data, file_path):
     """
     Write a dictionary to a csv file with the keys as the header row and the values as the data rows
@@ -36,19 +67,169 @@ def write_dict_to_csv(dict_data, file_path):
             writer.writerow(row)
 
 
+def read_csv_to_dict(file_path) -> dict:
+    """
+    Reads a csv file written by write_dict_to_csv back into a dictionary of columns. Values are converted to float.
+
+    :param file_path: Path to the csv file
+    :return: dict with the header row as keys and lists of values as values
+    """
+    with open(file_path, mode='r', newline='') as file:
+        reader = csv.reader(file)
+        columns = {name: [] for name in next(reader)}
+        for row in reader:
+            for column, value in zip(columns.values(), row):
+                column.append(float(value))
+    return columns
+
+
+OUTPUT_DATETIME_FORMAT = '%d_%m_%Y_%H_%M_%S'
+_OUTPUT_FILENAME = re.compile(r'^(?P<measurement>[a-z]+)_(?P<measurement_id>.+)_'
+                              r'(?P<datetime>\d{2}_\d{2}_\d{4}_\d{2}_\d{2}_\d{2})(?=[_.]|$)')
+
+
+def parse_output_filename(filename):
+    """
+    Parses the name of an output file of a measurement, "{measurement}_{measurement_id}_{datetime}" followed by
+    an extension or a suffix added by Thales
+
+    :param filename: Name of the file without directory
+    :return: dict with 'measurement', 'measurement_id', 'started_at' (datetime) and 'output_name' (the common
+        prefix of all files of the run) keys, or None if the name was not built by a measurement
+    """
+    match = _OUTPUT_FILENAME.match(filename)
+    if match is None:
+        return None
+    try:
+        started_at = datetime.strptime(match['datetime'], OUTPUT_DATETIME_FORMAT)
+    except ValueError:
+        return None
+    return {'measurement': match['measurement'], 'measurement_id': match['measurement_id'],
+            'started_at': started_at, 'output_name': match[0]}
+
+
+@contextmanager
+def sqlite_connection(path, row_factory=None):
+    """
+    SQLite connection that commits at the end of the block, or rolls back on errors, and is closed afterwards
+
+    :param path: Path to the database file
+    :param row_factory: row_factory of the connection, e.g. sqlite3.Row
+    """
+    import sqlite3
+
+    connection = sqlite3.connect(path, timeout=30)
+    connection.row_factory = row_factory
+    try:
+        with connection:
+            yield connection
+    finally:
+        connection.close()
+
+
+def json_default(value):
+    """default of json.dumps() for parameters: enums, e.g. PotentiostatMode, by name, anything else as str"""
+    return getattr(value, 'name', str(value))
+
+
+class PotentiostatHold:
+    """
+    Keeps the potentiostat of a connection enabled between measurements, see hold_potentiostat()
+
+    :ivar enabled: True if the potentiostat was enabled and is kept enabled
+    """
+
+    def __init__(self):
+        self.enabled = False
+
+
+_holds = weakref.WeakKeyDictionary()
+
+
+def hold_potentiostat(wr_connection) -> PotentiostatHold:
+    """
+    Keeps the potentiostat enabled after measurements that enable it, until release_potentiostat() is called.
+    If a measurement fails, the potentiostat is disabled anyway.
+
+    :param wr_connection: ThalesRemoteScriptWrapper object
+    :return: PotentiostatHold of the connection
+    """
+    hold = _holds.get(wr_connection)
+    if hold is None:
+        hold = _holds[wr_connection] = PotentiostatHold()
+    return hold
+
+
+def release_potentiostat(wr_connection):
+    """Stops holding the potentiostat of the connection and disables it if it is kept enabled"""
+    hold = _holds.pop(wr_connection, None)
+    if hold is not None and hold.enabled:
+        wr_connection.disablePotentiostat()
+        logger.info("Potentiostat disabled")
+
+
+def enable_potentiostat(wr_connection):
+    """Enables the potentiostat unless it is already kept enabled by hold_potentiostat()"""
+    hold = _holds.get(wr_connection)
+    if hold is not None and hold.enabled:
+        logger.info('Potentiostat is kept enabled')
+        return
+    logger.info('Manually enabling potentiostat')
+    wr_connection.enablePotentiostat()
+    if hold is not None:
+        hold.enabled = True
+
+
+def disable_potentiostat(wr_connection, force: bool = False):
+    """
+    Disables the potentiostat unless it is held by hold_potentiostat()
+
+    :param wr_connection: ThalesRemoteScriptWrapper object
+    :param force: Disable the potentiostat even if it is held
+    """
+    hold = _holds.get(wr_connection)
+    if hold is not None and not force:
+        return
+    wr_connection.disablePotentiostat()
+    if hold is not None:
+        hold.enabled = False
+    logger.info("Potentiostat disabled")
+
+
 def safe_pot(func):
     def wrapper(self, *args, **kwargs):
-        logger.info('Manually enabling potentiostat')
-        self.wr_connection.enablePotentiostat()
+        enable_potentiostat(self.wr_connection)
         try:
             result = func(self, *args, **kwargs)
-        except Exception as e:  # disables potentiostat if an error occurs
-            self.wr_connection.disablePotentiostat()
+        except BaseException as e:  # disables potentiostat if an error occurs or the script is interrupted
             logger.error(f'Error occurred during {str(self)} measurements: "{e}"')
-            logger.info("Potentiostat disabled")
+            disable_potentiostat(self.wr_connection, force=True)
             raise e
-        self.wr_connection.disablePotentiostat()
-        logger.info("Potentiostat disabled")
+        disable_potentiostat(self.wr_connection)
         return result
 
     return wrapper
+
+
+def asafe_pot(func):
+    """Asynchronous version of safe_pot for coroutine methods"""
+    async def wrapper(self, *args, **kwargs):
+        await run_in_executor(enable_potentiostat, self.wr_connection)
+        try:
+            result = await func(self, *args, **kwargs)
+        except BaseException as e:  # disables potentiostat if an error occurs or the task is cancelled
+            logger.error(f'Error occurred during {str(self)} measurements: "{e}"')
+            await run_in_executor(disable_potentiostat, self.wr_connection, force=True)
+            raise e
+        await run_in_executor(disable_potentiostat, self.wr_connection)
+        return result
+
+    return wrapper
+
+
+async def run_in_executor(func, *args, **kwargs):
+    """Runs a blocking function in the default executor of the running event loop and returns its result"""
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
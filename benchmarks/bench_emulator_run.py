@@ -0,0 +1,45 @@
+"""
+Measures wall time and remote command count of a sequence of measurements over the real thales_remote protocol path,
+against the local ScriptRemote emulator with per-command latency, with and without parameter shadow.
+
+Usage (from the repository root): python -m benchmarks.bench_emulator_run [latency_seconds]
+"""
+import sys
+import tempfile
+import time
+
+from autothalix.emulator import ScriptRemoteEmulator
+from autothalix.measurements import CyclicVoltammetry, ElectrochemicalImpedanceSpectroscopy, Impedance, \
+    OpenCircuitPotential
+from autothalix.sequence import Sequence
+from autothalix.utils import initialize_experiment
+
+
+def run_once(latency, skip_unchanged_parameters, output_path):
+    with ScriptRemoteEmulator(latency=latency) as emulator:
+        connection, zahner_zennium = initialize_experiment(port=emulator.port)
+        steps = [
+            OpenCircuitPotential(zahner_zennium, 'bench', output_path=output_path, seconds=2),
+            Impedance(zahner_zennium, 'bench', output_path=output_path, seconds=2),
+            CyclicVoltammetry(zahner_zennium, 'bench'),
+            CyclicVoltammetry(zahner_zennium, 'bench'),
+            ElectrochemicalImpedanceSpectroscopy(zahner_zennium, 'bench'),
+        ]
+        emulator.commands.clear()
+        start = time.perf_counter()
+        Sequence(zahner_zennium, steps, skip_unchanged_parameters=skip_unchanged_parameters).run()
+        seconds = time.perf_counter() - start
+        connection.disconnectFromTerm()
+        return seconds, sum(emulator.commands.values())
+
+
+def main(latency):
+    print(f'per-command latency {latency * 1000:.1f} ms')
+    with tempfile.TemporaryDirectory() as output_path:
+        for skip in (False, True):
+            seconds, commands = run_once(latency, skip, output_path)
+            print(f'parameter shadow {"on " if skip else "off"}: {seconds:8.3f} s, {commands:4d} remote commands')
+
+
+if __name__ == '__main__':
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 0.005)
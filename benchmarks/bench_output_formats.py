@@ -0,0 +1,64 @@
+"""
+Compares write and read throughput of CSV and columnar binary outputs of manual measurements.
+
+Usage (from the repository root): python -m benchmarks.bench_output_formats [number_of_samples]
+"""
+import csv
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from autothalix.binary import csv_to_binary, read_binary, write_dict_to_binary
+from autothalix.utils import write_dict_to_csv
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def read_csv_columns(file_path):
+    with open(file_path, newline='') as file:
+        reader = csv.reader(file)
+        columns = next(reader)
+        data = {column: [] for column in columns}
+        for row in reader:
+            for column, value in zip(columns, row):
+                data[column].append(float(value))
+    return data
+
+
+def read_binary_columns(file_path):
+    """Touches every value of every column, like read_csv_columns, so memmap pages are actually read"""
+    return {column: float(values.sum()) for column, values in read_binary(file_path).items()}
+
+
+def main(samples):
+    rng = np.random.default_rng(0)
+    data = {'time': list(np.arange(samples) * 0.1), 'current_A': list(rng.normal(1e-3, 1e-5, samples))}
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path = os.path.join(directory, 'ca.csv')
+        binary_path = os.path.join(directory, 'ca.atx')
+
+        results = [
+            ('csv write', *timed(write_dict_to_csv, data, csv_path)),
+            ('binary write', *timed(write_dict_to_binary, data, binary_path)),
+            ('csv read', *timed(read_csv_columns, csv_path)),
+            ('binary read (memmap)', *timed(read_binary_columns, binary_path)),
+            ('csv -> binary', *timed(csv_to_binary, csv_path, binary_path)),
+        ]
+        sizes = {'csv': os.path.getsize(csv_path), 'binary': os.path.getsize(binary_path)}
+
+    print(f'{samples} samples, 2 columns')
+    for name, seconds, _ in results:
+        print(f'{name:<24}{seconds:>10.4f} s{samples / seconds / 1e6:>10.2f} M samples/s')
+    for name, size in sizes.items():
+        print(f'{name} size: {size / 1e6:.2f} MB')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
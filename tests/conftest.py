@@ -0,0 +1,10 @@
+import pytest
+
+from autothalix.emulator import ScriptRemoteEmulator, SimulatedCell
+
+
+@pytest.fixture
+def emulator():
+    """ScriptRemote emulator with a noiseless simulated cell"""
+    with ScriptRemoteEmulator(cell=SimulatedCell(noise=0, seed=0)) as emulator:
+        yield emulator
@@ -0,0 +1,69 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+from autothalix.analytics import ElectrolysisAnalytics, Regression, RollingStats, RunningCharge
+
+
+@pytest.fixture
+def series():
+    generator = random.Random(0)
+    times = np.cumsum([generator.uniform(0.01, 0.5) for _ in range(200)])
+    values = 1e-3 + 1e-6 * np.array([generator.gauss(0, 1) for _ in range(200)])
+    return times, values
+
+
+def test_running_charge(series):
+    """Test that the charge equals the trapezoidal integral"""
+    charge = RunningCharge()
+    assert math.isnan(charge.mean_current)
+    for time, current in zip(*series):
+        charge.add(time, current)
+    times, currents = series
+    assert charge.charge == pytest.approx(np.sum((times[1:] - times[:-1]) * (currents[1:] + currents[:-1]) / 2))
+    assert charge.mean_current == pytest.approx(charge.charge / (times[-1] - times[0]))
+
+
+def test_rolling_stats(series):
+    """Test that rolling mean and variance equal those of the last samples"""
+    _, values = series
+    stats = RollingStats(30)
+    for index, value in enumerate(values):
+        stats.add(value)
+        window = values[max(0, index - 29):index + 1]
+        assert stats.mean == pytest.approx(np.mean(window), rel=1e-12)
+        if len(window) > 1:
+            assert stats.variance == pytest.approx(np.var(window, ddof=1), rel=1e-6)
+    assert stats.full
+    with pytest.raises(ValueError):
+        RollingStats(1)
+
+
+@pytest.mark.parametrize('window', [None, 50])
+def test_regression(series, window):
+    """Test slope, intercept and slope standard error against numpy"""
+    times, values = series
+    values = 0.2 + 0.01 * times + values
+    regression = Regression(window)
+    for time, value in zip(times, values):
+        regression.add(time, value)
+    x, y = (times, values) if window is None else (times[-window:], values[-window:])
+    (slope, intercept), covariance = np.polyfit(x, y, 1, cov='unscaled')
+    residuals = y - (intercept + slope * x)
+    stderr = math.sqrt(np.sum(residuals ** 2) / (len(x) - 2) * covariance[0, 0])
+    assert regression.slope == pytest.approx(slope, rel=1e-6)
+    assert regression.intercept == pytest.approx(intercept, rel=1e-6)
+    assert regression.slope_stderr == pytest.approx(stderr, rel=1e-4)
+    assert regression.full
+
+
+def test_cottrell_slope():
+    """Test that the Cottrell slope of an ideal transient is recovered"""
+    analytics = ElectrolysisAnalytics()
+    for time in np.arange(0, 10, 0.1):
+        analytics.add(time, 2e-4 / math.sqrt(time) + 1e-6 if time else 1.0)
+    assert analytics.cottrell.slope == pytest.approx(2e-4)
+    assert analytics.cottrell.intercept == pytest.approx(1e-6)
+    assert analytics.snapshot()['samples'] == 100
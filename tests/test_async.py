@@ -0,0 +1,71 @@
+import asyncio
+import time
+
+import pytest
+
+from autothalix.measurements import ChronoAmperometry, CyclicVoltammetry, Impedance, OpenCircuitPotential
+
+
+@pytest.fixture
+def wr_connection(mocker):
+    wr_connection = mocker.MagicMock()
+    wr_connection.getPotential.return_value = 1.1
+    wr_connection.getCurrent.return_value = 0.5
+    wr_connection.getImpedance.return_value = complex(3.9, 23)
+    return wr_connection
+
+
+def test_arun_ocp(wr_connection, tmp_path):
+    """Test that asynchronous OCP takes the same samples as the synchronous one"""
+    ocp = OpenCircuitPotential(wr_connection, 'test_ocp', output_path=str(tmp_path), seconds=2, delta=1)
+    assert asyncio.run(ocp.arun())
+    assert ocp.measured_data == {'time': [0, 1], 'potential_V': [1.1, 1.1]}
+    wr_connection.enablePotentiostat.assert_called_once()
+    wr_connection.disablePotentiostat.assert_called_once()
+    assert (tmp_path / f'{ocp._output_filename}.csv').exists()
+
+
+def test_arun_impedance(wr_connection, tmp_path):
+    """Test that asynchronous impedance measurement records impedance and phase"""
+    imp = Impedance(wr_connection, 'test_imp', output_path=str(tmp_path), seconds=1, delta=1)
+    asyncio.run(imp.arun())
+    assert imp.measured_data == {'time': [0], 'impedance_Ohm': [3.9], 'phase_deg': [23]}
+
+
+def test_arun_ca(wr_connection, tmp_path):
+    """Test that every phase of asynchronous CA is executed"""
+    ca = ChronoAmperometry(wr_connection, 'test_ca', output_path=str(tmp_path), induction_t=0.1,
+                           electrolysis_t=1.0, relaxation_t=0.1)
+    asyncio.run(ca.arun())
+    assert wr_connection.setPotential.call_count == 3
+    assert ca.measured_data['current_A'] == [0.5]
+
+
+def test_arun_cv(wr_connection):
+    """Test that measurements on the side of the potentiostat run in the executor"""
+    cv = CyclicVoltammetry(wr_connection, 'test_cv')
+    asyncio.run(cv.arun())
+    wr_connection.measureCV.assert_called_once()
+
+
+def test_measurements_overlap(mocker, tmp_path):
+    """Test that waiting of one measurement does not block other tasks"""
+    connections = [mocker.MagicMock(), mocker.MagicMock()]
+    measurements = [OpenCircuitPotential(connection, f'test_ocp_{i}', output_path=str(tmp_path), seconds=1, delta=1)
+                    for i, connection in enumerate(connections)]
+
+    async def main():
+        await asyncio.gather(*(measurement.arun() for measurement in measurements))
+
+    start = time.perf_counter()
+    asyncio.run(main())
+    assert time.perf_counter() - start < 1.9
+
+
+def test_arun_disables_potentiostat_on_error(wr_connection, tmp_path):
+    """Test that the potentiostat is disabled if an asynchronous measurement fails"""
+    wr_connection.getPotential.side_effect = RuntimeError('connection lost')
+    ocp = OpenCircuitPotential(wr_connection, 'test_ocp', output_path=str(tmp_path), seconds=1)
+    with pytest.raises(RuntimeError):
+        asyncio.run(ocp.arun())
+    wr_connection.disablePotentiostat.assert_called_once()
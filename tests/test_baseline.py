@@ -0,0 +1,63 @@
+import os
+
+import pytest
+
+from autothalix.baseline import BaselineRegistry, baseline_registry
+from autothalix.measurements import OpenCircuitPotential
+
+BASELINE = """
+ocp:
+  - current: 0
+  - delta: 1
+  - output_path: "out"
+  - potentiostat_mode: "Galvanostatic"
+  - seconds: 600
+"""
+
+
+@pytest.fixture
+def baseline_file(tmp_path):
+    path = tmp_path / 'baseline.yaml'
+    path.write_text(BASELINE)
+    return str(path)
+
+
+def test_defaults(baseline_file):
+    """Test that the list of single-key dicts is compiled into a plain table"""
+    registry = BaselineRegistry()
+    assert registry.defaults('ocp', baseline_file) == {
+        'current': 0, 'delta': 1, 'output_path': 'out', 'potentiostat_mode': 'Galvanostatic', 'seconds': 600}
+
+
+def test_parsed_once(baseline_file, mocker):
+    """Test that the file is parsed only once for many lookups"""
+    registry = BaselineRegistry()
+    safe_load = mocker.patch('yaml.safe_load', wraps=__import__('yaml').safe_load)
+    for _ in range(100):
+        registry.defaults('ocp', baseline_file)
+    assert safe_load.call_count == 1
+
+
+def test_reloaded_on_change(baseline_file):
+    """Test that edits of the baseline file are picked up"""
+    registry = BaselineRegistry()
+    assert registry.defaults('ocp', baseline_file)['seconds'] == 600
+    with open(baseline_file, 'w') as file:
+        file.write(BASELINE.replace('600', '1200'))
+    stat = os.stat(baseline_file)
+    os.utime(baseline_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert registry.defaults('ocp', baseline_file)['seconds'] == 1200
+
+
+def test_missing_section(baseline_file):
+    """Test that a missing measurement section is reported"""
+    with pytest.raises(ValueError):
+        BaselineRegistry().defaults('cv', baseline_file)
+
+
+def test_explicit_baseline_path(baseline_file, mocker):
+    """Test that a measurement can use a baseline file outside the working directory"""
+    ocp = OpenCircuitPotential(mocker.MagicMock(), 'test_ocp', baseline_path=baseline_file)
+    assert ocp.output_path == 'out'
+    assert ocp._baseline_path == baseline_file
+    baseline_registry.invalidate(baseline_file)
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from autothalix.binary import csv_to_binary, read_binary, read_binary_header, write_dict_to_binary
+from autothalix.measurements import OpenCircuitPotential
+from autothalix.utils import write_dict_to_csv
+
+
+@pytest.fixture
+def data():
+    return {'time': [0, 1, 2], 'potential_V': [1.1, 1.2, 1.3]}
+
+
+def test_roundtrip(tmp_path, data):
+    """Test that written columns are read back as memory-mapped float64 arrays"""
+    path = str(tmp_path / 'ocp.atx')
+    write_dict_to_binary(data, path)
+    result = read_binary(path)
+    assert isinstance(result['potential_V'], np.memmap)
+    assert result['potential_V'].dtype == np.float64
+    np.testing.assert_array_equal(result['time'], [0, 1, 2])
+    np.testing.assert_array_equal(result['potential_V'], [1.1, 1.2, 1.3])
+
+
+def test_columns_aligned(tmp_path, data):
+    """Test that every column starts at an aligned offset"""
+    path = str(tmp_path / 'ocp.atx')
+    write_dict_to_binary(data, path)
+    header = read_binary_header(path)
+    assert header['columns'] == ['time', 'potential_V']
+    assert header['rows'] == 3
+    assert all(offset % 64 == 0 for offset in header['offsets'])
+
+
+def test_read_subset(tmp_path, data):
+    """Test that only requested columns are read"""
+    path = str(tmp_path / 'ocp.atx')
+    write_dict_to_binary(data, path)
+    assert list(read_binary(path, columns=['potential_V'], mmap=False)) == ['potential_V']
+
+
+def test_empty(tmp_path):
+    """Test that files without rows can be written and read"""
+    path = str(tmp_path / 'ocp.atx')
+    write_dict_to_binary({'time': [], 'potential_V': []}, path)
+    assert len(read_binary(path)['time']) == 0
+
+
+def test_csv_to_binary(tmp_path, data):
+    """Test that existing CSV outputs are converted"""
+    csv_path = str(tmp_path / 'ocp.csv')
+    write_dict_to_csv(data, csv_path)
+    binary_path = csv_to_binary(csv_path)
+    assert binary_path == str(tmp_path / 'ocp.atx')
+    np.testing.assert_array_equal(read_binary(binary_path)['potential_V'], data['potential_V'])
+
+
+def test_not_binary(tmp_path, data):
+    """Test that other files are rejected"""
+    csv_path = str(tmp_path / 'ocp.csv')
+    write_dict_to_csv(data, csv_path)
+    with pytest.raises(ValueError):
+        read_binary(csv_path)
+
+
+def test_measurement_binary_output(tmp_path, mocker):
+    """Test that a manual measurement can save binary output only"""
+    ocp = OpenCircuitPotential(mocker.MagicMock(), 'test_ocp', output_path=str(tmp_path), output_format='binary')
+    ocp.measured_data = data = {'time': [0, 1], 'potential_V': [1.1, 1.1]}
+    ocp._save_data()
+    assert not (tmp_path / f'{ocp._output_filename}.csv').exists()
+    np.testing.assert_array_equal(read_binary(ocp._output_file('.atx'))['time'], data['time'])
@@ -47,3 +47,67 @@ def test_phases(ca_measurement):
     ca_measurement.wr_connection.disablePotentiostat.assert_called_once()
     ca_measurement.wr_connection.getPotential.call_count == 3 # 3 phases = 3 calls
 
+
+def test_log_sampling(mocker):
+    """Test that log sampling takes fewer samples than fixed sampling at the smallest interval"""
+    wr_connection = mocker.MagicMock()
+    wr_connection.getCurrent.return_value = 1e-3
+    ca = ChronoAmperometry(wr_connection, 'test_ca', induction_t=0, relaxation_t=0, electrolysis_t=2,
+                           sampling_mode='log', min_sampling_interval=0.01, points_per_decade=5)
+    ca._start_measurements()
+    times = ca.measured_data['time']
+    assert 10 < len(times) < 40  # 200 samples at 0.01 s
+    assert times[1] - times[0] < 0.05
+    assert times[-1] - times[-2] > 0.1
+
+
+def test_adaptive_sampling(mocker):
+    """Test that adaptive sampling backs off on a flat current"""
+    wr_connection = mocker.MagicMock()
+    wr_connection.getCurrent.return_value = 1e-3
+    ca = ChronoAmperometry(wr_connection, 'test_ca', induction_t=0, relaxation_t=0, electrolysis_t=1,
+                           sampling_mode='adaptive', min_sampling_interval=0.01)
+    ca._start_measurements()
+    assert len(ca.measured_data['time']) < 10
+
+
+def test_invalid_sampling_mode(mocker):
+    with pytest.raises(ValueError):
+        ChronoAmperometry(mocker.MagicMock(), 'test_ca', sampling_mode='random')
+
+
+def test_analytics(mocker):
+    """Test that charge and rolling statistics are updated during electrolysis"""
+    wr_connection = mocker.MagicMock()
+    wr_connection.getCurrent.return_value = 1e-3
+    ca = ChronoAmperometry(wr_connection, 'test_ca', induction_t=0, relaxation_t=0, electrolysis_t=0.5,
+                           sample_rate=16)
+    ca._start_measurements()
+    times = ca.measured_data['time']
+    assert ca.analytics.samples == len(times) == 8
+    assert ca.analytics.charge.charge == pytest.approx(1e-3 * (times[-1] - times[0]))
+    assert ca.analytics.rolling.mean == pytest.approx(1e-3)
+    assert ca.stop_reason is None
+
+
+def test_stop_charge(mocker):
+    """Test that electrolysis ends when the target charge is reached"""
+    wr_connection = mocker.MagicMock()
+    wr_connection.getCurrent.return_value = -1e-3
+    ca = ChronoAmperometry(wr_connection, 'test_ca', induction_t=0, relaxation_t=0, electrolysis_t=10,
+                           sample_rate=20, stop_charge=1e-4)
+    ca._start_measurements()
+    assert 'charge' in ca.stop_reason
+    assert ca.measured_data['time'][-1] == pytest.approx(0.1, abs=0.03)
+    wr_connection.disablePotentiostat.assert_called_once()
+
+
+def test_stop_current_stable(mocker):
+    """Test that electrolysis ends when the current is stable over the window"""
+    wr_connection = mocker.MagicMock()
+    wr_connection.getCurrent.side_effect = [1e-3 / (index + 1) for index in range(5)] + [1e-5] * 100
+    ca = ChronoAmperometry(wr_connection, 'test_ca', induction_t=0, relaxation_t=0, electrolysis_t=10,
+                           sample_rate=50, stop_current_stable=0.01, analytics_window=5)
+    ca._start_measurements()
+    assert 'stable' in ca.stop_reason
+    assert len(ca.measured_data['time']) == 10
@@ -0,0 +1,75 @@
+import os
+
+import pytest
+
+from autothalix.cache import ResultCache, result_key
+from autothalix.measurements import CyclicVoltammetry, OpenCircuitPotential
+
+
+@pytest.fixture
+def wr_connection(mocker):
+    wr_connection = mocker.MagicMock()
+    wr_connection.getPotential.return_value = 1.1
+    return wr_connection
+
+
+def ocp(wr_connection, tmp_path, **kwargs):
+    kwargs.setdefault('seconds', 1)
+    return OpenCircuitPotential(wr_connection, 'test_ocp', output_path=str(tmp_path),
+                                result_cache=str(tmp_path / 'results.sqlite'), **kwargs)
+
+
+def test_result_key():
+    """Test that the key does not depend on the order of parameters, but on their values and the id"""
+    key = result_key('ocp', 'a', {'seconds': 1, 'delta': 0.5})
+    assert key == result_key('ocp', 'a', {'delta': 0.5, 'seconds': 1})
+    assert key != result_key('ocp', 'b', {'delta': 0.5, 'seconds': 1})
+    assert key != result_key('ocp', 'a', {'delta': 0.5, 'seconds': 2})
+
+
+def test_identical_run_reused(wr_connection, tmp_path):
+    """Test that an identical run is not measured again and its data is loaded"""
+    first = ocp(wr_connection, tmp_path)
+    first.run()
+    wr_connection.reset_mock()
+    second = ocp(wr_connection, tmp_path, log_every=0)  # logging does not change the result
+    second.current_datetime = 'other'
+    assert second.run()
+    wr_connection.getPotential.assert_not_called()
+    assert second._output_filename == first._output_filename
+    assert second.measured_data == {'time': [0.0], 'potential_V': [1.1]}
+
+    ocp(wr_connection, tmp_path, seconds=2).run()
+    assert wr_connection.getPotential.call_count == 2
+
+
+def test_refresh_and_missing_files(wr_connection, tmp_path):
+    """Test that results are measured again on refresh or when their files are gone"""
+    ocp(wr_connection, tmp_path).run()
+    refreshed = ocp(wr_connection, tmp_path, cache_policy='refresh')
+    refreshed.run()
+    assert wr_connection.getPotential.call_count == 2
+    os.remove(refreshed._output_file())
+    ocp(wr_connection, tmp_path).run()
+    assert wr_connection.getPotential.call_count == 3
+
+
+def test_expiry(tmp_path):
+    """Test that old results expire and can be invalidated"""
+    cache = ResultCache(str(tmp_path / 'results.sqlite'))
+    cache.store('key', 'cv', 'sample_1', 'cv_sample_1_01_01_2024_10_00_00', output_path='/not/local')
+    assert cache.lookup('key').output_name == 'cv_sample_1_01_01_2024_10_00_00'
+    assert cache.lookup('key', max_age=-1) is None
+    assert cache.invalidate(measurement='eis') == 0
+    assert cache.invalidate(measurement='cv') == 1
+    assert cache.lookup('key') is None
+
+
+def test_thales_measurement(mocker, tmp_path):
+    """Test that measurements written by Thales are cached by their configuration"""
+    wr_connection = mocker.MagicMock()
+    cache = ResultCache(str(tmp_path / 'results.sqlite'))
+    CyclicVoltammetry(wr_connection, 'test_cv', result_cache=cache).run()
+    CyclicVoltammetry(wr_connection, 'test_cv', result_cache=cache).run()
+    wr_connection.measureCV.assert_called_once()
+    assert cache.count() == 1
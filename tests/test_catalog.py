@@ -0,0 +1,91 @@
+from datetime import datetime
+
+import pytest
+
+from autothalix.catalog import RunCatalog, main
+from autothalix.measurements import CyclicVoltammetry, OpenCircuitPotential
+from autothalix.utils import parse_output_filename
+
+
+@pytest.fixture
+def wr_connection(mocker):
+    wr_connection = mocker.MagicMock()
+    wr_connection.getPotential.return_value = 1.1
+    return wr_connection
+
+
+@pytest.fixture
+def catalog_path(tmp_path):
+    return str(tmp_path / 'runs.sqlite')
+
+
+def test_parse_output_filename():
+    """Test parsing of file names built by measurements"""
+    parsed = parse_output_filename('eis_sample_1_03_02_2024_10_20_30_0001.ism')
+    assert parsed == {'measurement': 'eis', 'measurement_id': 'sample_1',
+                      'started_at': datetime(2024, 2, 3, 10, 20, 30), 'output_name': 'eis_sample_1_03_02_2024_10_20_30'}
+    assert parse_output_filename('ocp_x_03_02_2024_10_20_30.csv')['measurement_id'] == 'x'
+    assert parse_output_filename('notes.txt') is None
+    assert parse_output_filename('ocp_x_99_99_2024_10_20_30.csv') is None
+
+
+def test_runs_registered(wr_connection, catalog_path, tmp_path):
+    """Test that successful and failed runs are registered with parameters and output files"""
+    ocp = OpenCircuitPotential(wr_connection, 'sample_1', output_path=str(tmp_path), seconds=1, catalog=catalog_path)
+    ocp.run()
+    CyclicVoltammetry(wr_connection, 'sample_1', catalog=catalog_path, scan_rate=0.1).run()
+    wr_connection.measureCV.side_effect = RuntimeError('overload')
+    with pytest.raises(RuntimeError):
+        CyclicVoltammetry(wr_connection, 'sample_2', catalog=catalog_path).run()
+
+    catalog = RunCatalog(catalog_path)
+    assert catalog.count() == 3
+    run, = catalog.query('ocp')
+    assert run['ok'] is True
+    assert run['parameters']['seconds'] == 1
+    assert run['parameters']['potentiostat_mode'] == 'POTMODE_GALVANOSTATIC'
+    assert run['output_files'] == [ocp._output_filename + '.csv']
+    assert run['duration_s'] >= 0
+    assert [run['measurement_id'] for run in catalog.query('cv', parameters={'scan_rate': 0.1})] == ['sample_1']
+    failed, = catalog.query(ok=False)
+    assert failed['measurement_id'] == 'sample_2'
+    assert 'overload' in failed['error']
+
+
+def test_broken_catalog(wr_connection, tmp_path):
+    """Test that a catalog that can not be written does not fail the measurement"""
+    assert CyclicVoltammetry(wr_connection, 'sample_1', catalog=str(tmp_path / 'missing' / 'runs.sqlite')).run()
+
+
+def test_query(catalog_path):
+    """Test filters by id, time and parameters of different types"""
+    catalog = RunCatalog(catalog_path)
+    for day, potential in ((1, 0.2), (2, 0.2), (3, 0.4)):
+        catalog.register('eis', f'sample_{day % 2}', datetime(2024, 1, day), ok=True,
+                         parameters={'potential': potential, 'scan_strategy': 'single'})
+    assert len(catalog.query('eis', parameters={'potential': 0.2})) == 2
+    assert len(catalog.query('eis', 'sample_1', parameters={'potential': 0.2})) == 1
+    assert len(catalog.query(parameters={'scan_strategy': 'single', 'potential': 0.4})) == 1
+    assert [run['started_at'].day for run in catalog.query(since=datetime(2024, 1, 2))] == [2, 3]
+    assert catalog.query('eis', parameters={'missing': 1}) == []
+
+
+def test_backfill(catalog_path, tmp_path, capsys):
+    """Test that existing output files are indexed once per run"""
+    data = tmp_path / 'data'
+    (data / 'day_2').mkdir(parents=True)
+    (data / 'eis_sample_1_03_02_2024_10_20_30_0001.ism').write_text('')
+    (data / 'eis_sample_1_03_02_2024_10_20_30_0002.ism').write_text('')
+    (data / 'day_2' / 'ocp_sample_1_04_02_2024_10_20_30.csv').write_text('')
+    (data / 'notes.txt').write_text('')
+    catalog = RunCatalog(catalog_path)
+    assert catalog.backfill(str(data)) == 2
+    assert catalog.backfill(str(data)) == 0
+    run, = catalog.query('eis')
+    assert run['output_files'] == ['eis_sample_1_03_02_2024_10_20_30_0001.ism',
+                                   'eis_sample_1_03_02_2024_10_20_30_0002.ism']
+    assert run['ok'] is None
+    assert run['source'] == 'backfill'
+
+    main([catalog_path, 'query', 'ocp', '--id', 'sample_1'])
+    assert 'ocp_sample_1_04_02_2024_10_20_30' in capsys.readouterr().out
@@ -0,0 +1,86 @@
+import os
+
+import pytest
+
+from autothalix.checkpoint import CHECKPOINT_EXTENSION, JOURNAL_EXTENSION, find_checkpoint, load_checkpoint
+from autothalix.measurements import ChronoAmperometry, OpenCircuitPotential
+
+
+def failing_after(calls, value):
+    """side_effect that returns value a number of times and then fails like a lost connection"""
+    remaining = [calls]
+
+    def side_effect(*args, **kwargs):
+        remaining[0] -= 1
+        if remaining[0] < 0:
+            raise ConnectionError('Connection lost')
+        return value
+    return side_effect
+
+
+def test_ocp_resume(mocker, tmp_path):
+    """Test that an interrupted OCP continues after the checkpoint with its data and output name"""
+    wr_connection = mocker.MagicMock()
+    wr_connection.getPotential.side_effect = failing_after(5, 1.1)
+    parameters = dict(delta=0.03125, seconds=0.3125, output_path=str(tmp_path), checkpoint_interval=0)
+    ocp = OpenCircuitPotential(wr_connection, 'test_ocp', **parameters)
+    with pytest.raises(ConnectionError):
+        ocp.run()
+    checkpoint_path = find_checkpoint(str(tmp_path), 'ocp', 'test_ocp')
+    state = load_checkpoint(checkpoint_path)
+    assert state['rows'] == 5
+    assert state['elapsed'] == 0.15625
+
+    wr_connection.getPotential.side_effect = None
+    wr_connection.getPotential.return_value = 1.2
+    resumed = OpenCircuitPotential(wr_connection, 'test_ocp', resume=True, **parameters)
+    assert resumed._output_filename == ocp._output_filename
+    resumed.run()
+    assert resumed.measured_data['potential_V'] == [1.1] * 5 + [1.2] * 5
+    assert resumed.measured_data['time'][5] == 0.15625
+    assert sorted(os.listdir(tmp_path)) == [ocp._output_filename + '.csv']
+
+
+def test_ocp_reduced_data_rebuilt(mocker, tmp_path):
+    """Test that reduced data of a resumed run covers the restored samples"""
+    wr_connection = mocker.MagicMock()
+    wr_connection.getPotential.side_effect = failing_after(4, 1.0)
+    parameters = dict(delta=0.03125, seconds=0.25, output_path=str(tmp_path), checkpoint_interval=0, reducer='bucket',
+                      bucket_seconds=1)
+    with pytest.raises(ConnectionError):
+        OpenCircuitPotential(wr_connection, 'test_ocp', **parameters)._start_measurements()
+    wr_connection.getPotential.side_effect = None
+    wr_connection.getPotential.return_value = 2.0
+    resumed = OpenCircuitPotential(wr_connection, 'test_ocp', resume=True, **parameters)
+    resumed._start_measurements()
+    assert resumed.reduced_data['potential_V_mean'] == [1.5]
+    assert resumed.reduced_data['samples'] == [8]
+
+
+def test_ca_resume_skips_induction(mocker, tmp_path):
+    """Test that a CA resumed during electrolysis does not repeat the induction phase"""
+    wr_connection = mocker.MagicMock()
+    wr_connection.getCurrent.side_effect = failing_after(3, 1e-3)
+    parameters = dict(induction_t=0, relaxation_t=0, electrolysis_t=0.25, sample_rate=32, output_path=str(tmp_path),
+                      checkpoint_interval=0)
+    with pytest.raises(ConnectionError):
+        ChronoAmperometry(wr_connection, 'test_ca', **parameters)._start_measurements()
+    wr_connection.reset_mock()
+    wr_connection.getCurrent.side_effect = None
+    wr_connection.getCurrent.return_value = 2e-3
+
+    resumed = ChronoAmperometry(wr_connection, 'test_ca', resume=True, **parameters)
+    resumed._start_measurements()
+    potentials = [call.args[0] for call in wr_connection.setPotential.call_args_list]
+    assert potentials == [resumed.electrolysis_pot, resumed.relaxation_pot]
+    assert resumed.measured_data['current_A'][:3] == [1e-3] * 3
+    assert len(resumed.measured_data['current_A']) == 8
+    assert load_checkpoint(resumed._output_file(CHECKPOINT_EXTENSION))['phase'] == 'relaxation'
+    resumed._completed()
+    assert not os.path.exists(resumed._output_file(JOURNAL_EXTENSION))
+
+
+def test_resume_without_checkpoint(mocker, tmp_path):
+    """Test that resume starts from the beginning if there is no checkpoint"""
+    ocp = OpenCircuitPotential(mocker.MagicMock(), 'test_ocp', output_path=str(tmp_path), resume=True)
+    assert ocp._resumed_phase is None
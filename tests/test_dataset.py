@@ -0,0 +1,112 @@
+import os
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from autothalix.dataset import MANIFEST, PARTITION_FILE, RUN_COLUMN, Dataset, main
+from autothalix.utils import write_dict_to_csv
+
+
+def write_run(directory, measurement, measurement_id, started_at, **columns):
+    path = os.path.join(directory, f'{measurement}_{measurement_id}_{started_at:%d_%m_%Y_%H_%M_%S}.csv')
+    write_dict_to_csv(columns, path)
+    return path
+
+
+@pytest.fixture
+def output_path(tmp_path):
+    directory = tmp_path / 'data'
+    (directory / 'old').mkdir(parents=True)
+    directory = str(directory)
+    write_run(directory, 'ocp', 'sample_1', datetime(2024, 1, 1, 10), time_s=[0, 1], potential_V=[0.1, 0.2])
+    write_run(directory, 'ocp', 'sample_1', datetime(2024, 1, 1, 12), time_s=[0], potential_V=[0.3])
+    write_run(os.path.join(directory, 'old'), 'ocp', 'sample_1', datetime(2024, 1, 2, 9), time_s=[0, 1, 2],
+              potential_V=[0.4, 0.5, 0.6], current_A=[1, 2, 3])
+    write_run(directory, 'ca', 'sample_1', datetime(2024, 1, 1, 11), time_s=[0], current_A=[0.01])
+    write_run(directory, 'ocp', 'sample_2', datetime(2024, 1, 1, 10), time_s=[0], potential_V=[0.7])
+    write_run(directory, 'ocp', 'sample_1_reduced', datetime(2024, 1, 1, 10), time_s=[0], potential_V=[0])
+    # not consolidated
+    open(os.path.join(directory, 'ocp_sample_1_01_01_2024_10_00_00_reduced.csv'), 'w').write('time_s\n0\n')
+    open(os.path.join(directory, 'ocp_sample_1_01_01_2024_10_00_00.journal.csv'), 'w').write('time_s\n0\n')
+    open(os.path.join(directory, 'cv_sample_1_01_01_2024_10_00_00.csv'), 'w').write('time_s\n0\n')
+    return directory
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    return Dataset(str(tmp_path / 'dataset'))
+
+
+def test_consolidate(dataset, output_path):
+    """Test that CSVs of manual measurements are consolidated into partitions by measurement, id and date"""
+    assert dataset.consolidate(output_path, workers=2) == 6
+    assert os.path.exists(os.path.join(dataset.path, MANIFEST))
+    assert dataset.partitions('ocp', 'sample_1') == [
+        os.path.join('measurement=ocp', 'measurement_id=sample_1', f'date={date}') for date in ('2024-01-01',
+                                                                                                '2024-01-02')]
+    assert os.path.exists(os.path.join(dataset.path, dataset.partitions('ca')[0], PARTITION_FILE))
+    assert [run['rows'] for run in dataset.runs('ocp', 'sample_1')] == [2, 1, 3]
+    assert {run['measurement_id'] for run in dataset.runs('ocp')} == {'sample_1', 'sample_2', 'sample_1_reduced'}
+
+
+def test_read(dataset, output_path):
+    """Test that only requested columns and runs are read, and missing columns are NaN"""
+    dataset.consolidate(output_path, workers=1)
+    data = dataset.read('ocp', 'sample_1', columns=['potential_V', 'current_A'])
+    assert list(data) == ['potential_V', 'current_A']
+    np.testing.assert_array_equal(data['potential_V'], [0.1, 0.2, 0.3, 0.4, 0.5, 0.6])
+    np.testing.assert_array_equal(data['current_A'], [np.nan] * 3 + [1, 2, 3])
+
+    data = dataset.read('ocp', 'sample_1', since=datetime(2024, 1, 1, 11), until=datetime(2024, 1, 2))
+    assert list(data) == ['time_s', 'potential_V', RUN_COLUMN]
+    np.testing.assert_array_equal(data['potential_V'], [0.3])
+    assert data[RUN_COLUMN][0] == datetime(2024, 1, 1, 12).timestamp()
+
+    by_run = dataset.read('ocp', 'sample_1', columns=['time_s'], by_run=True)
+    assert [len(arrays['time_s']) for arrays in by_run.values()] == [2, 1, 3]
+    assert list(by_run)[0] == 'ocp_sample_1_01_01_2024_10_00_00'
+    assert dataset.read('eis', columns=['time_s'])['time_s'].size == 0
+
+
+def test_incremental(dataset, output_path):
+    """Test that only new and changed files are consolidated, and changed runs replace their rows"""
+    dataset.consolidate(output_path)
+    assert dataset.consolidate(output_path) == 0
+    path = write_run(output_path, 'ocp', 'sample_1', datetime(2024, 1, 1, 11), time_s=[0], potential_V=[0.25])
+    assert dataset.consolidate(output_path) == 1
+    np.testing.assert_array_equal(dataset.read('ocp', 'sample_1', until=datetime(2024, 1, 2))['potential_V'],
+                                  [0.1, 0.2, 0.3, 0.25])
+    write_dict_to_csv({'time_s': [0, 1], 'potential_V': [0.26, 0.27]}, path)
+    os.utime(path, ns=(1, 1))
+    assert dataset.consolidate(output_path) == 1
+    np.testing.assert_array_equal(dataset.read('ocp', 'sample_1', until=datetime(2024, 1, 2))['potential_V'],
+                                  [0.1, 0.2, 0.3, 0.26, 0.27])
+    assert len(dataset.runs('ocp', 'sample_1')) == 4
+
+
+def test_main(dataset, output_path, capsys):
+    """Test the command line"""
+    main([dataset.path, 'consolidate', output_path, '--no-recursive', '--workers', '1'])
+    assert '5 files consolidated' in capsys.readouterr().out
+    main([dataset.path, 'runs', 'ca'])
+    assert 'ca\tsample_1\t1\t' in capsys.readouterr().out
+
+
+def test_malformed_source(dataset, output_path):
+    """Test that unreadable CSVs are skipped without blocking the others, and retried by the next call"""
+    truncated = os.path.join(output_path, 'ocp_sample_3_01_01_2024_10_00_00.csv')
+    with open(truncated, 'w') as file:
+        file.write('time_s,potential_V\n0,0.1\n1,\n')
+    short = os.path.join(output_path, 'ocp_sample_1_01_01_2024_13_00_00.csv')
+    with open(short, 'w') as file:
+        file.write('time_s,potential_V\n0,0.1\n1\n')
+    assert dataset.consolidate(output_path, workers=2) == 6
+    assert all(run['path'] not in (truncated, short) for run in dataset.runs())
+    np.testing.assert_array_equal(dataset.read('ocp', 'sample_1', until=datetime(2024, 1, 2))['potential_V'],
+                                  [0.1, 0.2, 0.3])
+    assert dataset.partitions('ocp', 'sample_3') == []
+
+    write_dict_to_csv({'time_s': [0, 1], 'potential_V': [0.1, 0.2]}, truncated)
+    assert dataset.consolidate(output_path) == 1
+    assert len(dataset.runs('ocp', 'sample_3')) == 1
@@ -0,0 +1,71 @@
+import cmath
+import math
+import time
+
+import pytest
+from thales_remote.script_wrapper import PotentiostatMode
+
+from autothalix.emulator import ScriptRemoteEmulator
+from autothalix.measurements import CyclicVoltammetry, ElectrochemicalImpedanceSpectroscopy, Impedance, \
+    OpenCircuitPotential
+from autothalix.utils import initialize_experiment
+
+
+@pytest.fixture
+def zahner_zennium(emulator):
+    connection, zahner_zennium = initialize_experiment(port=emulator.port)
+    yield zahner_zennium
+    connection.disconnectFromTerm()
+
+
+def test_initialize(emulator, zahner_zennium):
+    """Test that initialize_experiment registers and calibrates against the emulator"""
+    assert zahner_zennium._remote_connection.isConnectedToTerm()
+    assert emulator.commands['CALOFFSETS'] == 1
+    assert zahner_zennium.getWorkstationHeartBeat() == 10.0
+
+
+def test_ocp_run(emulator, zahner_zennium, tmp_path):
+    """Test a full OCP run through the real protocol path"""
+    ocp = OpenCircuitPotential(zahner_zennium, 'test_ocp', output_path=str(tmp_path), seconds=1)
+    ocp.run()
+    assert ocp.measured_data['potential_V'] == [pytest.approx(0.2)]
+    assert emulator.state.enabled is False
+
+
+def test_potentiostatic_current(emulator, zahner_zennium):
+    """Test that the simulated cell follows the set potential"""
+    zahner_zennium.setPotentiostatMode(PotentiostatMode.POTMODE_POTENTIOSTATIC)
+    zahner_zennium.setPotential(0.2)
+    zahner_zennium.enablePotentiostat()
+    zahner_zennium.setPotential(1.3)
+    assert zahner_zennium.getPotential() == pytest.approx(1.3)
+    assert zahner_zennium.getCurrent() > 1.1 / 110
+    zahner_zennium.disablePotentiostat()
+    assert zahner_zennium.getCurrent() == 0
+
+
+def test_impedance_run(emulator, zahner_zennium, tmp_path):
+    """Test that impedance measurement receives magnitude and phase of the simulated cell"""
+    imp = Impedance(zahner_zennium, 'test_imp', output_path=str(tmp_path), seconds=1, frequency=1000)
+    imp.run()
+    magnitude, phase = cmath.polar(emulator.cell.impedance(1000))
+    assert imp.measured_data['impedance_Ohm'] == [pytest.approx(magnitude)]
+    assert imp.measured_data['phase_deg'] == [pytest.approx(math.degrees(phase))]
+
+
+def test_spectra_runs(emulator, zahner_zennium):
+    """Test that measurements on the side of the potentiostat pass setup checks"""
+    assert CyclicVoltammetry(zahner_zennium, 'test_cv').run()
+    assert ElectrochemicalImpedanceSpectroscopy(zahner_zennium, 'test_eis').run()
+    assert emulator.commands['CV'] == 1
+    assert emulator.commands['EIS'] == 1
+
+
+def test_command_latency():
+    """Test that configured latency is applied per command"""
+    with ScriptRemoteEmulator(command_latency={'POTENTIAL': 0.05}) as emulator:
+        start = time.perf_counter()
+        emulator._remote_reply('1:POTENTIAL:')
+        assert time.perf_counter() - start >= 0.05
+        assert emulator._remote_reply('1:NOPE:').startswith('ERROR')
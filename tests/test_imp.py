@@ -87,3 +87,40 @@ def test_start_measurements_results_1_sec(imp_measurement):
         assert imp_measurement.measured_data["impedance_Ohm"][i] == 2.1
         assert imp_measurement.measured_data["phase_deg"][i] == 20
         assert imp_measurement.measured_data["time"][i] == i
+
+
+def test_multi_frequency(mocker, tmp_path):
+    """Test sweeps over several frequencies: order, periods per time budget and wide columns"""
+    wr_connection = mocker.MagicMock()
+    wr_connection.getImpedance.side_effect = lambda frequency, amplitude, number_of_periods: complex(frequency, -1)
+    imp = Impedance(wr_connection, 'test_imp', output_path=str(tmp_path), frequencies=[10, 1000, 100], delta=1,
+                    seconds=2, number_of_periods=10)
+    assert imp.sweep_plan == [(1000, 10), (100, 10), (10, 8)]
+    imp._start_measurements()
+    frequencies = [call.kwargs['frequency'] for call in wr_connection.getImpedance.call_args_list]
+    assert frequencies == [1000, 100, 10, 10, 100, 1000]
+    assert list(imp.measured_data) == ['time', 'impedance_Ohm_1000Hz', 'phase_deg_1000Hz', 'impedance_Ohm_100Hz',
+                                       'phase_deg_100Hz', 'impedance_Ohm_10Hz', 'phase_deg_10Hz']
+    assert imp.measured_data['impedance_Ohm_10Hz'] == [10, 10]
+    frequencies, times, impedance, phase = imp.impedance_array()
+    assert list(frequencies) == [1000, 100, 10]
+    assert list(times) == [0, 1]
+    assert impedance.shape == phase.shape == (3, 2)
+    assert impedance[:, 1].tolist() == [1000, 100, 10]
+
+
+def test_sweep_budget(mocker):
+    """Test that time not used by capped high frequencies goes to the low frequencies"""
+    imp = Impedance(mocker.MagicMock(), 'test_imp', frequencies=[0.5, 2, 10, 100, 1000, 10000], delta=60,
+                    sweep_budget=30, number_of_periods=20)
+    plan = imp.sweep_plan
+    assert plan[:4] == [(10000, 20), (1000, 20), (100, 20), (10, 20)]
+    acquisition_time = sum(periods / frequency for frequency, periods in plan)
+    assert 28 <= acquisition_time <= 30
+
+
+def test_invalid_frequencies(mocker):
+    with pytest.raises(ValueError):
+        Impedance(mocker.MagicMock(), 'test_imp', frequencies=[10, 10])
+    with pytest.raises(ValueError):
+        Impedance(mocker.MagicMock(), 'test_imp', frequencies=[])
@@ -0,0 +1,41 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+# cumulative import time of the package in microseconds, see `python -X importtime`. Wall-clock time depends on the
+# load of the machine, so the budget is a benchmark that runs only when AUTOTHALIX_IMPORT_BUDGET_US is set, e.g. to
+# 150000 on a quiet machine.
+IMPORT_BUDGET_US = os.environ.get('AUTOTHALIX_IMPORT_BUDGET_US')
+LAZY_MODULES = ('yaml', 'thales_remote', 'numpy', 'asyncio', 'zahner_analysis')
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _python(code, cwd, *options):
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    return subprocess.run([sys.executable, *options, '-c', code], cwd=cwd, env=env, capture_output=True, text=True,
+                          check=True)
+
+
+def _import_time_us(cwd):
+    stderr = _python('import autothalix', cwd, '-X', 'importtime').stderr
+    for line in stderr.splitlines():
+        _, _, cumulative, name = (part.strip() for part in line.replace('|', ':').split(':'))
+        if name == 'autothalix':
+            return int(cumulative)
+    raise AssertionError(f'autothalix not found in importtime output:\n{stderr}')
+
+
+@pytest.mark.skipif(IMPORT_BUDGET_US is None, reason='benchmark, set AUTOTHALIX_IMPORT_BUDGET_US to run it')
+def test_import_time_budget(tmp_path):
+    """Test that importing the package stays within the budget. The best of three runs is taken."""
+    best = min(_import_time_us(tmp_path) for _ in range(3))
+    assert best < int(IMPORT_BUDGET_US), f'import autothalix took {best} us, budget is {IMPORT_BUDGET_US} us'
+
+
+def test_import_is_lazy_and_side_effect_free(tmp_path):
+    """Test that heavy dependencies are not imported and no log file is created on import"""
+    code = f'import sys, autothalix, autothalix.sequence; print([m for m in {LAZY_MODULES!r} if m in sys.modules])'
+    assert _python(code, tmp_path).stdout.strip() == '[]'
+    assert list(tmp_path.iterdir()) == []
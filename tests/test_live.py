@@ -0,0 +1,82 @@
+import multiprocessing
+import os
+import uuid
+
+import numpy as np
+import pytest
+
+from autothalix.live import LivePublisher, LiveSubscriber, live_name
+from autothalix.measurements import OpenCircuitPotential
+
+
+def test_ring_buffer():
+    """Test that subscribers read new rows in order and skip overwritten ones"""
+    name = f'autothalix_test_ring_{uuid.uuid4().hex}'
+    publisher = LivePublisher(name, ('time', 'value'), capacity=4)
+    try:
+        subscriber = LiveSubscriber(name)
+        assert subscriber.columns == ('time', 'value')
+        for i in range(3):
+            publisher.publish((i, i * 10))
+        np.testing.assert_array_equal(subscriber.read_new(), [[0, 0], [1, 10], [2, 20]])
+        for i in range(3, 10):
+            publisher.publish((i, i * 10))
+        rows = subscriber.read_new()
+        assert rows[-1, 0] == 9
+        assert subscriber.missed + len(rows) == 7
+        assert not subscriber.finished
+    finally:
+        publisher.close()
+    assert subscriber.finished
+    np.testing.assert_array_equal(subscriber.latest(2), [[8, 80], [9, 90]])
+    subscriber.close()
+    with pytest.raises(FileNotFoundError):
+        LiveSubscriber(name)
+
+
+def test_measurement_publishes(mocker, tmp_path):
+    """Test that samples can be read by a subscriber while the measurement runs"""
+    measurement_id = f'test_ocp_{uuid.uuid4().hex}'
+    seen = []
+
+    def get_potential():
+        subscriber = LiveSubscriber(live_name('ocp', measurement_id))
+        seen.append(subscriber.count)
+        subscriber.close()
+        return 1.1
+
+    wr_connection = mocker.MagicMock()
+    wr_connection.getPotential.side_effect = get_potential
+    ocp = OpenCircuitPotential(wr_connection, measurement_id, output_path=str(tmp_path), delta=0.1, seconds=0.3,
+                               live=True)
+    ocp._start_measurements()
+    assert seen == [0, 1, 2]
+    with pytest.raises(FileNotFoundError):
+        LiveSubscriber(live_name('ocp', measurement_id))
+
+
+def _publish_and_exit(name):
+    LivePublisher(name, ('value',), capacity=2).publish((1,))
+    os._exit(0)  # crash without closing the buffer
+
+
+@pytest.mark.skipif(os.name == 'nt', reason='needs fork, and Windows removes buffers of exited processes')
+def test_buffer_in_use():
+    """Test that a running publisher keeps its buffer, and buffers of finished or dead publishers are replaced"""
+    name = f'autothalix_test_{uuid.uuid4().hex}'
+    publisher = LivePublisher(name, ('value',))
+    try:
+        with pytest.raises(FileExistsError):
+            LivePublisher(name, ('value',))
+        publisher.publish((1,))
+        with LiveSubscriber(name) as subscriber:
+            assert subscriber.count == 1
+    finally:
+        publisher.close()
+
+    process = multiprocessing.get_context('fork').Process(target=_publish_and_exit, args=(name,))
+    process.start()
+    process.join()
+    with LiveSubscriber(name) as subscriber:
+        assert subscriber.count == 1 and not subscriber.finished
+    LivePublisher(name, ('value',)).close()
@@ -0,0 +1,90 @@
+import os
+
+import numpy as np
+import pytest
+
+from autothalix import loader
+from autothalix.loader import CACHE_DIRECTORY, find_results, load_result, load_results
+
+PARSED = []
+
+
+def parse_text(file_path):
+    """Stand-in for a zahner_analysis parser: three columns of numbers"""
+    PARSED.append(file_path)
+    values = np.loadtxt(file_path, ndmin=2)
+    return {'frequency_Hz': values[:, 0], 'impedance_Ohm': values[:, 1], 'phase_deg': values[:, 2]}
+
+
+@pytest.fixture
+def output_path(tmp_path):
+    PARSED.clear()
+    for measurement_id in ('sample_1', 'sample_2'):
+        for counter in range(2):
+            path = tmp_path / f'eis_{measurement_id}_01_01_2024_10_00_00_{counter:04d}.ism'
+            path.write_text(f'1000 {counter + 1} -10\n100 {counter + 2} -30\n')
+    (tmp_path / 'cv_sample_1_01_01_2024_10_00_00_0000.isc').write_text('')
+    return str(tmp_path)
+
+
+def test_find_results(output_path):
+    """Test that files are found by measurement name and id"""
+    assert len(find_results(output_path, 'eis')) == 4
+    paths = find_results(output_path, 'eis', 'sample_1')
+    assert [os.path.basename(path)[-9:] for path in paths] == ['_0000.ism', '_0001.ism']
+    assert len(find_results(output_path, 'cv', 'sample_1')) == 1
+    with pytest.raises(ValueError):
+        find_results(output_path, 'ocp')
+
+
+def test_find_results_exact_id(output_path):
+    """Test that a measurement id does not match longer ids that start with it"""
+    with open(os.path.join(output_path, 'eis_sample_1_b_01_01_2024_10_00_00_0000.ism'), 'w') as file:
+        file.write('1000 1 -10\n')
+    assert len(find_results(output_path, 'eis', 'sample_1')) == 2
+    assert len(find_results(output_path, 'eis', 'sample_1_b')) == 1
+    assert len(find_results(output_path, 'eis')) == 5
+
+
+def test_load_and_cache(output_path):
+    """Test that files are parsed once and read from the cache afterwards"""
+    results = load_results(output_path, 'eis', 'sample_1', workers=1, parser=parse_text)
+    assert len(PARSED) == 2
+    first = next(iter(results.values()))
+    np.testing.assert_array_equal(first['impedance_Ohm'], [1, 2])
+    assert len(os.listdir(os.path.join(output_path, CACHE_DIRECTORY))) == 2
+
+    cached = load_results(output_path, 'eis', 'sample_1', workers=1, parser=parse_text)
+    assert len(PARSED) == 2
+    assert list(cached) == list(results)
+    np.testing.assert_array_equal(next(iter(cached.values()))['phase_deg'], [-10, -30])
+
+
+def test_changed_file_reparsed(output_path):
+    """Test that a cache entry is replaced when the file changes"""
+    path = find_results(output_path, 'eis', 'sample_2')[0]
+    load_result(path, parser=parse_text)
+    with open(path, 'a') as file:
+        file.write('10 5 -45\n')
+    arrays = load_result(path, parser=parse_text)
+    assert len(PARSED) == 2
+    assert len(arrays['frequency_Hz']) == 3
+    assert len(os.listdir(os.path.join(output_path, CACHE_DIRECTORY))) == 1
+
+
+def test_process_pool(output_path):
+    """Test that uncached files are parsed in worker processes"""
+    results = load_results(output_path, 'eis', workers=2, parser=parse_text)
+    assert len(results) == 4
+    assert PARSED == []  # parsed in other processes
+    assert all(len(arrays['frequency_Hz']) == 2 for arrays in results.values())
+
+
+def test_parser_by_extension(output_path, mocker):
+    """Test that the parser is chosen by extension of the file"""
+    file_types = mocker.patch.dict(loader.FILE_TYPES, {'eis': ('.ism', mocker.MagicMock(return_value={}))})
+    path = find_results(output_path, 'eis')[0]
+    load_result(path, cache=False)
+    file_types['eis'][1].assert_called_once_with(path)
+    with pytest.raises(ValueError):
+        load_result(os.path.join(output_path, 'unknown.txt'))
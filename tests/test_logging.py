@@ -0,0 +1,45 @@
+import logging
+
+import pytest
+
+from autothalix.logging import configure_logging, logger, stop_logging
+from autothalix.measurements import OpenCircuitPotential
+
+
+@pytest.fixture
+def log_file(tmp_path):
+    path = tmp_path / 'run.log'
+    yield path
+    configure_logging()
+
+
+def test_queued_logging(log_file):
+    """Test that queued records are written by the listener with arguments formatted late"""
+    configure_logging(log_file=str(log_file), console=False, queued=True)
+    values = [1]
+    logger.info('Potential: %s V', 0.5)
+    logger.info('Values: %s', values)
+    values.append(2)  # mutable arguments are rendered when logged
+    stop_logging()
+    text = log_file.read_text()
+    assert 'Potential: 0.5 V' in text
+    assert 'Values: [1]' in text
+
+
+def test_level_and_no_file(log_file):
+    """Test that the level is applied and an empty path disables the file"""
+    configure_logging(log_file='', console=False, level=logging.WARNING)
+    assert logger.handlers == []
+    assert not logger.isEnabledFor(logging.INFO)
+
+
+def test_log_every(mocker, log_file, tmp_path):
+    """Test per-sample log decimation"""
+    configure_logging(log_file=str(log_file), console=False)
+    wr_connection = mocker.MagicMock()
+    wr_connection.getPotential.return_value = 1.1
+    ocp = OpenCircuitPotential(wr_connection, 'test', output_path=str(tmp_path), seconds=3, delta=0.5, log_every=2)
+    ocp.run()
+    text = log_file.read_text()
+    assert text.count('Potential:\t1.1V') == 3
+    assert len(ocp.measured_data['potential_V']) == 6
@@ -0,0 +1,68 @@
+import pytest
+
+from autothalix.measurements import CyclicVoltammetry, OpenCircuitPotential
+from autothalix.metrics import CallMetrics, CallStats, InstrumentedScriptWrapper, bucket_upper_bound, call_metrics
+from autothalix.shadow import enable_parameter_shadow, parameter_shadow
+
+
+@pytest.fixture
+def wr_connection(mocker):
+    wr_connection = mocker.MagicMock()
+    wr_connection.getPotential.return_value = 1.1
+    return InstrumentedScriptWrapper(wr_connection)
+
+
+def test_call_stats():
+    """Test counts, extremes and histogram percentiles"""
+    stats = CallStats()
+    for seconds in [0.001] * 99 + [0.1]:
+        stats.add(seconds)
+    assert stats.count == 100
+    assert stats.min == 0.001
+    assert stats.max == 0.1
+    assert stats.mean == pytest.approx(0.00199)
+    assert 0.001 <= stats.percentile(50) <= 0.002
+    assert stats.percentile(100) == 0.1
+    assert bucket_upper_bound(0) == 1e-6
+    with pytest.raises(ValueError):
+        stats.percentile(101)
+
+
+def test_proxy(wr_connection):
+    """Test that calls are forwarded, timed and attributed to the current measurement"""
+    metrics = wr_connection.metrics
+    assert wr_connection.getPotential() == 1.1
+    with metrics.measuring('ocp'):
+        wr_connection.getPotential()
+        wr_connection.setCurrent(0)
+    wr_connection.wrapped.getCurrent.side_effect = RuntimeError('lost')
+    with pytest.raises(RuntimeError):
+        wr_connection.getCurrent()
+    assert metrics.by_command()['getPotential'].count == 2
+    assert set(metrics.by_command('ocp')) == {'getPotential', 'setCurrent'}
+    assert metrics.by_command()['getCurrent'].errors == 1
+    assert metrics.total().count == 4
+    assert metrics.measurements == ['-', 'ocp']
+    assert wr_connection._remote_connection is wr_connection.wrapped._remote_connection
+    assert call_metrics(wr_connection.wrapped) is None
+
+
+def test_measurement_run(wr_connection, tmp_path):
+    """Test that run() attributes calls to the measurement and works with parameter shadow"""
+    enable_parameter_shadow(wr_connection)
+    for i in range(2):
+        OpenCircuitPotential(wr_connection, f'test_{i}', output_path=str(tmp_path), seconds=1).run()
+    CyclicVoltammetry(wr_connection, 'test_cv').run()
+    metrics = call_metrics(wr_connection)
+    assert metrics.by_command('ocp')['getPotential'].count == 2
+    assert metrics.by_command('ocp')['setCurrent'].count == 1
+    assert metrics.by_command('cv')['measureCV'].count == 1
+    assert parameter_shadow(wr_connection).calls_saved > 0
+    assert 'measureCV' in metrics.summary('cv')
+
+
+def test_reset():
+    metrics = CallMetrics()
+    metrics.record('getCurrent', 0.01, measurement='ca')
+    metrics.reset()
+    assert metrics.total().count == 0
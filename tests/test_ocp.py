@@ -81,3 +81,59 @@ def test_start_measurements_results_1_sec(ocp_measurement):
     for i in range(0, 4):
         assert ocp_measurement.measured_data["potential_V"][i] == 1.1
         assert ocp_measurement.measured_data["time"][i] == i
+
+
+def test_start_measurements_record_timing(ocp_measurement):
+    """Test that actual timestamps and latencies are stored on request"""
+    ocp_measurement.seconds = 1
+    ocp_measurement.record_timing = True
+    ocp_measurement._start_measurements()
+    assert set(ocp_measurement.measured_data) == {'time', 'potential_V', 'timestamp_s', 'latency_s'}
+    assert ocp_measurement.measured_data['timestamp_s'][0] >= 0
+    assert ocp_measurement.sampling_stats.samples == 1
+
+
+def test_reduced_only(mocker, tmp_path):
+    """Test that only the reduced series is kept and saved when store_raw is False"""
+    wr_connection = mocker.MagicMock()
+    wr_connection.getPotential.side_effect = [1.0, 1.0, 1.1, 1.1]
+    ocp = OpenCircuitPotential(wr_connection, 'test_ocp', output_path=str(tmp_path), seconds=2, delta=0.5,
+                               reducer='deadband', deadband=0.01, store_raw=False)
+    ocp.run()
+    assert ocp.measured_data == {'time': [0, 1.0, 1.5], 'potential_V': [1.0, 1.1, 1.1]}
+    assert len(list(tmp_path.iterdir())) == 1
+
+
+def test_raw_and_reduced(mocker, tmp_path):
+    """Test that raw and bucket-reduced series are saved to separate files"""
+    wr_connection = mocker.MagicMock()
+    wr_connection.getPotential.side_effect = [1.0, 2.0, 3.0, 4.0]
+    ocp = OpenCircuitPotential(wr_connection, 'test_ocp', output_path=str(tmp_path), seconds=2, delta=0.5,
+                               reducer='bucket', bucket_seconds=1)
+    ocp.run()
+    assert ocp.measured_data['potential_V'] == [1.0, 2.0, 3.0, 4.0]
+    assert ocp.reduced_data['potential_V_mean'] == [1.5, 3.5]
+    assert (tmp_path / f'{ocp._output_filename}_reduced.csv').exists()
+
+
+def test_steady_state(mocker):
+    """Test that a settling potential ends the measurement before the maximum duration"""
+    wr_connection = mocker.MagicMock()
+    wr_connection.getPotential.side_effect = [0.2 + 0.1 * 0.5 ** index for index in range(100)]
+    ocp = OpenCircuitPotential(wr_connection, 'test_ocp', delta=0.0625, seconds=5, steady_state=True,
+                               steady_state_window=0.25, steady_state_drift=1e-3)
+    ocp._start_measurements()
+    assert ocp.drift.window == 5
+    assert ocp.steady_at == ocp.measured_data['time'][-1] < 1
+    assert abs(ocp.drift.slope) < 1e-3
+
+
+def test_steady_state_noise(mocker):
+    """Test that noise around a flat potential is not taken for steady state, and seconds caps the duration"""
+    wr_connection = mocker.MagicMock()
+    wr_connection.getPotential.side_effect = [0.2 + 1e-3 * (-1) ** index for index in range(100)]
+    ocp = OpenCircuitPotential(wr_connection, 'test_ocp', delta=0.0625, seconds=0.5, steady_state=True,
+                               steady_state_window=0.25, steady_state_drift=1e-3)
+    ocp._start_measurements()
+    assert ocp.steady_at is None
+    assert len(ocp.measured_data['time']) == 8
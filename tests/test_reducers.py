@@ -0,0 +1,45 @@
+import math
+
+import pytest
+
+from autothalix.reducers import BucketReducer, DeadbandReducer, LTTBReducer
+
+
+def reduce(reducer, samples):
+    rows = []
+    for time, value in samples:
+        rows += reducer.add(time, value)
+    return rows + reducer.flush()
+
+
+def test_bucket():
+    """Test min, max, mean and count per time bucket"""
+    reducer = BucketReducer(10, 'potential_V')
+    rows = reduce(reducer, [(t, t % 3) for t in range(25)])
+    assert reducer.columns == ('time', 'potential_V_min', 'potential_V_max', 'potential_V_mean', 'samples')
+    assert [row[0] for row in rows] == [0, 10, 20]
+    assert [row[4] for row in rows] == [10, 10, 5]
+    assert rows[0][1:4] == (0, 2, pytest.approx(0.9))
+    with pytest.raises(ValueError):
+        BucketReducer(0)
+
+
+def test_deadband():
+    """Test that only changes above the threshold, forced samples and the last sample are stored"""
+    samples = [(0, 1.0), (1, 1.0005), (2, 1.002), (3, 1.0025), (4, 1.0026)]
+    assert reduce(DeadbandReducer(0.001), samples) == [(0, 1.0), (2, 1.002), (4, 1.0026)]
+    flat = [(t, 1.0) for t in range(10)]
+    assert [row[0] for row in reduce(DeadbandReducer(0.001, max_interval=4), flat)] == [0, 4, 8, 9]
+
+
+def test_lttb():
+    """Test that LTTB keeps the first, last and extreme samples with bounded output size"""
+    samples = [(t, math.sin(t / 50)) for t in range(1000)]
+    samples[500] = (500, 5.0)  # spike
+    rows = reduce(LTTBReducer(50), samples)
+    assert rows[0] == samples[0]
+    assert rows[-1] == samples[-1]
+    assert (500, 5.0) in rows
+    assert len(rows) <= 1000 // 50 + 2
+    assert [row[0] for row in rows] == sorted(row[0] for row in rows)
+    assert reduce(LTTBReducer(50), samples[:3]) == samples[:3]
@@ -0,0 +1,111 @@
+import pytest
+
+from autothalix.scheduler import ChangeDrivenSpacing, DeadlineScheduler, LogSpacing
+
+
+class FakeClock:
+    """Clock that advances only when somebody sleeps or a remote call takes time"""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+    def remote_call(self, latency):
+        def call():
+            self.now += latency
+            return latency
+        return call
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def test_no_drift(clock):
+    """Test that call latency does not shift the following deadlines"""
+    scheduler = DeadlineScheduler(1, 10, clock=clock, sleep=clock.sleep)
+    timestamps = []
+    for tick in scheduler:
+        tick.call(clock.remote_call(0.3))
+        timestamps.append(tick.timestamp)
+    assert timestamps == pytest.approx(list(range(10)))
+    assert clock.now - 100.0 == pytest.approx(10)  # waits for the rest of the duration
+    assert scheduler.stats.samples == 10
+    assert scheduler.stats.mean_latency == pytest.approx(0.3)
+    assert scheduler.stats.missed_deadlines == 0
+
+
+def test_catch_up(clock):
+    """Test that late samples are all taken with catch-up policy"""
+    scheduler = DeadlineScheduler(1, 10, policy='catch_up', clock=clock, sleep=clock.sleep)
+    scheduled = []
+    for tick in scheduler:
+        tick.call(clock.remote_call(3.5 if tick.index == 2 else 0.1))
+        scheduled.append(tick.scheduled)
+    assert scheduled == list(range(10))
+    assert scheduler.stats.missed_deadlines == 2
+    assert scheduler.stats.max_jitter == pytest.approx(2.5)
+
+
+def test_skip(clock):
+    """Test that missed deadlines are dropped with skip policy"""
+    scheduler = DeadlineScheduler(1, 10, policy='skip', clock=clock, sleep=clock.sleep)
+    scheduled = []
+    for tick in scheduler:
+        tick.call(clock.remote_call(3.5 if tick.index == 2 else 0.1))
+        scheduled.append(tick.scheduled)
+    assert scheduled == [0, 1, 2, 5, 6, 7, 8, 9]
+    assert scheduler.stats.missed_deadlines == 2
+
+
+def test_stop(clock):
+    """Test that the loop can be ended early"""
+    scheduler = DeadlineScheduler(1, 10, clock=clock, sleep=clock.sleep)
+    for tick in scheduler:
+        if tick.index == 3:
+            scheduler.stop()
+    assert tick.index == 3
+    assert clock.now - 100.0 == pytest.approx(3)
+
+
+def test_invalid_policy():
+    """Test that unknown policies are rejected"""
+    with pytest.raises(ValueError):
+        DeadlineScheduler(1, 10, policy='hurry')
+
+
+def test_log_spacing(clock):
+    """Test that intervals grow with time so samples are spread evenly over decades"""
+    spacing = LogSpacing(0.01, 100, points_per_decade=10)
+    scheduler = DeadlineScheduler(0.01, duration=1000, clock=clock, sleep=clock.sleep)
+    times = []
+    for tick in scheduler:
+        times.append(tick.scheduled)
+        scheduler.interval = spacing.next_interval(tick.scheduled)
+    per_decade = [sum(1 for t in times if 10 ** decade <= t < 10 ** (decade + 1)) for decade in range(0, 2)]
+    assert per_decade == [pytest.approx(10, abs=1)] * 2
+    assert len(times) < 100  # instead of 100000 samples at 0.01 s
+    assert max(b - a for a, b in zip(times, times[1:])) == pytest.approx(100)
+
+
+def test_change_driven_spacing():
+    """Test that the interval grows while the value is flat and shrinks when it changes"""
+    spacing = ChangeDrivenSpacing(0.1, 1.0, threshold=0.01)
+    intervals = [spacing.next_interval(0, value) for value in [1.0, 1.0, 1.001, 1.0, 1.0, 1.0, 2.0, 3.0]]
+    assert intervals == [0.1, 0.2, 0.4, 0.8, 1.0, 1.0, 0.5, 0.25]
+    with pytest.raises(ValueError):
+        ChangeDrivenSpacing(1.0, 0.1)
+
+
+def test_offset(clock):
+    """Test that a loop with offset continues the schedule of an interrupted loop"""
+    scheduler = DeadlineScheduler(1, 10, clock=clock, sleep=clock.sleep, offset=6)
+    scheduled = [tick.scheduled for tick in scheduler]
+    assert scheduled == [6, 7, 8, 9]
+    assert clock.now - 100.0 == pytest.approx(4)
@@ -0,0 +1,70 @@
+import pytest
+
+from autothalix.measurements import CyclicVoltammetry, ElectrochemicalImpedanceSpectroscopy, OpenCircuitPotential
+from autothalix.schema import SCHEMAS, Choice, Items, Number, ParameterError, Schema, ordered, validate_many
+
+
+def test_fields():
+    """Test types, ranges and allowed values of fields"""
+    schema = Schema('test', {
+        'cycles': Number(minimum=0.5, multiple_of=0.5),
+        'count': Number(integer=True, positive=True),
+        'mode': Choice('single', 'multi'),
+        'frequencies': Items(Number(positive=True), unique=True, required=False, nullable=True),
+    })
+    assert schema.problems({'cycles': 1.5, 'count': 3, 'mode': 'single'}) == []
+    assert schema.problems({'cycles': 1.5, 'count': 3, 'mode': 'single', 'frequencies': None}) == []
+    problems = schema.problems({'cycles': 0.7, 'count': True, 'mode': 'Single', 'frequencies': [1, 1]})
+    assert len(problems) == 4
+    assert schema.problems({'cycles': 1}) == ['count is not set', 'mode is not set']
+
+
+def test_rules():
+    """Test that cross-field rules are checked after the fields"""
+    schema = Schema('test', {'low': Number(), 'high': Number()}, [ordered('low', 'high', strict=True)])
+    assert schema.problems({'low': 1, 'high': 2}) == []
+    assert schema.problems({'low': 2, 'high': 2}) == ['low (2) must be < high (2)']
+    assert schema.problems({'low': 'a', 'high': 2}) == ["low must be a number, got 'a'"]
+
+
+def test_measurement_rejected(mocker):
+    """Test that invalid parameters are rejected before anything is sent"""
+    wr_connection = mocker.MagicMock()
+    with pytest.raises(ParameterError) as error:
+        CyclicVoltammetry(wr_connection, 'test_cv', cycles=0.7, lower_reversing_potential=2.0, naming='datetime')
+    assert len(error.value.problems) == 2  # cross-field rules are checked only if all fields are valid
+    with pytest.raises(ValueError):
+        ElectrochemicalImpedanceSpectroscopy(wr_connection, 'test_eis', start_frequency=1e5)
+    with pytest.raises(ValueError):
+        OpenCircuitPotential(wr_connection, 'test_ocp', reducer='median')
+    wr_connection.assert_not_called()
+    assert not wr_connection.method_calls
+
+
+def test_baseline_valid():
+    """Test that the baseline file is valid"""
+    for measurement_name in SCHEMAS:
+        assert validate_many(measurement_name, [{}]) == {}, measurement_name
+
+
+def test_validate_many():
+    """Test that parameter sets are merged with the baseline and problems are reported by index"""
+    invalid = validate_many('eis', [{'potential': 0.1}, {'amplitude': -1}, {'scan_strategy': 'all'}, {}])
+    assert list(invalid) == [1, 2]
+    with pytest.raises(ValueError):
+        validate_many('unknown', [{}])
+
+
+def test_potentiostat_mode(mocker):
+    """Test that potentiostat modes are checked in any case and invalid ones raise ParameterError"""
+    from thales_remote.script_wrapper import PotentiostatMode
+
+    assert validate_many('ocp', [{'potentiostat_mode': 'galvanostatic'}, {'potentiostat_mode': 'bogus'}]) == {
+        1: ["potentiostat_mode must be one of 'Potentiostatic', 'Galvanostatic', 'PseudoGalvanostatic', "
+            "got 'bogus'"]}
+    assert 0 in validate_many('eis', [{'potentiostat_mode': 1}])
+    for measurement_class in (OpenCircuitPotential, ElectrochemicalImpedanceSpectroscopy):
+        with pytest.raises(ParameterError, match='potentiostat_mode'):
+            measurement_class(mocker.MagicMock(), 'test', potentiostat_mode='bogus')
+    ocp = OpenCircuitPotential(mocker.MagicMock(), 'test', potentiostat_mode=PotentiostatMode.POTMODE_POTENTIOSTATIC)
+    assert ocp.potentiostat_mode == PotentiostatMode.POTMODE_POTENTIOSTATIC
@@ -0,0 +1,84 @@
+import pytest
+
+from autothalix.measurements import CyclicVoltammetry, Impedance, OpenCircuitPotential
+from autothalix.sequence import Sequence
+from autothalix.shadow import parameter_shadow
+
+PROTOCOL = """
+settle_and_track:
+  - ocp:
+      seconds: 1
+  - imp:
+      measurement_id: other_id
+      seconds: 1
+      potentiostat_mode: "Galvanostatic"
+  - ocp:
+      seconds: 1
+"""
+
+
+@pytest.fixture
+def wr_connection(mocker):
+    wr_connection = mocker.MagicMock()
+    wr_connection.getPotential.return_value = 1.1
+    wr_connection.getImpedance.return_value = complex(3.9, 23)
+    return wr_connection
+
+
+def test_from_yaml(wr_connection, tmp_path):
+    """Test that steps are created from the protocol file with baseline defaults"""
+    path = tmp_path / 'protocol.yaml'
+    path.write_text(PROTOCOL)
+    sequence = Sequence.from_yaml(wr_connection, str(path), measurement_id='sample_1')
+    assert [type(step) for step in sequence.steps] == [OpenCircuitPotential, Impedance, OpenCircuitPotential]
+    assert [step.measurement_id for step in sequence.steps] == ['sample_1', 'other_id', 'sample_1']
+    assert sequence.steps[1].frequency == 1000
+
+
+def test_potentiostat_kept_enabled(wr_connection, tmp_path):
+    """Test that the potentiostat is enabled once for compatible steps and disabled at the end"""
+    steps = [OpenCircuitPotential(wr_connection, f'step_{i}', output_path=str(tmp_path), seconds=1)
+             for i in range(3)]
+    results = Sequence(wr_connection, steps).run()
+    assert [result.ok for result in results] == [True, True, True]
+    wr_connection.enablePotentiostat.assert_called_once()
+    wr_connection.disablePotentiostat.assert_called_once()
+
+
+def test_incompatible_steps(wr_connection, tmp_path):
+    """Test that the potentiostat is disabled before a step with another mode or driven by Thales"""
+    steps = [
+        OpenCircuitPotential(wr_connection, 'step_1', output_path=str(tmp_path), seconds=1),
+        Impedance(wr_connection, 'step_2', output_path=str(tmp_path), seconds=1),  # potentiostatic by default
+        CyclicVoltammetry(wr_connection, 'step_3'),
+    ]
+    Sequence(wr_connection, steps).run()
+    assert wr_connection.enablePotentiostat.call_count == 2
+    assert wr_connection.disablePotentiostat.call_count == 2
+
+
+def test_redundant_parameters_skipped(wr_connection, tmp_path):
+    """Test that parameters are not sent again and the shadow is disabled after the sequence"""
+    steps = [OpenCircuitPotential(wr_connection, f'step_{i}', output_path=str(tmp_path), seconds=1)
+             for i in range(2)]
+    Sequence(wr_connection, steps).run()
+    wr_connection.setCurrent.assert_called_once()
+    assert parameter_shadow(wr_connection) is None
+
+
+def test_failed_step(wr_connection, tmp_path):
+    """Test that the sequence stops at a failed step and disables the potentiostat"""
+    wr_connection.getPotential.side_effect = [1.1, RuntimeError('connection lost')]
+    steps = [OpenCircuitPotential(wr_connection, f'step_{i}', output_path=str(tmp_path), seconds=1)
+             for i in range(3)]
+    sequence = Sequence(wr_connection, steps)
+    with pytest.raises(RuntimeError):
+        sequence.run()
+    assert [result.ok for result in sequence.results] == [True, False]
+    wr_connection.disablePotentiostat.assert_called_once()
+
+
+def test_other_connection(wr_connection, mocker):
+    """Test that all steps must use the connection of the sequence"""
+    with pytest.raises(ValueError):
+        Sequence(wr_connection, [CyclicVoltammetry(mocker.MagicMock(), 'test_cv')])
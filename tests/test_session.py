@@ -0,0 +1,108 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from autothalix.measurements import OpenCircuitPotential
+from autothalix.session import Session, connection_session
+from autothalix.shadow import parameter_shadow
+
+
+def test_calibration_cached(emulator, tmp_path):
+    """Test that a second session within the TTL does not calibrate again"""
+    calibration_file = str(tmp_path / 'calibration.json')
+    with Session(port=emulator.port, calibration_file=calibration_file) as zahner_zennium:
+        assert connection_session(zahner_zennium).serial_number == 'EMULATOR'
+    with Session(port=emulator.port, calibration_file=calibration_file) as zahner_zennium:
+        assert not connection_session(zahner_zennium).calibrate()
+    assert emulator.commands['CALOFFSETS'] == 1
+    with open(calibration_file) as file:
+        assert list(json.load(file)) == ['EMULATOR']
+
+
+def test_calibration_expired(emulator, tmp_path):
+    """Test that expired calibrations and forced calibrations calibrate"""
+    session = Session(port=emulator.port, calibration_ttl=0, calibration_file=str(tmp_path / 'calibration.json'))
+    with session:
+        assert session.calibrate()
+        session.calibration_ttl = 3600
+        assert not session.calibrate()
+        assert session.calibrate(force=True)
+    assert emulator.commands['CALOFFSETS'] == 3
+
+
+def test_reconnect_replays_parameters(emulator):
+    """Test that parameters held before the connection dropped are sent again after reconnect"""
+    session = Session(port=emulator.port, calibration_file=None)
+    with session as zahner_zennium:
+        parameter_shadow(zahner_zennium).send(zahner_zennium, 'setFrequency', 1000)
+        session.connection.disconnectFromTerm()
+        emulator.state.values.clear()
+        session.ensure_connected()
+        assert session.reconnects == 1
+        assert emulator.state.values['Frq'] == '1000'
+        assert parameter_shadow(zahner_zennium).holds('setFrequency', 1000)
+    assert emulator.commands['CALOFFSETS'] == 1
+
+
+def test_reconnect_stops_receiver(emulator):
+    """Test that reconnect stops the receiving thread of the replaced connection"""
+    session = Session(port=emulator.port, calibration_file=None)
+    with session:
+        dropped = session.connection
+        session.reconnect()
+        assert session.connection is not dropped
+        assert not dropped._receiving_worker.is_alive()
+        assert not dropped.isConnectedToTerm()
+
+
+def test_run_reconnects(emulator, tmp_path):
+    """Test that a measurement run through a session reconnects instead of raising ConnectionError"""
+    session = Session(port=emulator.port, calibration_file=None)
+    with session as zahner_zennium:
+        session.connection.disconnectFromTerm()
+        ocp = OpenCircuitPotential(zahner_zennium, 'test_ocp', output_path=str(tmp_path), seconds=1)
+        ocp.run()
+        assert session.reconnects == 1
+        assert ocp.measured_data['potential_V'] == [pytest.approx(0.2)]
+
+
+def test_arun_reconnects_without_blocking(emulator, tmp_path):
+    """Test that arun() reconnects in the executor, so other tasks run during the reconnect"""
+    session = Session(port=emulator.port, calibration_file=None)
+
+    async def main(zahner_zennium):
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.05)
+
+        task = asyncio.ensure_future(ticker())
+        ocp = OpenCircuitPotential(zahner_zennium, 'test_ocp', output_path=str(tmp_path), seconds=0.1, delta=0.1)
+        await ocp.arun()
+        task.cancel()
+        return ticks
+
+    with session as zahner_zennium:
+        session.connection.disconnectFromTerm()
+        assert asyncio.run(main(zahner_zennium)) > 10  # connecting alone takes more than a second
+        assert session.reconnects == 1
+
+
+def test_keep_alive(emulator, mocker):
+    """Test that keep-alive reconnects a dropped connection while idle"""
+    session = Session(port=emulator.port, calibration_file=None, keep_alive_interval=0.05)
+    with session:
+        with session.busy():
+            session.connection.disconnectFromTerm()
+        reconnect = mocker.spy(session, 'reconnect')
+        for _ in range(100):
+            if session.reconnects:
+                break
+            time.sleep(0.05)
+        assert reconnect.called
+        assert session.connection.isConnectedToTerm()
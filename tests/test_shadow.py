@@ -0,0 +1,82 @@
+import pytest
+
+from autothalix.measurements import CyclicVoltammetry, Impedance
+from autothalix.shadow import ParameterShadow, enable_parameter_shadow, parameter_shadow
+from autothalix.utils import calibrate_offsets
+
+
+@pytest.fixture
+def wr_connection(mocker):
+    wr_connection = mocker.MagicMock()
+    enable_parameter_shadow(wr_connection)
+    return wr_connection
+
+
+def test_shadow_is_opt_in(mocker):
+    """Test that connections without shadow send every parameter"""
+    wr_connection = mocker.MagicMock()
+    assert parameter_shadow(wr_connection) is None
+    cv = CyclicVoltammetry(wr_connection, 'test_cv')
+    cv._send_parameters()
+    cv._send_parameters()
+    assert wr_connection.setCVScanRate.call_count == 2
+
+
+def test_unchanged_values_skipped(wr_connection):
+    """Test that the second run sends only changed parameters and counters"""
+    cv = CyclicVoltammetry(wr_connection, 'test_cv')
+    cv._send_parameters()
+    cv.scan_rate = 0.1
+    cv._send_parameters()
+    assert wr_connection.setCVScanRate.call_count == 2
+    assert wr_connection.setCVStartPotential.call_count == 1
+    assert wr_connection.setCVCounter.call_count == 2  # instrument increments counter by itself
+    assert parameter_shadow(wr_connection).calls_saved == 17
+
+
+def test_value_type_matters():
+    """Test that int and float values are not treated as equal"""
+    shadow = ParameterShadow()
+    shadow.record('setCurrent', 1)
+    assert shadow.holds('setCurrent', 1)
+    assert not shadow.holds('setCurrent', 1.0)
+
+
+def test_failed_setter_forgotten(mocker):
+    """Test that a value is resent if the previous attempt failed"""
+    wr_connection = mocker.MagicMock()
+    wr_connection.setCurrent.side_effect = [RuntimeError('timeout'), None]
+    shadow = ParameterShadow()
+    with pytest.raises(RuntimeError):
+        shadow.send(wr_connection, 'setCurrent', 1.0)
+    shadow.send(wr_connection, 'setCurrent', 1.0)
+    assert wr_connection.setCurrent.call_count == 2
+
+
+def test_calibration_invalidates(wr_connection):
+    """Test that offset calibration invalidates the shadow"""
+    cv = CyclicVoltammetry(wr_connection, 'test_cv')
+    cv._send_parameters()
+    calibrate_offsets(wr_connection)
+    cv._send_parameters()
+    wr_connection.calibrateOffsets.assert_called_once()
+    assert wr_connection.setCVStartPotential.call_count == 2
+
+
+def test_cv_start_records_disabled_flags(wr_connection):
+    """Test that flags disabled by CV start are sent again on the next run"""
+    cv = CyclicVoltammetry(wr_connection, 'test_cv', analog_function_generator=True)
+    cv._send_parameters()
+    cv._start_measurements()
+    cv._send_parameters()
+    assert wr_connection.enableCVAnalogFunctionGenerator.call_count == 2
+
+
+def test_impedance_sends_setup_once(wr_connection):
+    """Test that impedance ticks do not resend frequency, amplitude and number of periods"""
+    wr_connection.getImpedance.return_value = complex(1.0, 2.0)
+    imp = Impedance(wr_connection, 'test_imp')
+    for _ in range(3):
+        imp._get_impedance(imp.frequency, imp.amplitude, imp.number_of_periods)
+    assert wr_connection.setFrequency.call_count == 1
+    assert wr_connection.getImpedance.call_count == 3
@@ -0,0 +1,87 @@
+import csv
+
+import pytest
+
+from autothalix.measurements import OpenCircuitPotential
+from autothalix.streaming import StreamingCSVWriter
+
+
+def read_csv(path):
+    with open(path, newline='') as file:
+        return list(csv.reader(file))
+
+
+def test_rows_written_on_close(tmp_path):
+    """Test that the final file appears only after close and contains all rows"""
+    path = str(tmp_path / 'data.csv')
+    writer = StreamingCSVWriter(path, ['time', 'value'], flush_interval=60, flush_rows=1000)
+    for i in range(10):
+        writer.append((i, i * 0.5))
+    assert not (tmp_path / 'data.csv').exists()
+    writer.close()
+    assert not (tmp_path / 'data.csv.part').exists()
+    rows = read_csv(path)
+    assert rows[0] == ['time', 'value']
+    assert rows[1:] == [[str(i), str(i * 0.5)] for i in range(10)]
+
+
+def test_chunks_reach_disk_before_close(tmp_path):
+    """Test that full chunks are written to the .part file during acquisition"""
+    path = str(tmp_path / 'data.csv')
+    writer = StreamingCSVWriter(path, ['time'], flush_interval=60, flush_rows=5)
+    for i in range(5):
+        writer.append((i,))
+    for _ in range(100):
+        if writer.rows_written == 5:
+            break
+        writer._thread.join(0.01)
+    assert len(read_csv(path + '.part')) == 6
+    writer.close()
+
+
+def test_interval_flush(tmp_path):
+    """Test that rows are written after flush interval even if the chunk is not full"""
+    path = str(tmp_path / 'data.csv')
+    writer = StreamingCSVWriter(path, ['time'], flush_interval=0.01, flush_rows=1000)
+    writer.append((1,))
+    writer._thread.join(0.2)
+    assert writer.rows_written == 1
+    writer.close()
+
+
+def test_write_error(tmp_path, mocker):
+    """Test that an error of the background thread is raised by the next append and by close"""
+    path = str(tmp_path / 'data.csv')
+    writer = StreamingCSVWriter(path, ['time'], flush_interval=60, flush_rows=1)
+    mocker.patch.object(writer, '_write', side_effect=ValueError('cannot write'))
+    writer.append((0,))
+    for _ in range(100):
+        if writer._error is not None:
+            break
+        writer._thread.join(0.01)
+    with pytest.raises(ValueError):
+        writer.append((1,))
+    with pytest.raises(ValueError):
+        writer.close()
+    assert not (tmp_path / 'data.csv').exists()
+
+
+def test_streaming_measurement(tmp_path, mocker):
+    """Test that streaming OCP writes samples to disk and keeps nothing in memory"""
+    wr_connection = mocker.MagicMock()
+    wr_connection.getPotential.return_value = 1.1
+    ocp = OpenCircuitPotential(wr_connection, 'test_ocp', output_path=str(tmp_path), seconds=1, streaming=True)
+    ocp.run()
+    assert ocp.measured_data == {'time': [], 'potential_V': []}
+    assert read_csv(ocp._output_file('.csv')) == [['time', 'potential_V'], ['0', '1.1']]
+
+
+def test_streaming_finalized_on_error(tmp_path, mocker):
+    """Test that samples taken before an error are finalized on disk and potentiostat is disabled"""
+    wr_connection = mocker.MagicMock()
+    wr_connection.getPotential.side_effect = [1.1, KeyboardInterrupt()]
+    ocp = OpenCircuitPotential(wr_connection, 'test_ocp', output_path=str(tmp_path), seconds=2, streaming=True)
+    with pytest.raises(KeyboardInterrupt):
+        ocp.run()
+    wr_connection.disablePotentiostat.assert_called_once()
+    assert read_csv(ocp._output_file('.csv')) == [['time', 'potential_V'], ['0', '1.1']]
@@ -0,0 +1,70 @@
+import csv
+
+import pytest
+
+from autothalix.measurements import OpenCircuitPotential
+from autothalix.schema import ParameterError
+from autothalix.sweep import Sweep, grid, latin_hypercube, random_design, serpentine
+
+
+@pytest.fixture
+def wr_connection(mocker):
+    wr_connection = mocker.MagicMock()
+    wr_connection.getPotential.return_value = 1.1
+    return wr_connection
+
+
+def test_designs():
+    """Test grid, random and latin hypercube designs"""
+    assert grid(a=[1, 2], b=['x', 'y']) == [{'a': 1, 'b': 'x'}, {'a': 1, 'b': 'y'}, {'a': 2, 'b': 'x'},
+                                            {'a': 2, 'b': 'y'}]
+    points = random_design(20, seed=1, a=(0, 1))
+    assert all(0 <= point['a'] <= 1 for point in points)
+    assert random_design(20, seed=1, a=(0, 1)) == points
+    points = latin_hypercube(10, seed=2, a=(0, 1), b=(-1, 1))
+    for name, low in (('a', 0), ('b', -1)):  # one point in every tenth of the range
+        assert sorted(int((point[name] - low) / (1 - low) * 10) for point in points) == list(range(10))
+
+
+def test_serpentine():
+    """Test that the first key is monotonic and the second one goes back and forth"""
+    points = serpentine(grid(amplitude=[0.01, 0.02], potential=[0.3, 0.1, 0.2]), ['potential', 'amplitude'])
+    assert [(point['potential'], point['amplitude']) for point in points] == [
+        (0.1, 0.01), (0.1, 0.02), (0.2, 0.02), (0.2, 0.01), (0.3, 0.01), (0.3, 0.02)]
+
+
+def test_invalid_points(wr_connection):
+    """Test that all points are validated before anything runs"""
+    with pytest.raises(ParameterError) as error:
+        Sweep(wr_connection, 'ocp', 'sweep', grid(seconds=[1, -1, 0]))
+    assert len(error.value.problems) == 2
+    assert not wr_connection.method_calls
+
+
+def test_run(wr_connection, tmp_path):
+    """Test that points run in sweep order with progress and a manifest"""
+    progress = []
+    sweep = Sweep(wr_connection, OpenCircuitPotential, 'sweep', grid(current=[0.2, 0.1], seconds=[1]),
+                  parameters={'output_path': str(tmp_path)}, progress=lambda *args: progress.append(args))
+    results = sweep.run()
+    assert [result.measurement.current for result in results] == [0.1, 0.2]
+    assert [result.measurement.measurement_id for result in results] == ['sweep_001', 'sweep_000']
+    assert [done for done, total, eta in progress] == [1, 2]
+    assert progress[-1][2] == 0
+    wr_connection.enablePotentiostat.assert_called_once()
+
+    manifest_path, = tmp_path.glob('ocp_sweep_*_sweep.csv')
+    with open(manifest_path, newline='') as file:
+        rows = list(csv.DictReader(file))
+    assert [(row['index'], row['ok'], row['current']) for row in rows] == [('1', 'True', '0.1'), ('0', 'True', '0.2')]
+
+
+def test_continue_on_error(wr_connection, tmp_path):
+    """Test that a failed point is recorded and the sweep goes on"""
+    wr_connection.getPotential.side_effect = [ConnectionError('lost'), 1.1]
+    sweep = Sweep(wr_connection, 'ocp', 'sweep', grid(current=[0.1, 0.2]), order_by=[], stop_on_error=False,
+                  parameters={'output_path': str(tmp_path), 'seconds': 1}, manifest_path=False)
+    results = sweep.run()
+    assert [result.ok for result in results] == [False, True]
+    assert sweep.manifest[0]['error'] == "ConnectionError('lost')"
+    assert not list(tmp_path.glob('*_sweep.csv'))